@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import ResumenDiario
 
-# Register your models here.
+
+@admin.register(ResumenDiario)
+class ResumenDiarioAdmin(admin.ModelAdmin):
+    list_display = ['dia', 'tipo', 'estado', 'area_responsable', 'color_semaforo', 'total', 'resueltas']
+    list_filter = ['tipo', 'estado', 'color_semaforo']
+    search_fields = ['area_responsable']
+    date_hierarchy = 'dia'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import pre_delete
 
 
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dashboard'
+
+    def ready(self):
+        from .resumen import liberar_responsable
+
+        pre_delete.connect(liberar_responsable, sender=settings.AUTH_USER_MODEL)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import LockError
+from rest_framework.response import Response
+
+
+logger = logging.getLogger(__name__)
+
+
+def _config(nombre, defecto):
+    return settings.PQRS_CONFIG.get(nombre, defecto)
+
+
+def _alcance(request):
+    """Lo que distingue qué datos puede ver quien consulta (rol y área)"""
+    usuario = request.user
+    return [getattr(usuario, 'rol', ''), getattr(usuario, 'area', '')]
+
+
+def _parametros_normalizados(params):
+    """Parámetros ordenados, sin vacíos y con los valores separados por coma ordenados"""
+    normalizados = {}
+    for nombre in sorted(params):
+        valores = sorted({
+            valor.strip()
+            for crudo in params.getlist(nombre)
+            for valor in crudo.split(',')
+            if valor.strip()
+        })
+        if valores:
+            normalizados[nombre] = valores
+    return normalizados
+
+
+def clave_dashboard(vista, request):
+    contenido = json.dumps(
+        [_parametros_normalizados(request.query_params), _alcance(request)],
+        sort_keys=True
+    ).encode()
+    return f'dashboard:{vista}:{hashlib.sha256(contenido).hexdigest()}'
+
+
+def _leer(clave):
+    try:
+        return cache.get(clave)
+    except Exception:
+        logger.exception('No se pudo leer el dashboard cacheado (%s)', clave)
+        return None
+
+
+def _guardar(clave, data):
+    """
+    Guarda el resultado como vigente por DASHBOARD_CACHE_SEGUNDOS (con
+    variación aleatoria para que las claves no expiren todas a la vez) y lo
+    conserva DASHBOARD_CACHE_OBSOLETO_SEGUNDOS más para servirlo mientras
+    se recalcula.
+    """
+    vigencia = _config('DASHBOARD_CACHE_SEGUNDOS', 60)
+    variacion = _config('DASHBOARD_CACHE_VARIACION', 0.1)
+    vigencia = vigencia * random.uniform(1 - variacion, 1 + variacion)
+    entrada = {'data': data, 'vigente_hasta': time.time() + vigencia}
+    try:
+        cache.set(clave, entrada, int(vigencia) + _config('DASHBOARD_CACHE_OBSOLETO_SEGUNDOS', 600))
+    except Exception:
+        logger.exception('No se pudo cachear el dashboard (%s)', clave)
+
+
+def _lock(clave):
+    return cache.lock(f'{clave}:lock', timeout=_config('DASHBOARD_LOCK_SEGUNDOS', 30))
+
+
+def _liberar(lock):
+    try:
+        lock.release()
+    except LockError:
+        # El lock expiró mientras se calculaba
+        logger.warning('El lock del dashboard expiró antes de liberarse')
+
+
+def cache_dashboard(vista):
+    """
+    Cachea en Redis la respuesta de una vista del dashboard por filtros
+    normalizados y alcance del usuario. Solo un proceso recalcula cada
+    clave a la vez (lock distribuido): si hay una versión vencida, los
+    demás la reciben mientras tanto; si no hay ninguna, esperan al que
+    calcula y usan su resultado. Se aplica debajo de @api_view para que la
+    autenticación y los permisos se validen antes.
+    """
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(request, *args, **kwargs):
+            clave = clave_dashboard(vista, request)
+            entrada = _leer(clave)
+            if entrada and entrada['vigente_hasta'] > time.time():
+                return Response(entrada['data'])
+
+            try:
+                lock = _lock(clave)
+                # Con una versión vencida no se espera: la sirve quien no obtenga el lock
+                adquirido = lock.acquire(
+                    blocking=entrada is None,
+                    blocking_timeout=_config('DASHBOARD_ESPERA_SEGUNDOS', 5)
+                )
+            except Exception:
+                logger.exception('No se pudo tomar el lock del dashboard (%s)', clave)
+                lock, adquirido = None, False
+
+            if not adquirido:
+                if entrada:
+                    return Response(entrada['data'])
+                if lock is not None:
+                    # Quien tenía el lock no terminó a tiempo: revisar si ya guardó
+                    entrada = _leer(clave)
+                    if entrada:
+                        return Response(entrada['data'])
+                return funcion(request, *args, **kwargs)
+
+            try:
+                # Otro proceso pudo guardar el resultado mientras se esperaba el lock
+                reciente = _leer(clave)
+                if reciente and reciente['vigente_hasta'] > time.time():
+                    return Response(reciente['data'])
+
+                respuesta = funcion(request, *args, **kwargs)
+                if respuesta.status_code == 200:
+                    _guardar(clave, respuesta.data)
+                return respuesta
+            finally:
+                _liberar(lock)
+
+        return envoltura
+    return decorador
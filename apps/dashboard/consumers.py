@@ -0,0 +1,27 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .eventos import GRUPO_DASHBOARD
+
+
+class DashboardConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Envía a los usuarios autenticados los cambios de KPIs del dashboard
+    (altas, cambios de estado y de semáforo) a medida que ocurren.
+    """
+    
+    async def connect(self):
+        if not self.scope['user'].is_authenticated:
+            # 4401: sin autenticación (equivalente a HTTP 401)
+            await self.close(code=4401)
+            return
+        await self.channel_layer.group_add(GRUPO_DASHBOARD, self.channel_name)
+        await self.accept()
+    
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(GRUPO_DASHBOARD, self.channel_name)
+    
+    async def receive_json(self, content, **kwargs):
+        # El canal es de solo lectura para el cliente
+        pass
+    
+    async def dashboard_delta(self, event):
+        await self.send_json({'tipo': 'kpi_delta', 'cambios': event['cambios']})
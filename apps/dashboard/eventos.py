@@ -0,0 +1,42 @@
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+# Grupo del channel layer al que se suscriben los dashboards abiertos
+GRUPO_DASHBOARD = 'dashboard'
+
+
+def _publicar(mensaje):
+    capa = get_channel_layer()
+    if capa is None:
+        return
+    try:
+        async_to_sync(capa.group_send)(GRUPO_DASHBOARD, mensaje)
+    except Exception:
+        logger.exception('No se pudo publicar el cambio del dashboard')
+
+
+def publicar_deltas(deltas):
+    """
+    Envía a los dashboards conectados los cambios aplicados al resumen
+    diario ({clave: (total, resueltas, dias)}), cuando se confirma la
+    transacción. Cada cambio trae las dimensiones y cuánto sumar a cada
+    medida, así el cliente ajusta sus KPIs sin volver a consultarlos.
+    """
+    from .resumen import DIMENSIONES
+
+    cambios = []
+    for clave, (total, resueltas, dias) in deltas.items():
+        if not (total or resueltas or dias):
+            continue
+        cambio = dict(zip(DIMENSIONES, clave))
+        cambio['dia'] = cambio['dia'].isoformat()
+        cambio['responsable_id'] = cambio['responsable_id'] or None
+        cambio.update(total=total, resueltas=resueltas, dias_resolucion=dias)
+        cambios.append(cambio)
+    if cambios:
+        transaction.on_commit(lambda: _publicar({'type': 'dashboard.delta', 'cambios': cambios}))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.dashboard.resumen import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero el resumen diario del dashboard a partir de la tabla de PQRS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Cantidad de filas del resumen que se insertan por lote',
+        )
+
+    def handle(self, *args, **options):
+        total = reconstruir_resumen(options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'Resumen diario reconstruido: {total} filas'))
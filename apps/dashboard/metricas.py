@@ -0,0 +1,156 @@
+from collections import defaultdict
+from datetime import timedelta
+from math import ceil
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from apps.pqrs.models import PQRS
+from apps.pqrs.semaforo import DiasEntre
+from .models import ResumenDiario
+
+
+PERCENTILES = [50, 90, 95]
+
+# Granularidades de la serie temporal (?granularidad=)
+GRANULARIDADES = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+}
+DESGLOSES = {
+    'tipo': PQRS.TIPO_CHOICES,
+    'estado': PQRS.ESTADO_CHOICES,
+}
+
+
+def histograma_resolucion(queryset=None):
+    """
+    Cantidad de PQRS cerradas por (tipo, área, días de resolución), en una
+    sola consulta agrupada. El número de filas depende de los días
+    distintos y no de la cantidad de casos.
+    """
+    queryset = PQRS.objects.all() if queryset is None else queryset
+    return list(
+        queryset.filter(
+            estado__in=['resuelto', 'cerrado'],
+            fecha_cierre__isnull=False
+        )
+        .annotate(dias=DiasEntre(F('fecha_radicacion'), F('fecha_cierre')))
+        .values('tipo', 'area_responsable', 'dias')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+class ResumenTiempos:
+    """Acumula un histograma de días de resolución y calcula promedio y percentiles"""
+
+    def __init__(self):
+        self.conteos = defaultdict(int)
+
+    def agregar(self, dias, total):
+        self.conteos[dias] += total
+
+    @property
+    def total(self):
+        return sum(self.conteos.values())
+
+    @property
+    def promedio(self):
+        total = self.total
+        if not total:
+            return 0
+        return sum(dias * cantidad for dias, cantidad in self.conteos.items()) / total
+
+    def percentil(self, p):
+        """Percentil por rango más cercano: menor valor con al menos p% de los casos"""
+        total = self.total
+        if not total:
+            return None
+        objetivo = max(1, ceil(p / 100 * total))
+        acumulado = 0
+        for dias in sorted(self.conteos):
+            acumulado += self.conteos[dias]
+            if acumulado >= objetivo:
+                return dias
+
+    def como_dict(self):
+        return {
+            'tiempo_promedio_dias': round(self.promedio, 1),
+            'total_resueltas': self.total,
+            **{f'p{p}_dias': self.percentil(p) for p in PERCENTILES},
+        }
+
+
+def tiempos_de_resolucion(queryset=None):
+    """
+    Retorna (general, por_tipo, por_tipo_y_area) como ResumenTiempos a
+    partir de un único histograma leído de la base.
+    """
+    general = ResumenTiempos()
+    por_tipo = defaultdict(ResumenTiempos)
+    por_tipo_y_area = defaultdict(ResumenTiempos)
+
+    for fila in histograma_resolucion(queryset):
+        general.agregar(fila['dias'], fila['total'])
+        por_tipo[fila['tipo']].agregar(fila['dias'], fila['total'])
+        por_tipo_y_area[(fila['tipo'], fila['area_responsable'])].agregar(fila['dias'], fila['total'])
+
+    return general, por_tipo, por_tipo_y_area
+
+
+def inicio_de_periodo(fecha, granularidad):
+    """Primer día del periodo (día, semana que empieza el lunes o mes) que contiene `fecha`"""
+    if granularidad == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if granularidad == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def periodos(desde, hasta, granularidad):
+    """Inicios de todos los periodos entre `desde` y `hasta`, ambos incluidos"""
+    actual = inicio_de_periodo(desde, granularidad)
+    while actual <= hasta:
+        yield actual
+        if granularidad == 'mes':
+            actual = (actual.replace(day=28) + timedelta(days=4)).replace(day=1)
+        elif granularidad == 'semana':
+            actual += timedelta(days=7)
+        else:
+            actual += timedelta(days=1)
+
+
+def serie_temporal(desde, hasta, granularidad='mes', desglose=None, queryset=None):
+    """
+    Total de PQRS radicadas por periodo entre `desde` y `hasta` (fechas
+    incluidas), con los periodos sin casos en cero. Es una sola consulta
+    agrupada sobre el resumen diario. Con `desglose` ('tipo' o 'estado')
+    cada periodo trae además el total por cada valor de ese campo.
+    """
+    queryset = ResumenDiario.objects.all() if queryset is None else queryset
+    campos = ['periodo'] + ([desglose] if desglose else [])
+    filas = queryset.filter(
+        dia__gte=desde,
+        dia__lte=hasta
+    ).annotate(
+        periodo=GRANULARIDADES[granularidad]('dia')
+    ).values(*campos).annotate(
+        total=Sum('total')
+    ).order_by()
+
+    totales = defaultdict(int)
+    por_valor = defaultdict(int)
+    for fila in filas:
+        totales[fila['periodo']] += fila['total']
+        if desglose:
+            por_valor[(fila['periodo'], fila[desglose])] += fila['total']
+
+    serie = []
+    for periodo in periodos(desde, hasta, granularidad):
+        punto = {'periodo': periodo, 'total': totales[periodo]}
+        if desglose:
+            punto[f'por_{desglose}'] = {
+                valor: por_valor[(periodo, valor)] for valor, _ in DESGLOSES[desglose]
+            }
+        serie.append(punto)
+    return serie
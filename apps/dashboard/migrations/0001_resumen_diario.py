@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(verbose_name='Día de Radicación')),
+                ('tipo', models.CharField(max_length=20, verbose_name='Tipo')),
+                ('estado', models.CharField(max_length=20, verbose_name='Estado')),
+                ('area_responsable', models.CharField(blank=True, max_length=100, verbose_name='Área Responsable')),
+                ('color_semaforo', models.CharField(max_length=10, verbose_name='Color Semáforo')),
+                ('total', models.IntegerField(default=0, verbose_name='Total de PQRS')),
+                ('resueltas', models.IntegerField(default=0, verbose_name='PQRS Resueltas o Cerradas')),
+                ('dias_resolucion', models.BigIntegerField(default=0, verbose_name='Suma de Días de Resolución')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario',
+                'verbose_name_plural': 'Resúmenes Diarios',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiario',
+            constraint=models.UniqueConstraint(fields=('dia', 'tipo', 'estado', 'area_responsable', 'color_semaforo'), name='resumen_diario_unico'),
+        ),
+    ]
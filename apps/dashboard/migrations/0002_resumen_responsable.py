@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dashboard', '0001_resumen_diario'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='resumendiario',
+            name='resumen_diario_unico',
+        ),
+        migrations.AddField(
+            model_name='resumendiario',
+            name='responsable',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Responsable'),
+        ),
+        migrations.AddIndex(
+            model_name='resumendiario',
+            index=models.Index(fields=['area_responsable', 'dia', 'tipo', 'estado', 'color_semaforo', 'responsable', 'total', 'resueltas', 'dias_resolucion'], name='resumen_area_dia'),
+        ),
+        migrations.AddIndex(
+            model_name='resumendiario',
+            index=models.Index(fields=['responsable', 'dia', 'tipo', 'estado', 'color_semaforo', 'area_responsable', 'total', 'resueltas', 'dias_resolucion'], name='resumen_responsable_dia'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiario',
+            constraint=models.UniqueConstraint(fields=('dia', 'tipo', 'estado', 'area_responsable', 'responsable', 'color_semaforo'), name='resumen_diario_unico'),
+        ),
+    ]
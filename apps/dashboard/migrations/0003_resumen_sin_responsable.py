@@ -0,0 +1,85 @@
+# Generated by Django 4.2.16 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+DIMENSIONES = ['dia', 'tipo', 'estado', 'area_responsable', 'color_semaforo']
+
+
+def fusionar_sin_responsable(apps, schema_editor):
+    """Une en una sola fila (responsable_id = 0) las filas duplicadas con responsable NULL"""
+    ResumenDiario = apps.get_model('dashboard', 'ResumenDiario')
+    sin_responsable = ResumenDiario.objects.filter(responsable_id__isnull=True)
+    filas = [
+        ResumenDiario(
+            **{campo: grupo[campo] for campo in DIMENSIONES},
+            responsable_id=0,
+            total=grupo['suma_total'],
+            resueltas=grupo['suma_resueltas'],
+            dias_resolucion=grupo['suma_dias'],
+        )
+        for grupo in sin_responsable.values(*DIMENSIONES).annotate(
+            suma_total=Sum('total'),
+            suma_resueltas=Sum('resueltas'),
+            suma_dias=Sum('dias_resolucion'),
+        ).order_by()
+    ]
+    sin_responsable.delete()
+    ResumenDiario.objects.bulk_create(filas, batch_size=1000)
+
+
+def restaurar_nulos(apps, schema_editor):
+    ResumenDiario = apps.get_model('dashboard', 'ResumenDiario')
+    ResumenDiario.objects.filter(responsable_id=0).update(responsable_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_resumen_responsable'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='resumendiario',
+            name='resumen_diario_unico',
+        ),
+        migrations.RemoveIndex(
+            model_name='resumendiario',
+            name='resumen_area_dia',
+        ),
+        migrations.RemoveIndex(
+            model_name='resumendiario',
+            name='resumen_responsable_dia',
+        ),
+        # Sin llave foránea, conservando la columna responsable_id y sus valores
+        migrations.AlterField(
+            model_name='resumendiario',
+            name='responsable',
+            field=models.IntegerField(blank=True, db_column='responsable_id', null=True, verbose_name='Responsable'),
+        ),
+        migrations.RenameField(
+            model_name='resumendiario',
+            old_name='responsable',
+            new_name='responsable_id',
+        ),
+        migrations.RunPython(fusionar_sin_responsable, restaurar_nulos),
+        migrations.AlterField(
+            model_name='resumendiario',
+            name='responsable_id',
+            field=models.IntegerField(default=0, verbose_name='Responsable'),
+        ),
+        migrations.AddIndex(
+            model_name='resumendiario',
+            index=models.Index(fields=['area_responsable', 'dia', 'tipo', 'estado', 'color_semaforo', 'responsable_id', 'total', 'resueltas', 'dias_resolucion'], name='resumen_area_dia'),
+        ),
+        migrations.AddIndex(
+            model_name='resumendiario',
+            index=models.Index(fields=['responsable_id', 'dia', 'tipo', 'estado', 'color_semaforo', 'area_responsable', 'total', 'resueltas', 'dias_resolucion'], name='resumen_responsable_dia'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiario',
+            constraint=models.UniqueConstraint(fields=('dia', 'tipo', 'estado', 'area_responsable', 'responsable_id', 'color_semaforo'), name='resumen_diario_unico'),
+        ),
+    ]
@@ -1,3 +1,79 @@
 from django.db import models
 
-# Create your models here.
+
+class ResumenDiario(models.Model):
+    """
+    Conteos de PQRS por día de radicación y dimensiones del dashboard.
+    Se mantiene de forma incremental (apps.dashboard.resumen) y se puede
+    reconstruir con el comando reconstruir_resumen_diario.
+    """
+    
+    dia = models.DateField(
+        verbose_name='Día de Radicación'
+    )
+    tipo = models.CharField(
+        max_length=20,
+        verbose_name='Tipo'
+    )
+    estado = models.CharField(
+        max_length=20,
+        verbose_name='Estado'
+    )
+    area_responsable = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Área Responsable'
+    )
+    # Id del usuario sin llave foránea; 0 = sin responsable. Un NULL haría que
+    # MySQL no aplique la restricción única y se dupliquen las filas
+    responsable_id = models.IntegerField(
+        default=0,
+        verbose_name='Responsable'
+    )
+    color_semaforo = models.CharField(
+        max_length=10,
+        verbose_name='Color Semáforo'
+    )
+    total = models.IntegerField(
+        default=0,
+        verbose_name='Total de PQRS'
+    )
+    resueltas = models.IntegerField(
+        default=0,
+        verbose_name='PQRS Resueltas o Cerradas'
+    )
+    dias_resolucion = models.BigIntegerField(
+        default=0,
+        verbose_name='Suma de Días de Resolución'
+    )
+    
+    class Meta:
+        verbose_name = 'Resumen Diario'
+        verbose_name_plural = 'Resúmenes Diarios'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'tipo', 'estado', 'area_responsable', 'responsable_id', 'color_semaforo'],
+                name='resumen_diario_unico'
+            ),
+        ]
+        # Índices de cobertura para los filtros del dashboard (?area=, ?responsable=):
+        # la dimensión filtrada, el rango de días y todo lo que se suma
+        indexes = [
+            models.Index(
+                fields=[
+                    'area_responsable', 'dia', 'tipo', 'estado', 'color_semaforo',
+                    'responsable_id', 'total', 'resueltas', 'dias_resolucion',
+                ],
+                name='resumen_area_dia'
+            ),
+            models.Index(
+                fields=[
+                    'responsable_id', 'dia', 'tipo', 'estado', 'color_semaforo',
+                    'area_responsable', 'total', 'resueltas', 'dias_resolucion',
+                ],
+                name='resumen_responsable_dia'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.dia} - {self.tipo} - {self.estado} ({self.total})"
@@ -0,0 +1,157 @@
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from apps.pqrs.semaforo import ESTADOS_CERRADOS, DiasEntre
+from .eventos import publicar_deltas
+from .models import ResumenDiario
+
+
+DIMENSIONES = ['dia', 'tipo', 'estado', 'area_responsable', 'responsable_id', 'color_semaforo']
+
+# Valor de ResumenDiario.responsable_id para las PQRS sin responsable
+SIN_RESPONSABLE = 0
+
+# Campos de la PQRS de los que depende su fila en el resumen
+CAMPOS_RESUMEN = [
+    'fecha_radicacion', 'tipo', 'estado', 'area_responsable', 'responsable_id', 'color_semaforo', 'fecha_cierre',
+]
+
+
+def fila_resumen(pqrs):
+    """(clave, medidas) con que una PQRS cuenta en el resumen diario"""
+    clave = (
+        timezone.localdate(pqrs.fecha_radicacion),
+        pqrs.tipo,
+        pqrs.estado,
+        pqrs.area_responsable,
+        pqrs.responsable_id or SIN_RESPONSABLE,
+        pqrs.color_semaforo,
+    )
+    if pqrs.estado in ESTADOS_CERRADOS and pqrs.fecha_cierre:
+        return clave, (1, 1, (pqrs.fecha_cierre - pqrs.fecha_radicacion).days)
+    return clave, (1, 0, 0)
+
+
+def agrupar(queryset):
+    """Filas del resumen diario calculadas en SQL para un queryset de PQRS"""
+    resuelta = Q(estado__in=ESTADOS_CERRADOS, fecha_cierre__isnull=False)
+    return queryset.annotate(
+        dia=TruncDate('fecha_radicacion')
+    ).values(*DIMENSIONES).annotate(
+        total=Count('id'),
+        resueltas=Count('id', filter=resuelta),
+        dias_resolucion=Coalesce(
+            Sum(DiasEntre(F('fecha_radicacion'), F('fecha_cierre')), filter=resuelta), 0
+        ),
+    ).order_by()
+
+
+def filas_agrupadas(queryset, lote=1000):
+    """Recorre agrupar(queryset) con el responsable como lo guarda ResumenDiario"""
+    for fila in agrupar(queryset).iterator(chunk_size=lote):
+        fila['responsable_id'] = fila['responsable_id'] or SIN_RESPONSABLE
+        yield fila
+
+
+def aplicar(deltas):
+    """
+    Suma los deltas {clave: (total, resueltas, dias)} a las filas del
+    resumen y los publica a los dashboards conectados. Se aplican al
+    confirmarse la transacción de la PQRS, para no retener el bloqueo de
+    las filas del resumen (compartidas por muchas PQRS) mientras dura.
+    """
+    deltas = {clave: medidas for clave, medidas in deltas.items() if any(medidas)}
+    if deltas:
+        transaction.on_commit(lambda: _sumar_deltas(deltas), robust=True)
+
+
+def _sumar_deltas(deltas):
+    # Cada UPDATE se confirma por separado: el bloqueo de la fila dura solo esa sentencia
+    for clave, (total, resueltas, dias) in deltas.items():
+        filtro = dict(zip(DIMENSIONES, clave))
+        cambios = {
+            'total': F('total') + total,
+            'resueltas': F('resueltas') + resueltas,
+            'dias_resolucion': F('dias_resolucion') + dias,
+        }
+        if ResumenDiario.objects.filter(**filtro).update(**cambios):
+            continue
+        try:
+            with transaction.atomic():
+                ResumenDiario.objects.create(
+                    **filtro, total=total, resueltas=resueltas, dias_resolucion=dias
+                )
+        except IntegrityError:
+            # Otra transacción creó la fila al mismo tiempo
+            ResumenDiario.objects.filter(**filtro).update(**cambios)
+    publicar_deltas(deltas)
+
+
+def _acumular(deltas, fila, signo):
+    clave, medidas = fila
+    deltas[clave] = tuple(actual + signo * valor for actual, valor in zip(deltas[clave], medidas))
+
+
+def registrar_cambios(pares):
+    """Aplica los cambios [(fila anterior, fila actual)]; None en un lado es alta o baja"""
+    deltas = defaultdict(lambda: (0, 0, 0))
+    for anterior, actual in pares:
+        if anterior == actual:
+            continue
+        if anterior is not None:
+            _acumular(deltas, anterior, -1)
+        if actual is not None:
+            _acumular(deltas, actual, 1)
+    aplicar(deltas)
+
+
+def restar_grupos(queryset):
+    """Descuenta del resumen las PQRS del queryset (antes de borrarlas)"""
+    deltas = defaultdict(lambda: (0, 0, 0))
+    for fila in filas_agrupadas(queryset):
+        clave = tuple(fila[campo] for campo in DIMENSIONES)
+        _acumular(deltas, (clave, (fila['total'], fila['resueltas'], fila['dias_resolucion'])), -1)
+    aplicar(deltas)
+
+
+def mover_grupos(queryset, **cambios):
+    """
+    Mueve en el resumen las PQRS del queryset a los valores de `cambios`
+    (p. ej. estado o color). Se llama antes del UPDATE masivo equivalente.
+    """
+    deltas = defaultdict(lambda: (0, 0, 0))
+    for fila in filas_agrupadas(queryset):
+        clave = tuple(fila[campo] for campo in DIMENSIONES)
+        nueva = tuple(cambios.get(campo, fila[campo]) for campo in DIMENSIONES)
+        medidas = (fila['total'], fila['resueltas'], fila['dias_resolucion'])
+        _acumular(deltas, (clave, medidas), -1)
+        _acumular(deltas, (nueva, medidas), 1)
+    aplicar(deltas)
+
+
+def liberar_responsable(sender, instance, **kwargs):
+    """
+    pre_delete del usuario: sus PQRS quedarán sin responsable (SET_NULL sin
+    pasar por save()), así que se mueven a SIN_RESPONSABLE en el resumen.
+    """
+    from apps.pqrs.models import PQRS
+
+    mover_grupos(PQRS.objects.filter(responsable_id=instance.pk), responsable_id=SIN_RESPONSABLE)
+
+
+def reconstruir_resumen(lote=1000):
+    """Recalcula el resumen diario completo desde la tabla de PQRS"""
+    from apps.pqrs.models import PQRS
+
+    with transaction.atomic():
+        ResumenDiario.objects.all().delete()
+        filas = []
+        for fila in filas_agrupadas(PQRS.objects.all(), lote):
+            filas.append(ResumenDiario(**fila))
+            if len(filas) >= lote:
+                ResumenDiario.objects.bulk_create(filas)
+                filas = []
+        ResumenDiario.objects.bulk_create(filas)
+    return ResumenDiario.objects.count()
@@ -0,0 +1,344 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from itertools import islice
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from apps.pqrs.models import PQRS
+from apps.pqrs.semaforo import ESTADOS_ABIERTOS, ESTADOS_CERRADOS
+from .metricas import (
+    DESGLOSES,
+    GRANULARIDADES,
+    PERCENTILES,
+    periodos,
+    serie_temporal,
+    tiempos_de_resolucion,
+)
+from .models import ResumenDiario
+from .resumen import SIN_RESPONSABLE
+
+
+# Máximo de puntos que retorna la serie de evolución
+MAXIMO_PERIODOS = 1000
+
+
+class TotalesResumen:
+    """
+    Totales del resumen diario agrupados por tipo, estado, área y color en
+    una sola consulta. Todos los widgets de conteo (KPIs, distribuciones y
+    áreas) se derivan de estas filas sin volver a la base.
+    """
+
+    def __init__(self, queryset=None, hoy=None):
+        queryset = ResumenDiario.objects.all() if queryset is None else queryset
+        hoy = hoy or timezone.localdate()
+        self.filas = list(
+            queryset.values(
+                'tipo', 'estado', 'area_responsable', 'color_semaforo'
+            ).annotate(
+                # total va al final: su alias reemplaza al campo del mismo nombre
+                mes_actual=Sum('total', filter=Q(dia__gte=hoy.replace(day=1))),
+                resueltas=Sum('resueltas'),
+                dias_resolucion=Sum('dias_resolucion'),
+                total=Sum('total'),
+            ).filter(total__gt=0).order_by()
+        )
+
+    @property
+    def total(self):
+        return sum(fila['total'] for fila in self.filas)
+
+    def suma(self, medida, **filtro):
+        return sum(
+            fila[medida] or 0 for fila in self.filas
+            if all(fila[campo] == valor for campo, valor in filtro.items())
+        )
+
+    def por(self, campo, excluir=()):
+        """Total por una dimensión, de mayor a menor"""
+        totales = defaultdict(int)
+        for fila in self.filas:
+            if fila[campo] not in excluir:
+                totales[fila[campo]] += fila['total']
+        return [
+            {campo: valor, 'total': total}
+            for valor, total in sorted(totales.items(), key=lambda item: -item[1])
+        ]
+
+
+class SemaforoVigente:
+    """
+    Color del semáforo y vencimiento de las PQRS abiertas calculados al leer
+    (PQRSQuerySet.with_semaforo), en una consulta sobre el índice
+    (estado, fecha_limite). El resumen diario guarda el color y el estado del
+    último barrido; las cerradas siempre están en verde y se toman de ahí.
+    """
+
+    def __init__(self, queryset, ahora=None):
+        self.por_color = defaultdict(int)
+        self.vencidas = 0
+        filas = queryset.filter(estado__in=ESTADOS_ABIERTOS).with_semaforo(ahora).values(
+            'color_semaforo_actual'
+        ).annotate(
+            total=Count('id'),
+            vencidas=Count('id', filter=Q(estado_actual='vencido')),
+        ).order_by()
+        for fila in filas:
+            self.por_color[fila['color_semaforo_actual']] += fila['total']
+            self.vencidas += fila['vencidas']
+
+    def por(self, totales):
+        """Total por color, de mayor a menor, con las cerradas del resumen diario"""
+        por_color = defaultdict(int, self.por_color)
+        for fila in totales.filas:
+            if fila['estado'] in ESTADOS_CERRADOS:
+                por_color[fila['color_semaforo']] += fila['total']
+        return [
+            {'color_semaforo': color, 'total': total}
+            for color, total in sorted(por_color.items(), key=lambda item: -item[1])
+            if total
+        ]
+
+
+def _fecha_param(params, nombre):
+    """Lee una fecha YYYY-MM-DD de los parámetros de la petición"""
+    valor = params.get(nombre)
+    if not valor:
+        return None
+    try:
+        fecha = parse_date(valor)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ValidationError({nombre: 'Use el formato YYYY-MM-DD'})
+    return fecha
+
+
+class FiltrosDashboard:
+    """
+    Filtros comunes de todas las vistas del dashboard: ?desde=&hasta=
+    (fecha de radicación, YYYY-MM-DD), ?area=, ?responsable= (id o
+    "ninguno") y ?tipo= (varios separados por coma).
+    """
+
+    def __init__(self, params):
+        self.desde = _fecha_param(params, 'desde')
+        self.hasta = _fecha_param(params, 'hasta')
+        if self.desde and self.hasta and self.desde > self.hasta:
+            raise ValidationError({'desde': 'Debe ser anterior o igual a hasta'})
+
+        self.area = params.get('area') or None
+
+        responsable = params.get('responsable')
+        if responsable and responsable != 'ninguno' and not responsable.isdigit():
+            raise ValidationError({'responsable': 'Debe ser un id de usuario o "ninguno"'})
+        self.responsable = responsable or None
+
+        self.tipos = [tipo for tipo in params.get('tipo', '').split(',') if tipo]
+        invalidos = [tipo for tipo in self.tipos if tipo not in dict(PQRS.TIPO_CHOICES)]
+        if invalidos:
+            raise ValidationError({'tipo': f"Valores no permitidos: {', '.join(invalidos)}"})
+
+    def _condiciones(self, sin_responsable):
+        condiciones = {}
+        if self.area:
+            condiciones['area_responsable'] = self.area
+        if self.responsable == 'ninguno':
+            condiciones.update(sin_responsable)
+        elif self.responsable:
+            condiciones['responsable_id'] = int(self.responsable)
+        if self.tipos:
+            condiciones['tipo__in'] = self.tipos
+        return condiciones
+
+    def resumen(self, queryset=None):
+        """Filtra las filas del resumen diario"""
+        queryset = ResumenDiario.objects.all() if queryset is None else queryset
+        queryset = queryset.filter(**self._condiciones({'responsable_id': SIN_RESPONSABLE}))
+        if self.desde:
+            queryset = queryset.filter(dia__gte=self.desde)
+        if self.hasta:
+            queryset = queryset.filter(dia__lte=self.hasta)
+        return queryset
+
+    def casos(self, queryset=None):
+        """Filtra las PQRS (para las métricas que no salen del resumen)"""
+        queryset = PQRS.objects.all() if queryset is None else queryset
+        queryset = queryset.filter(**self._condiciones({'responsable__isnull': True}))
+        if self.desde:
+            queryset = queryset.filter(
+                fecha_radicacion__gte=timezone.make_aware(datetime.combine(self.desde, time.min))
+            )
+        if self.hasta:
+            # hasta incluye todo ese día
+            queryset = queryset.filter(
+                fecha_radicacion__lt=timezone.make_aware(datetime.combine(self.hasta + timedelta(days=1), time.min))
+            )
+        return queryset
+
+
+def parametros_evolucion(params, filtros):
+    """Valida ?granularidad=&desglose= y el rango de la serie de evolución"""
+    granularidad = params.get('granularidad', 'mes')
+    if granularidad not in GRANULARIDADES:
+        raise ValidationError({'granularidad': f"Use uno de: {', '.join(GRANULARIDADES)}"})
+    desglose = params.get('desglose') or None
+    if desglose and desglose not in DESGLOSES:
+        raise ValidationError({'desglose': f"Use uno de: {', '.join(DESGLOSES)}"})
+
+    hasta = filtros.hasta or timezone.localdate()
+    desde = filtros.desde
+    if desde is None:
+        # Mes actual y los 5 anteriores
+        desde = hasta.replace(day=1)
+        for _ in range(5):
+            desde = (desde - timedelta(days=1)).replace(day=1)
+    if desde > hasta:
+        raise ValidationError({'desde': 'Debe ser anterior o igual a hasta'})
+
+    if len(list(islice(periodos(desde, hasta, granularidad), MAXIMO_PERIODOS + 1))) > MAXIMO_PERIODOS:
+        raise ValidationError({
+            'granularidad': f'El rango pedido tiene más de {MAXIMO_PERIODOS} periodos; use una granularidad mayor'
+        })
+    return desde, hasta, granularidad, desglose
+
+
+def _con_porcentaje(items, campo, opciones, total_general):
+    """Agrega nombre legible y porcentaje sobre el total general a cada item"""
+    nombres = dict(opciones)
+    return [
+        {
+            campo: item[campo],
+            f'{campo}_display': nombres.get(item[campo], item[campo]),
+            'total': item['total'],
+            'porcentaje': round(item['total'] / total_general * 100, 2) if total_general > 0 else 0,
+        }
+        for item in items
+    ]
+
+
+def widget_estadisticas(totales, tiempos, semaforo):
+    """KPIs generales del sistema (vencidas y semáforo vigentes al momento de la consulta)"""
+    resueltas = totales.suma('resueltas')
+    tiempo_promedio = totales.suma('dias_resolucion') / resueltas if resueltas else 0
+    return {
+        'total_pqrs': totales.total,
+        'pqrs_mes_actual': totales.suma('mes_actual'),
+        'pqrs_vencidas': semaforo.vencidas,
+        'tiempo_promedio_respuesta': round(tiempo_promedio, 1),
+        'percentiles_respuesta': {
+            f'p{p}': tiempos.percentil(p) for p in PERCENTILES
+        },
+        'por_estado': totales.por('estado'),
+        'por_tipo': totales.por('tipo'),
+        'por_semaforo': semaforo.por(totales),
+    }
+
+
+def widget_por_tipo(totales):
+    """Distribución de PQRS por tipo (para gráfico circular)"""
+    return _con_porcentaje(totales.por('tipo'), 'tipo', PQRS.TIPO_CHOICES, totales.total)
+
+
+def widget_por_estado(totales):
+    """Distribución de PQRS por estado"""
+    return _con_porcentaje(totales.por('estado'), 'estado', PQRS.ESTADO_CHOICES, totales.total)
+
+
+def widget_por_semaforo(totales, semaforo):
+    """Distribución de PQRS por color vigente del semáforo"""
+    return _con_porcentaje(
+        semaforo.por(totales), 'color_semaforo', PQRS.COLOR_SEMAFORO_CHOICES, totales.total
+    )
+
+
+def widget_por_area(totales):
+    """Top 10 de áreas responsables"""
+    return totales.por('area_responsable', excluir=('',))[:10]
+
+
+def widget_evolucion(filtros, desde, hasta, granularidad='mes', desglose=None):
+    """Serie de PQRS radicadas por periodo"""
+    formato = {'dia': '%d %B %Y', 'semana': '%d %B %Y', 'mes': '%B %Y'}[granularidad]
+    resultado = []
+    for punto in serie_temporal(desde, hasta, granularidad, desglose, filtros.resumen()):
+        item = {
+            **punto,
+            'periodo': punto['periodo'].isoformat(),
+            'etiqueta': punto['periodo'].strftime(formato),
+        }
+        if granularidad == 'mes':
+            # Compatibilidad con el formato anterior del endpoint
+            item['mes'] = item['etiqueta']
+        resultado.append(item)
+    return resultado
+
+
+def widget_tiempo_respuesta(por_tipo, por_tipo_y_area):
+    """Tiempo promedio y percentiles de respuesta por tipo (y por área)"""
+    resultado = []
+    for tipo_key, tipo_display in PQRS.TIPO_CHOICES:
+        por_area = [
+            {'area_responsable': area, **resumen.como_dict()}
+            for (tipo, area), resumen in sorted(por_tipo_y_area.items())
+            if tipo == tipo_key
+        ]
+        resultado.append({
+            'tipo': tipo_key,
+            'tipo_display': tipo_display,
+            **por_tipo[tipo_key].como_dict(),
+            'por_area': por_area,
+        })
+    return resultado
+
+
+# Widgets del snapshot y lo que necesita cada uno
+WIDGETS = {
+    'estadisticas': ('totales', 'tiempos', 'semaforo'),
+    'por_tipo': ('totales',),
+    'por_estado': ('totales',),
+    'por_semaforo': ('totales', 'semaforo'),
+    'por_area': ('totales',),
+    'evolucion': ('evolucion',),
+    'tiempo_respuesta': ('tiempos',),
+}
+
+
+def snapshot(params):
+    """
+    Calcula los widgets pedidos en ?widgets= (todos por defecto) con a lo
+    sumo cuatro consultas: los totales del resumen diario, el semáforo
+    vigente de las abiertas, la serie de evolución y el histograma de
+    tiempos de resolución. Los filtros de FiltrosDashboard se aplican a
+    todos los widgets.
+    """
+    pedidos = [widget for widget in params.get('widgets', '').split(',') if widget] or list(WIDGETS)
+    invalidos = [widget for widget in pedidos if widget not in WIDGETS]
+    if invalidos:
+        raise ValidationError({'widgets': f"Valores no permitidos: {', '.join(invalidos)}"})
+
+    filtros = FiltrosDashboard(params)
+    fuentes = {fuente for widget in pedidos for fuente in WIDGETS[widget]}
+    evolucion = parametros_evolucion(params, filtros) if 'evolucion' in fuentes else None
+    totales = TotalesResumen(filtros.resumen()) if 'totales' in fuentes else None
+    tiempos = tiempos_de_resolucion(filtros.casos()) if 'tiempos' in fuentes else None
+    semaforo = SemaforoVigente(filtros.casos()) if 'semaforo' in fuentes else None
+
+    datos = {}
+    for widget in pedidos:
+        if widget == 'estadisticas':
+            datos[widget] = widget_estadisticas(totales, tiempos[0], semaforo)
+        elif widget == 'por_tipo':
+            datos[widget] = widget_por_tipo(totales)
+        elif widget == 'por_estado':
+            datos[widget] = widget_por_estado(totales)
+        elif widget == 'por_semaforo':
+            datos[widget] = widget_por_semaforo(totales, semaforo)
+        elif widget == 'por_area':
+            datos[widget] = widget_por_area(totales)
+        elif widget == 'evolucion':
+            datos[widget] = widget_evolucion(filtros, *evolucion)
+        elif widget == 'tiempo_respuesta':
+            datos[widget] = widget_tiempo_respuesta(tiempos[1], tiempos[2])
+    return datos
@@ -1,3 +1,166 @@
-from django.test import TestCase
+from datetime import timedelta
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from django.utils import timezone
+from apps.pqrs.models import PQRS
+from apps.pqrs.tests import ClienteWebSocket, crear_pqrs
+from apps.users.models import User
+from .models import ResumenDiario
+from .resumen import SIN_RESPONSABLE, reconstruir_resumen
+from .tablero import FiltrosDashboard, snapshot
 
-# Create your tests here.
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ResumenDiarioTests(TestCase):
+    """El resumen incremental coincide con recalcularlo desde la tabla de PQRS"""
+
+    def _resumen(self):
+        return sorted(
+            ResumenDiario.objects.filter(total__gt=0).values_list(
+                'dia', 'tipo', 'estado', 'area_responsable', 'responsable_id', 'color_semaforo',
+                'total', 'resueltas', 'dias_resolucion',
+            )
+        )
+
+    def assertResumenCoincide(self):
+        incremental = self._resumen()
+        reconstruir_resumen()
+        self.assertEqual(incremental, self._resumen())
+
+    def test_deltas_se_aplican_al_confirmar(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            crear_pqrs(tipo='queja')
+        # Mientras la transacción sigue abierta no se toca (ni bloquea) el resumen
+        self.assertFalse(ResumenDiario.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        fila = ResumenDiario.objects.get()
+        self.assertEqual((fila.tipo, fila.estado, fila.total), ('queja', 'pendiente', 1))
+
+    def test_alta_cambio_de_estado_y_borrado(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            primera = crear_pqrs(area_responsable='Atención')
+            segunda = crear_pqrs(area_responsable='Atención')
+            crear_pqrs(tipo='reclamo')
+        self.assertResumenCoincide()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            primera.estado = 'resuelto'
+            primera.fecha_cierre = primera.fecha_radicacion + timedelta(days=3)
+            primera.save()
+            segunda.area_responsable = 'Jurídica'
+            segunda.save()
+        self.assertResumenCoincide()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            segunda.delete()
+            PQRS.objects.filter(tipo='reclamo').delete()
+        self.assertResumenCoincide()
+        self.assertEqual(
+            list(ResumenDiario.objects.filter(total__gt=0).values_list('estado', 'total', 'resueltas')),
+            [('resuelto', 1, 1)],
+        )
+
+    def test_barrido_de_semaforos(self):
+        from apps.pqrs.tareas import recalcular_semaforos
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pqrs = crear_pqrs()
+        PQRS.objects.filter(pk=pqrs.pk).update(fecha_limite_respuesta=timezone.now() - timedelta(hours=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recalcular_semaforos()
+        self.assertResumenCoincide()
+        self.assertEqual(
+            list(ResumenDiario.objects.filter(total__gt=0).values_list('estado', 'color_semaforo')),
+            [('vencido', 'rojo')],
+        )
+
+    def test_sin_responsable_comparten_una_fila(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                crear_pqrs(tipo='peticion')
+        fila = ResumenDiario.objects.get()
+        self.assertEqual((fila.responsable_id, fila.total), (SIN_RESPONSABLE, 3))
+        self.assertEqual(FiltrosDashboard({'responsable': 'ninguno'}).resumen().get(), fila)
+
+        # La restricción única cubre las filas sin responsable (un NULL no la activaría en MySQL)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ResumenDiario.objects.create(
+                dia=fila.dia, tipo=fila.tipo, estado=fila.estado, area_responsable=fila.area_responsable,
+                color_semaforo=fila.color_semaforo, total=1,
+            )
+
+    def test_borrar_al_responsable_mueve_sus_pqrs(self):
+        gestor = User.objects.create_user('gestor', password='clave', rol='gestor')
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_pqrs(responsable=gestor)
+            crear_pqrs()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gestor.delete()
+        self.assertResumenCoincide()
+        self.assertEqual(
+            list(ResumenDiario.objects.filter(total__gt=0).values_list('responsable_id', 'total')),
+            [(SIN_RESPONSABLE, 2)],
+        )
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class SemaforoVigenteTests(TestCase):
+    """Vencidas y semáforo del dashboard calculados al consultar, no al último barrido"""
+
+    def test_vencida_sin_barrido(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            abierta = crear_pqrs(area_responsable='Atención')
+            crear_pqrs(area_responsable='Atención')
+            crear_pqrs(area_responsable='Atención', estado='resuelto')
+            crear_pqrs(area_responsable='Jurídica')
+        PQRS.objects.filter(pk=abierta.pk).update(fecha_limite_respuesta=timezone.now() - timedelta(hours=1))
+
+        datos = snapshot({'widgets': 'estadisticas,por_semaforo', 'area': 'Atención'})
+
+        self.assertEqual(datos['estadisticas']['pqrs_vencidas'], 1)
+        self.assertEqual(
+            datos['estadisticas']['por_semaforo'],
+            [{'color_semaforo': 'verde', 'total': 2}, {'color_semaforo': 'rojo', 'total': 1}],
+        )
+        self.assertEqual(
+            [(item['color_semaforo'], item['total']) for item in datos['por_semaforo']],
+            [('verde', 2), ('rojo', 1)],
+        )
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class DashboardConsumerTests(TransactionTestCase):
+
+    def test_recibe_los_deltas_de_kpi(self):
+        usuario = User.objects.create_user('supervisor', password='clave', rol='supervisor')
+        origen = (b'origin', settings.CHANNELS_ALLOWED_ORIGINS[0].encode())
+        ruta = f'/ws/dashboard/?token={AccessToken.for_user(usuario)}'
+
+        async def escenario():
+            cliente = ClienteWebSocket(ruta, [origen])
+            self.assertEqual(await cliente.conectar(), (True, None))
+            pqrs = await sync_to_async(crear_pqrs)(tipo='reclamo', area_responsable='Atención')
+            mensaje = await cliente.recibir_json()
+            await cliente.desconectar()
+            return pqrs, mensaje
+
+        pqrs, mensaje = async_to_sync(escenario)()
+        self.assertEqual(mensaje['tipo'], 'kpi_delta')
+        self.assertEqual(mensaje['cambios'], [{
+            'dia': timezone.localdate(pqrs.fecha_radicacion).isoformat(),
+            'tipo': 'reclamo',
+            'estado': 'pendiente',
+            'area_responsable': 'Atención',
+            'responsable_id': None,
+            'color_semaforo': pqrs.color_semaforo,
+            'total': 1,
+            'resueltas': 0,
+            'dias_resolucion': 0,
+        }])
@@ -1,5 +1,6 @@
 from django.urls import path
 from .views import (
+    snapshot_dashboard,
     estadisticas_generales,
     distribucion_por_tipo,
     distribucion_por_estado,
@@ -9,6 +10,7 @@ from .views import (
 )
 
 urlpatterns = [
+    path('snapshot/', snapshot_dashboard, name='snapshot_dashboard'),
     path('stats/', estadisticas_generales, name='estadisticas_generales'),
     path('por-tipo/', distribucion_por_tipo, name='distribucion_por_tipo'),
     path('por-estado/', distribucion_por_estado, name='distribucion_por_estado'),
@@ -1,208 +1,128 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Avg, Q
-from django.utils import timezone
-from datetime import timedelta
-from apps.pqrs.models import PQRS
+from .cache import cache_dashboard
+from .metricas import tiempos_de_resolucion
+from .tablero import (
+    FiltrosDashboard,
+    SemaforoVigente,
+    TotalesResumen,
+    parametros_evolucion,
+    snapshot,
+    widget_estadisticas,
+    widget_evolucion,
+    widget_por_area,
+    widget_por_estado,
+    widget_por_tipo,
+    widget_tiempo_respuesta,
+)
 from apps.users.permissions import IsAdministradorOrSupervisor
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def estadisticas_generales(request):
-    """KPIs generales del sistema"""
-    
-    # Total de PQRS
-    total_pqrs = PQRS.objects.count()
-    
-    # Por estado
-    por_estado = PQRS.objects.values('estado').annotate(
-        total=Count('id')
-    )
-    
-    # Por tipo
-    por_tipo = PQRS.objects.values('tipo').annotate(
-        total=Count('id')
-    )
-    
-    # Por semáforo
-    por_semaforo = PQRS.objects.values('color_semaforo').annotate(
-        total=Count('id')
-    )
-    
-    # PQRS del mes actual
-    mes_actual = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    pqrs_mes_actual = PQRS.objects.filter(
-        fecha_radicacion__gte=mes_actual
-    ).count()
+@cache_dashboard('snapshot')
+def snapshot_dashboard(request):
+    """
+    Todos los widgets del dashboard en una sola respuesta. ?widgets=
+    (separados por coma) limita los que se calculan; acepta los mismos
+    filtros y parámetros de evolución que las demás vistas.
+    """
     
-    # PQRS vencidas
-    pqrs_vencidas = PQRS.objects.filter(estado='vencido').count()
-    
-    # Promedio de días para responder
-    pqrs_cerradas = PQRS.objects.filter(
-        estado__in=['resuelto', 'cerrado'],
-        fecha_cierre__isnull=False
-    )
+    return Response({
+        'success': True,
+        'data': snapshot(request.query_params)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_dashboard('estadisticas')
+def estadisticas_generales(request):
+    """
+    KPIs generales del sistema. Los conteos salen del resumen diario; las
+    vencidas y el semáforo se calculan al consultar sobre las PQRS abiertas.
+    """
     
-    if pqrs_cerradas.exists():
-        tiempo_promedio = 0
-        for pqrs in pqrs_cerradas:
-            dias = (pqrs.fecha_cierre - pqrs.fecha_radicacion).days
-            tiempo_promedio += dias
-        tiempo_promedio = tiempo_promedio / pqrs_cerradas.count()
-    else:
-        tiempo_promedio = 0
+    filtros = FiltrosDashboard(request.query_params)
+    tiempos, _, _ = tiempos_de_resolucion(filtros.casos())
     
     return Response({
         'success': True,
-        'data': {
-            'total_pqrs': total_pqrs,
-            'pqrs_mes_actual': pqrs_mes_actual,
-            'pqrs_vencidas': pqrs_vencidas,
-            'tiempo_promedio_respuesta': round(tiempo_promedio, 1),
-            'por_estado': list(por_estado),
-            'por_tipo': list(por_tipo),
-            'por_semaforo': list(por_semaforo),
-        }
+        'data': widget_estadisticas(TotalesResumen(filtros.resumen()), tiempos, SemaforoVigente(filtros.casos()))
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_dashboard('por_tipo')
 def distribucion_por_tipo(request):
     """Distribución de PQRS por tipo (para gráfico circular)"""
     
-    data = PQRS.objects.values('tipo').annotate(
-        total=Count('id')
-    ).order_by('-total')
-    
-    # Calcular porcentajes
-    total_general = PQRS.objects.count()
-    resultado = []
-    
-    for item in data:
-        porcentaje = (item['total'] / total_general * 100) if total_general > 0 else 0
-        resultado.append({
-            'tipo': item['tipo'],
-            'tipo_display': dict(PQRS.TIPO_CHOICES)[item['tipo']],
-            'total': item['total'],
-            'porcentaje': round(porcentaje, 2)
-        })
+    filtros = FiltrosDashboard(request.query_params)
     
     return Response({
         'success': True,
-        'data': resultado
+        'data': widget_por_tipo(TotalesResumen(filtros.resumen()))
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_dashboard('por_estado')
 def distribucion_por_estado(request):
     """Distribución de PQRS por estado"""
     
-    data = PQRS.objects.values('estado').annotate(
-        total=Count('id')
-    ).order_by('-total')
-    
-    total_general = PQRS.objects.count()
-    resultado = []
-    
-    for item in data:
-        porcentaje = (item['total'] / total_general * 100) if total_general > 0 else 0
-        resultado.append({
-            'estado': item['estado'],
-            'estado_display': dict(PQRS.ESTADO_CHOICES)[item['estado']],
-            'total': item['total'],
-            'porcentaje': round(porcentaje, 2)
-        })
+    filtros = FiltrosDashboard(request.query_params)
     
     return Response({
         'success': True,
-        'data': resultado
+        'data': widget_por_estado(TotalesResumen(filtros.resumen()))
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_dashboard('evolucion')
 def evolucion_mensual(request):
-    """Evolución de PQRS por mes (últimos 6 meses)"""
-    
-    ahora = timezone.now()
-    resultado = []
+    """
+    Evolución de PQRS radicadas por periodo. Parámetros opcionales:
+    ?desde=&hasta= (YYYY-MM-DD, por defecto los últimos 6 meses),
+    ?granularidad=dia|semana|mes y ?desglose=tipo|estado
+    """
     
-    for i in range(5, -1, -1):
-        fecha_inicio = (ahora - timedelta(days=30*i)).replace(day=1, hour=0, minute=0, second=0)
-        if i == 0:
-            fecha_fin = ahora
-        else:
-            fecha_fin = (ahora - timedelta(days=30*(i-1))).replace(day=1, hour=0, minute=0, second=0)
-        
-        total = PQRS.objects.filter(
-            fecha_radicacion__gte=fecha_inicio,
-            fecha_radicacion__lt=fecha_fin
-        ).count()
-        
-        resultado.append({
-            'mes': fecha_inicio.strftime('%B %Y'),
-            'total': total
-        })
+    filtros = FiltrosDashboard(request.query_params)
     
     return Response({
         'success': True,
-        'data': resultado
+        'data': widget_evolucion(filtros, *parametros_evolucion(request.query_params, filtros))
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_dashboard('por_area')
 def por_area_responsable(request):
-    """PQRS por área responsable"""
+    """PQRS por área responsable (top 10)"""
     
-    data = PQRS.objects.exclude(
-        area_responsable=''
-    ).values('area_responsable').annotate(
-        total=Count('id')
-    ).order_by('-total')[:10]  # Top 10 áreas
+    filtros = FiltrosDashboard(request.query_params)
     
     return Response({
         'success': True,
-        'data': list(data)
+        'data': widget_por_area(TotalesResumen(filtros.resumen()))
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_dashboard('tiempo_respuesta')
 def tiempo_respuesta_por_tipo(request):
-    """Tiempo promedio de respuesta por tipo de PQRS"""
+    """Tiempo promedio y percentiles de respuesta por tipo de PQRS (y por área)"""
     
-    resultado = []
-    
-    for tipo_key, tipo_display in PQRS.TIPO_CHOICES:
-        pqrs_cerradas = PQRS.objects.filter(
-            tipo=tipo_key,
-            estado__in=['resuelto', 'cerrado'],
-            fecha_cierre__isnull=False
-        )
-        
-        if pqrs_cerradas.exists():
-            tiempo_promedio = 0
-            for pqrs in pqrs_cerradas:
-                dias = (pqrs.fecha_cierre - pqrs.fecha_radicacion).days
-                tiempo_promedio += dias
-            tiempo_promedio = tiempo_promedio / pqrs_cerradas.count()
-        else:
-            tiempo_promedio = 0
-        
-        resultado.append({
-            'tipo': tipo_key,
-            'tipo_display': tipo_display,
-            'tiempo_promedio_dias': round(tiempo_promedio, 1),
-            'total_resueltas': pqrs_cerradas.count()
-        })
+    filtros = FiltrosDashboard(request.query_params)
+    _, por_tipo, por_tipo_y_area = tiempos_de_resolucion(filtros.casos())
     
     return Response({
         'success': True,
-        'data': resultado
-    })
\ No newline at end of file
+        'data': widget_tiempo_respuesta(por_tipo, por_tipo_y_area)
+    })
@@ -9,6 +9,7 @@ class NotificacionAdmin(admin.ModelAdmin):
         'tipo',
         'destinatario_email',
         'enviado',
+        'intentos',
         'fecha_envio',
         'fecha_creacion',
     ]
@@ -28,4 +29,6 @@ class NotificacionAdmin(admin.ModelAdmin):
     readonly_fields = [
         'fecha_creacion',
         'fecha_envio',
+        'intentos',
+        'proximo_intento',
     ]
\ No newline at end of file
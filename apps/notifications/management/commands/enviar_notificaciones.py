@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_redis import get_redis_connection
+from apps.notifications.utils import COLA_DESPERTAR, enviar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Worker que envía las notificaciones pendientes de la bandeja de salida'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Envía las notificaciones pendientes y termina',
+        )
+
+    def handle(self, *args, **options):
+        config = settings.PQRS_CONFIG
+        lote = config.get('NOTIFICACIONES_LOTE', 100)
+        espera = config.get('NOTIFICACIONES_ESPERA_SEGUNDOS', 30)
+
+        while True:
+            total = 0
+            enviadas = enviar_pendientes(lote)
+            while enviadas:
+                total += enviadas
+                enviadas = enviar_pendientes(lote)
+            if total:
+                self.stdout.write(f'{total} notificaciones procesadas')
+
+            if options['una_vez']:
+                return
+
+            # Esperar un aviso de notificaciones nuevas o el siguiente sondeo
+            get_redis_connection('default').blpop(COLA_DESPERTAR, timeout=espera)
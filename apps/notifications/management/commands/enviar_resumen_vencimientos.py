@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.resumenes import generar_resumen_vencimientos, resumen_generado
+
+
+class Command(BaseCommand):
+    help = 'Encola el resumen diario de PQRS próximas a vencer o vencidas para cada responsable'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Genera el resumen aunque ya se haya generado hoy',
+        )
+
+    def handle(self, *args, **options):
+        if not options['forzar'] and resumen_generado():
+            self.stdout.write(self.style.WARNING(
+                'El resumen de vencimientos de hoy ya fue generado. Use --forzar para repetirlo.'
+            ))
+            return
+
+        total = generar_resumen_vencimientos()
+        self.stdout.write(self.style.SUCCESS(f'{total} resúmenes de vencimientos encolados'))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacion',
+            name='intentos',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Intentos de Envío'),
+        ),
+        migrations.AddField(
+            model_name='notificacion',
+            name='proximo_intento',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Próximo Intento'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['enviado', 'fecha_creacion'], name='notificatio_enviado_fccf0c_idx'),
+        ),
+    ]
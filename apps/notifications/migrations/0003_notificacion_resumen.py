@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0008_indices_historial_respuestas'),
+        ('notifications', '0002_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificacion',
+            name='pqrs',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones', to='pqrs.pqrs', verbose_name='PQRS'),
+        ),
+        migrations.AlterField(
+            model_name='notificacion',
+            name='tipo',
+            field=models.CharField(choices=[('pqrs_creada', 'PQRS Creada'), ('pqrs_respondida', 'PQRS Respondida'), ('pqrs_cerrada', 'PQRS Cerrada'), ('pqrs_vencida', 'PQRS Vencida'), ('resumen_vencimientos', 'Resumen de Vencimientos')], max_length=20, verbose_name='Tipo'),
+        ),
+    ]
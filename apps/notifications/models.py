@@ -10,11 +10,14 @@ class Notificacion(models.Model):
         ('pqrs_respondida', 'PQRS Respondida'),
         ('pqrs_cerrada', 'PQRS Cerrada'),
         ('pqrs_vencida', 'PQRS Vencida'),
+        ('resumen_vencimientos', 'Resumen de Vencimientos'),
     ]
     
     pqrs = models.ForeignKey(
         'pqrs.PQRS',
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='notificaciones',
         verbose_name='PQRS'
     )
@@ -46,6 +49,15 @@ class Notificacion(models.Model):
         blank=True,
         verbose_name='Error'
     )
+    intentos = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Intentos de Envío'
+    )
+    proximo_intento = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Próximo Intento'
+    )
     fecha_creacion = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Fecha de Creación'
@@ -55,6 +67,11 @@ class Notificacion(models.Model):
         ordering = ['-fecha_creacion']
         verbose_name = 'Notificación'
         verbose_name_plural = 'Notificaciones'
+        indexes = [
+            models.Index(fields=['enviado', 'fecha_creacion']),
+        ]
     
     def __str__(self):
+        if self.pqrs_id is None:
+            return f"{self.get_tipo_display()} - {self.destinatario_email}"
         return f"{self.get_tipo_display()} - {self.pqrs.numero_radicado}"
\ No newline at end of file
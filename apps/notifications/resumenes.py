@@ -0,0 +1,195 @@
+import logging
+from collections import defaultdict
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from apps.pqrs.models import PQRS
+from apps.pqrs.semaforo import ESTADOS_ABIERTOS, limites_de_bandas
+from .models import Notificacion
+from .utils import _despertar_worker
+
+
+logger = logging.getLogger(__name__)
+
+# Roles que reciben el resumen de las PQRS sin responsable de su área
+ROLES_SUPERVISION = ['supervisor']
+
+
+def _casos_en_riesgo(ahora):
+    """
+    Conteo de PQRS abiertas en amarillo o rojo agrupado por responsable,
+    área y color, en una sola consulta sobre el índice (estado, fecha_limite).
+    """
+    limite_rojo, limite_amarillo = limites_de_bandas(ahora)
+    return (
+        PQRS.objects.filter(
+            estado__in=ESTADOS_ABIERTOS,
+            fecha_limite_respuesta__lt=limite_amarillo
+        )
+        .values('responsable_id', 'area_responsable')
+        .annotate(
+            rojo=Count('id', filter=Q(fecha_limite_respuesta__lt=limite_rojo)),
+            amarillo=Count('id', filter=Q(fecha_limite_respuesta__gte=limite_rojo)),
+            vencidas=Count('id', filter=Q(fecha_limite_respuesta__lt=ahora)),
+            proxima=Min('fecha_limite_respuesta', filter=Q(fecha_limite_respuesta__gte=ahora)),
+        )
+        .order_by()
+    )
+
+
+def _sumar(destino, fila):
+    for campo in ['rojo', 'amarillo', 'vencidas']:
+        destino[campo] += fila[campo]
+    if fila['proxima'] and (destino['proxima'] is None or fila['proxima'] < destino['proxima']):
+        destino['proxima'] = fila['proxima']
+
+
+def _vencidas_pendientes():
+    """
+    pqrs_vencida aún no incluidas en un resumen, por destinatario:
+    {email: ([ids], [radicados])}
+    """
+    pendientes = Notificacion.objects.filter(
+        tipo='pqrs_vencida', enviado=False
+    ).values_list('id', 'destinatario_email', 'pqrs__numero_radicado').order_by('fecha_creacion')
+
+    por_destinatario = defaultdict(lambda: ([], []))
+    for notificacion_id, email, radicado in pendientes:
+        ids, radicados = por_destinatario[email]
+        ids.append(notificacion_id)
+        radicados.append(radicado)
+    return por_destinatario
+
+
+def _renderizar(nombre, areas, ahora, nuevas_vencidas=()):
+    total = sum(area['rojo'] + area['amarillo'] for area in areas.values())
+    lineas = []
+    for area, resumen in sorted(areas.items()):
+        linea = (
+            f"- {area or 'Sin área'}: {resumen['rojo']} en rojo "
+            f"({resumen['vencidas']} vencidas), {resumen['amarillo']} en amarillo"
+        )
+        if resumen['proxima']:
+            linea += f"; próxima fecha límite {timezone.localtime(resumen['proxima']):%d/%m/%Y %H:%M}"
+        lineas.append(linea)
+    if nuevas_vencidas:
+        lineas.append('')
+        lineas.append(f"Vencidas desde el último resumen: {', '.join(nuevas_vencidas)}")
+    detalle = '\n'.join(lineas)
+
+    asunto = f"Resumen de vencimientos PQRS - {timezone.localtime(ahora):%d/%m/%Y} ({total} casos en riesgo)"
+    mensaje = f"""
+Hola {nombre},
+
+Estas son las PQRS a su cargo que están próximas a vencer o vencidas:
+
+{detalle}
+
+Consulte el listado filtrando por color de semáforo para ver el detalle.
+
+Atentamente,
+Sistema PQRS
+    """
+    return asunto, mensaje
+
+
+def generar_resumen_vencimientos(ahora=None):
+    """
+    Encola un resumen por destinatario con las PQRS en amarillo o rojo.
+    Las asignadas van a su responsable; las que no tienen responsable (o
+    cuyo responsable no tiene email) van a los supervisores del área.
+    Cada resumen lista además las PQRS con pqrs_vencida pendiente de ese
+    destinatario (quien las tenga recibe resumen aunque no tenga casos en
+    riesgo). Las pqrs_vencida de destinatarios sin resumen, p. ej. un
+    usuario desactivado, siguen pendientes.
+    Retorna la cantidad de notificaciones creadas.
+    """
+    ahora = ahora or timezone.now()
+    User = get_user_model()
+    nuevas_vencidas = _vencidas_pendientes()
+    filas = list(_casos_en_riesgo(ahora))
+    if not filas and not nuevas_vencidas:
+        return 0
+
+    campos = ['id', 'email', 'first_name', 'last_name', 'username']
+    responsables = {
+        usuario.pk: usuario
+        for usuario in User.objects.filter(
+            pk__in={fila['responsable_id'] for fila in filas if fila['responsable_id']},
+            is_active=True,
+        ).exclude(email='').only(*campos)
+    }
+
+    # destinatario -> área -> conteos
+    resumenes = defaultdict(lambda: defaultdict(
+        lambda: {'rojo': 0, 'amarillo': 0, 'vencidas': 0, 'proxima': None}
+    ))
+    sin_destinatario = defaultdict(list)
+    for fila in filas:
+        usuario = responsables.get(fila['responsable_id'])
+        if usuario:
+            _sumar(resumenes[usuario][fila['area_responsable']], fila)
+        else:
+            sin_destinatario[fila['area_responsable']].append(fila)
+
+    if sin_destinatario:
+        supervisores = defaultdict(list)
+        for usuario in User.objects.filter(
+            rol__in=ROLES_SUPERVISION,
+            area__in=list(sin_destinatario),
+            is_active=True,
+        ).exclude(email='').only(*campos, 'area'):
+            supervisores[usuario.area].append(usuario)
+
+        for area, filas_area in sin_destinatario.items():
+            if not supervisores[area]:
+                logger.warning('No hay supervisores con email para el resumen del área %r', area)
+            for usuario in supervisores[area]:
+                for fila in filas_area:
+                    _sumar(resumenes[usuario][area], fila)
+
+    # Destinatarios con vencidas pendientes y sin casos en riesgo (p. ej. ya reasignadas)
+    con_resumen = {usuario.email for usuario in resumenes}
+    faltantes = set(nuevas_vencidas) - con_resumen
+    if faltantes:
+        for usuario in User.objects.filter(email__in=faltantes, is_active=True).order_by('pk').only(*campos):
+            if usuario.email not in con_resumen:
+                con_resumen.add(usuario.email)
+                resumenes[usuario]  # Resumen solo con sus vencidas
+
+    notificaciones = []
+    incluidas = []
+    for usuario, areas in resumenes.items():
+        ids, radicados = nuevas_vencidas.get(usuario.email, ((), ()))
+        incluidas += ids
+        asunto, mensaje = _renderizar(usuario.get_full_name() or usuario.username, areas, ahora, radicados)
+        notificaciones.append(Notificacion(
+            pqrs=None,
+            tipo='resumen_vencimientos',
+            destinatario_email=usuario.email,
+            asunto=asunto,
+            mensaje=mensaje
+        ))
+
+    with transaction.atomic():
+        Notificacion.objects.bulk_create(notificaciones, batch_size=500)
+        _marcar_incluidas(incluidas, ahora)
+        transaction.on_commit(_despertar_worker)
+
+    return len(notificaciones)
+
+
+def _marcar_incluidas(ids, ahora):
+    """Marca como enviadas las pqrs_vencida que salieron en un resumen"""
+    if ids:
+        Notificacion.objects.filter(id__in=ids).update(enviado=True, fecha_envio=ahora)
+
+
+def resumen_generado(ahora=None):
+    """Indica si ya se encoló el resumen de vencimientos del día"""
+    ahora = ahora or timezone.now()
+    return Notificacion.objects.filter(
+        tipo='resumen_vencimientos',
+        fecha_creacion__date=timezone.localdate(ahora)
+    ).exists()
@@ -1,3 +1,174 @@
-from django.test import TestCase
+from datetime import timedelta
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.pqrs.models import PQRS
+from apps.pqrs.tareas import recalcular_semaforos
+from apps.pqrs.tests import crear_pqrs
+from apps.users.models import User
+from .models import Notificacion
+from .resumenes import generar_resumen_vencimientos
+from .utils import enviar_pendientes, notificar_pqrs_creada
 
-# Create your tests here.
+
+class PQRSVencidaTests(TestCase):
+    """Las PQRS que vencen dejan su notificación pqrs_vencida y salen en el resumen"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = User.objects.create_user(
+            'gestor', email='gestor@example.com', password='clave', rol='gestor', area='Atención'
+        )
+        cls.pqrs = crear_pqrs(responsable=cls.gestor, area_responsable='Atención')
+        PQRS.objects.filter(pk=cls.pqrs.pk).update(fecha_limite_respuesta=timezone.now() - timedelta(hours=1))
+
+    def setUp(self):
+        parche = mock.patch('apps.notifications.utils.get_redis_connection')
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_barrido_registra_y_el_resumen_la_incluye(self):
+        recalcular_semaforos()
+
+        vencida = Notificacion.objects.get(tipo='pqrs_vencida')
+        self.assertEqual((vencida.pqrs_id, vencida.destinatario_email), (self.pqrs.pk, 'gestor@example.com'))
+
+        # El worker no la envía sola
+        enviar_pendientes()
+        self.assertEqual(mail.outbox, [])
+        vencida.refresh_from_db()
+        self.assertFalse(vencida.enviado)
+
+        self.assertEqual(generar_resumen_vencimientos(), 1)
+        resumen = Notificacion.objects.get(tipo='resumen_vencimientos')
+        self.assertIn(f'Vencidas desde el último resumen: {self.pqrs.numero_radicado}', resumen.mensaje)
+        vencida.refresh_from_db()
+        self.assertTrue(vencida.enviado)
+
+        enviar_pendientes()
+        self.assertEqual([email.to for email in mail.outbox], [['gestor@example.com']])
+
+    def test_reasignada_le_llega_igual_al_responsable_anterior(self):
+        recalcular_semaforos()
+        otro = User.objects.create_user(
+            'otro', email='otro@example.com', password='clave', rol='gestor', area='Atención'
+        )
+        PQRS.objects.filter(pk=self.pqrs.pk).update(responsable=otro)
+
+        self.assertEqual(generar_resumen_vencimientos(), 2)
+        resumen = Notificacion.objects.get(tipo='resumen_vencimientos', destinatario_email='gestor@example.com')
+        self.assertIn(self.pqrs.numero_radicado, resumen.mensaje)
+        self.assertTrue(Notificacion.objects.get(tipo='pqrs_vencida').enviado)
+
+    def test_sin_resumen_para_el_destinatario_queda_pendiente(self):
+        recalcular_semaforos()
+        User.objects.filter(pk=self.gestor.pk).update(is_active=False)
+
+        # Sin responsable activo ni supervisores del área no sale ningún resumen
+        with self.assertLogs('apps.notifications.resumenes', 'WARNING'):
+            self.assertEqual(generar_resumen_vencimientos(), 0)
+        self.assertFalse(Notificacion.objects.get(tipo='pqrs_vencida').enviado)
+
+        # Al reactivarse, el siguiente resumen la incluye
+        User.objects.filter(pk=self.gestor.pk).update(is_active=True)
+        self.assertEqual(generar_resumen_vencimientos(), 1)
+        self.assertTrue(Notificacion.objects.get(tipo='pqrs_vencida').enviado)
+
+    def test_un_segundo_barrido_no_la_repite(self):
+        recalcular_semaforos()
+        recalcular_semaforos()
+        self.assertEqual(Notificacion.objects.filter(tipo='pqrs_vencida').count(), 1)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class BandejaSalidaTests(TestCase):
+    """Envío de la bandeja de salida con reintentos y backoff exponencial"""
+
+    def setUp(self):
+        for nombre in ['get_redis_connection', 'logger']:
+            parche = mock.patch(f'apps.notifications.utils.{nombre}')
+            parche.start()
+            self.addCleanup(parche.stop)
+        pqrs = crear_pqrs()
+        self.fallida = notificar_pqrs_creada(pqrs)
+        self.fallida.destinatario_email = 'caido@example.com'
+        self.fallida.save()
+        self.enviada = notificar_pqrs_creada(pqrs)
+
+    def _enviar(self):
+        """enviar_pendientes con un servidor que rechaza caido@example.com; retorna (antes, después)"""
+        original = EmailBackend.send_messages
+
+        def send_messages(backend, mensajes):
+            if any('caido@example.com' in mensaje.to for mensaje in mensajes):
+                raise SMTPRecipientsRefused({'caido@example.com': (550, b'Buzon no disponible')})
+            return original(backend, mensajes)
+
+        antes = timezone.now()
+        with mock.patch.object(EmailBackend, 'send_messages', send_messages):
+            enviar_pendientes()
+        return antes, timezone.now()
+
+    def assertReintento(self, intentos, segundos, antes, despues):
+        self.fallida.refresh_from_db()
+        self.assertFalse(self.fallida.enviado)
+        self.assertEqual(self.fallida.intentos, intentos)
+        self.assertIn('caido@example.com', self.fallida.error)
+        espera = timedelta(seconds=segundos)
+        self.assertTrue(antes + espera <= self.fallida.proximo_intento <= despues + espera)
+
+    def _vencer_espera(self):
+        Notificacion.objects.filter(pk=self.fallida.pk).update(proximo_intento=timezone.now())
+
+    def test_un_fallo_no_detiene_el_lote(self):
+        antes, despues = self._enviar()
+
+        self.assertEqual([email.to for email in mail.outbox], [['ana@example.com']])
+        self.enviada.refresh_from_db()
+        self.assertEqual((self.enviada.enviado, self.enviada.intentos, self.enviada.error), (True, 1, ''))
+        self.assertReintento(1, 60, antes, despues)
+
+    def test_backoff_exponencial(self):
+        self._enviar()
+        # Antes de proximo_intento no se vuelve a intentar
+        self._enviar()
+        self.fallida.refresh_from_db()
+        self.assertEqual(self.fallida.intentos, 1)
+
+        self._vencer_espera()
+        self.assertReintento(2, 120, *self._enviar())
+        self._vencer_espera()
+        self.assertReintento(3, 240, *self._enviar())
+
+    @override_settings(PQRS_CONFIG={
+        **settings.PQRS_CONFIG,
+        'NOTIFICACIONES_MAX_INTENTOS': 2,
+        'NOTIFICACIONES_REINTENTO_MAXIMO_SEGUNDOS': 90,
+    })
+    def test_espera_maxima_y_maximo_de_intentos(self):
+        self._enviar()
+        self._vencer_espera()
+        self.assertReintento(2, 90, *self._enviar())
+
+        # Agotó los intentos: el worker ya no la toma
+        self._vencer_espera()
+        self._enviar()
+        self.fallida.refresh_from_db()
+        self.assertEqual(self.fallida.intentos, 2)
+
+    def test_fallo_al_abrir_la_conexion(self):
+        with mock.patch.object(EmailBackend, 'open', side_effect=OSError('Conexión rechazada')):
+            antes = timezone.now()
+            self.assertEqual(enviar_pendientes(), 2)
+            despues = timezone.now()
+
+        self.assertEqual(mail.outbox, [])
+        espera = timedelta(seconds=60)
+        for notificacion in Notificacion.objects.all():
+            self.assertEqual((notificacion.enviado, notificacion.intentos), (False, 1))
+            self.assertEqual(notificacion.error, 'Conexión rechazada')
+            self.assertTrue(antes + espera <= notificacion.proximo_intento <= despues + espera)
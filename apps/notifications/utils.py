@@ -1,11 +1,129 @@
-from django.core.mail import EmailMessage
+import logging
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
+from django_redis import get_redis_connection
 from .models import Notificacion
 
 
-def enviar_email_pqrs_creada(pqrs):
-    """Envia email cuando se crea una PQRS"""
+logger = logging.getLogger(__name__)
+
+# Lista de Redis usada para despertar al worker cuando hay notificaciones nuevas
+COLA_DESPERTAR = 'notificaciones:despertar'
+
+# Tipos que el worker no envía uno a uno: se incluyen en el resumen diario de vencimientos
+TIPOS_EN_RESUMEN = ['pqrs_vencida']
+
+
+def _despertar_worker():
+    """Avisa al worker de envío que hay notificaciones nuevas (si Redis falla, el worker las toma al sondear)"""
+    try:
+        redis = get_redis_connection('default')
+        redis.lpush(COLA_DESPERTAR, 1)
+        redis.ltrim(COLA_DESPERTAR, 0, 0)
+    except Exception:
+        logger.warning('No se pudo despertar al worker de notificaciones', exc_info=True)
+
+
+def _encolar(pqrs, tipo, destinatario_email, asunto, mensaje):
+    """
+    Registra la notificación en la bandeja de salida. El envío lo hace el
+    worker (comando enviar_notificaciones) cuando se confirma la transacción.
+    """
+    notificacion = Notificacion.objects.create(
+        pqrs=pqrs,
+        tipo=tipo,
+        destinatario_email=destinatario_email,
+        asunto=asunto,
+        mensaje=mensaje
+    )
+    transaction.on_commit(_despertar_worker)
+    return notificacion
+
+
+def _construir_email(notificacion):
+    email = EmailMessage(
+        subject=notificacion.asunto,
+        body=notificacion.mensaje,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[notificacion.destinatario_email],
+    )
+    email.content_subtype = "plain"
+    email.encoding = 'utf-8'
+    return email
+
+
+def _registrar_fallo(notificacion, error, ahora):
+    """Cuenta el intento fallido y programa el siguiente con backoff exponencial"""
+    config = settings.PQRS_CONFIG
+    notificacion.intentos += 1
+    notificacion.error = str(error)
+    espera = config.get('NOTIFICACIONES_REINTENTO_SEGUNDOS', 60) * 2 ** (notificacion.intentos - 1)
+    notificacion.proximo_intento = ahora + timedelta(
+        seconds=min(espera, config.get('NOTIFICACIONES_REINTENTO_MAXIMO_SEGUNDOS', 6 * 3600))
+    )
+
+
+def enviar_pendientes(lote=100):
+    """
+    Envía un lote de notificaciones pendientes por una sola conexión SMTP.
+    Las filas se toman con SKIP LOCKED para que varios workers no envíen
+    la misma notificación. Retorna la cantidad de notificaciones procesadas.
+    """
+    ahora = timezone.now()
+    max_intentos = settings.PQRS_CONFIG.get('NOTIFICACIONES_MAX_INTENTOS', 8)
+
+    with transaction.atomic():
+        notificaciones = list(
+            Notificacion.objects.select_for_update(skip_locked=True)
+            .filter(enviado=False, intentos__lt=max_intentos)
+            .exclude(tipo__in=TIPOS_EN_RESUMEN)
+            .filter(Q(proximo_intento__isnull=True) | Q(proximo_intento__lte=ahora))
+            .order_by('fecha_creacion')[:lote]
+        )
+        if not notificaciones:
+            return 0
+
+        conexion = get_connection(fail_silently=False)
+        try:
+            conexion.open()
+        except Exception as e:
+            logger.error('No se pudo abrir la conexión SMTP: %s', e)
+            for notificacion in notificaciones:
+                _registrar_fallo(notificacion, e, ahora)
+        else:
+            try:
+                for notificacion in notificaciones:
+                    try:
+                        conexion.send_messages([_construir_email(notificacion)])
+                    except Exception as e:
+                        logger.warning('Error enviando la notificación %s: %s', notificacion.pk, e)
+                        _registrar_fallo(notificacion, e, ahora)
+                    else:
+                        notificacion.enviado = True
+                        notificacion.fecha_envio = timezone.now()
+                        notificacion.intentos += 1
+                        notificacion.error = ''
+                        notificacion.proximo_intento = None
+            finally:
+                try:
+                    conexion.close()
+                except Exception:
+                    pass
+
+        Notificacion.objects.bulk_update(
+            notificaciones,
+            ['enviado', 'fecha_envio', 'error', 'intentos', 'proximo_intento']
+        )
+
+    return len(notificaciones)
+
+
+def notificar_pqrs_creada(pqrs):
+    """Encola el email de confirmación cuando se crea una PQRS"""
     
     asunto = f"PQRS Registrada - {pqrs.numero_radicado}"
     
@@ -25,40 +143,11 @@ Atentamente,
 Sistema PQRS
     """
     
-    notificacion = Notificacion.objects.create(
-        pqrs=pqrs,
-        tipo='pqrs_creada',
-        destinatario_email=pqrs.correo_electronico,
-        asunto=asunto,
-        mensaje=mensaje
-    )
-    
-    try:
-        email = EmailMessage(
-            subject=asunto,
-            body=mensaje,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[pqrs.correo_electronico],
-        )
-        email.content_subtype = "plain"
-        email.encoding = 'utf-8'
-        email.send(fail_silently=False)
-        
-        notificacion.enviado = True
-        notificacion.fecha_envio = timezone.now()
-        notificacion.save()
-        
-        return True
-    
-    except Exception as e:
-        notificacion.error = str(e)
-        notificacion.save()
-        print(f"Error: {e}")
-        return False
+    return _encolar(pqrs, 'pqrs_creada', pqrs.correo_electronico, asunto, mensaje)
 
 
-def enviar_email_pqrs_respondida(pqrs, respuesta):
-    """Envia email cuando se responde una PQRS"""
+def notificar_pqrs_respondida(pqrs, respuesta):
+    """Encola el email al ciudadano cuando se responde una PQRS"""
     
     asunto = f"Respuesta a PQRS - {pqrs.numero_radicado}"
     
@@ -77,33 +166,46 @@ Atentamente,
 Sistema PQRS
     """
     
-    notificacion = Notificacion.objects.create(
-        pqrs=pqrs,
-        tipo='pqrs_respondida',
-        destinatario_email=pqrs.correo_electronico,
-        asunto=asunto,
-        mensaje=mensaje
-    )
-    
-    try:
-        email = EmailMessage(
-            subject=asunto,
-            body=mensaje,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[pqrs.correo_electronico],
-        )
-        email.content_subtype = "plain"
-        email.encoding = 'utf-8'
-        email.send(fail_silently=False)
-        
-        notificacion.enviado = True
-        notificacion.fecha_envio = timezone.now()
-        notificacion.save()
-        
-        return True
-    
-    except Exception as e:
-        notificacion.error = str(e)
-        notificacion.save()
-        print(f"Error: {e}")
-        return False
\ No newline at end of file
+    return _encolar(pqrs, 'pqrs_respondida', pqrs.correo_electronico, asunto, mensaje)
+
+
+def registrar_pqrs_vencidas(pqrs_ids):
+    """
+    Registra una notificación pqrs_vencida para el responsable de cada PQRS que
+    acaba de vencer. No se envía sola: sale en el siguiente resumen de vencimientos.
+    """
+    from apps.pqrs.models import PQRS
+
+    notificaciones = []
+    for pqrs in PQRS.objects.filter(id__in=pqrs_ids).select_related('responsable').only(
+        'id', 'numero_radicado', 'tipo', 'asunto', 'fecha_limite_respuesta',
+        'responsable__email', 'responsable__first_name', 'responsable__last_name',
+    ):
+        if not pqrs.responsable or not pqrs.responsable.email:
+            continue
+
+        asunto = f"PQRS Vencida - {pqrs.numero_radicado}"
+
+        mensaje = f"""
+Hola {pqrs.responsable.get_full_name()},
+
+La siguiente PQRS a su cargo supero la fecha limite de respuesta.
+
+Numero: {pqrs.numero_radicado}
+Tipo: {pqrs.get_tipo_display()}
+Asunto: {pqrs.asunto}
+Fecha limite: {pqrs.fecha_limite_respuesta.strftime('%d/%m/%Y %H:%M')}
+
+Atentamente,
+Sistema PQRS
+    """
+
+        notificaciones.append(Notificacion(
+            pqrs=pqrs,
+            tipo='pqrs_vencida',
+            destinatario_email=pqrs.responsable.email,
+            asunto=asunto,
+            mensaje=mensaje
+        ))
+
+    return Notificacion.objects.bulk_create(notificaciones, batch_size=500)
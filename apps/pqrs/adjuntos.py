@@ -0,0 +1,169 @@
+import hashlib
+import os
+from io import BytesIO
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from rest_framework.exceptions import ValidationError
+
+
+# Firmas (magic bytes) aceptadas para cada extensión; .txt se valida aparte
+FIRMAS = {
+    '.pdf': [b'%PDF-'],
+    '.jpg': [b'\xff\xd8\xff'],
+    '.jpeg': [b'\xff\xd8\xff'],
+    '.png': [b'\x89PNG\r\n\x1a\n'],
+    '.doc': [b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'],
+    '.docx': [b'PK\x03\x04'],
+    '.txt': [],
+}
+EXTENSIONES_PERMITIDAS = list(FIRMAS)
+
+# Bytes del inicio del archivo que se revisan para reconocer su tipo
+TAMANO_CABECERA = 2048
+
+
+def tamano_maximo():
+    return settings.PQRS_CONFIG.get('ADJUNTO_TAMANO_MAXIMO', 10 * 1024 * 1024)
+
+
+def validar_extension(nombre):
+    """Retorna la extensión del archivo si está permitida"""
+    ext = os.path.splitext(nombre)[1].lower()
+    if ext not in FIRMAS:
+        raise ValidationError(
+            f"Formato no permitido. Use: {', '.join(EXTENSIONES_PERMITIDAS)}"
+        )
+    return ext
+
+
+def validar_tamano(tamano):
+    if tamano > tamano_maximo():
+        raise ValidationError(
+            f"El archivo no debe superar {tamano_maximo() // (1024 * 1024)}MB"
+        )
+
+
+def validar_contenido(ext, cabecera):
+    """Compara los primeros bytes del archivo con las firmas de su extensión"""
+    if ext == '.txt':
+        valido = bool(cabecera) and b'\x00' not in cabecera
+    else:
+        valido = any(cabecera.startswith(firma) for firma in FIRMAS[ext])
+    if not valido:
+        raise ValidationError(
+            f"El contenido del archivo no corresponde a un {ext[1:].upper()}"
+        )
+
+
+def validar_adjunto(archivo):
+    """Valida tamaño, extensión y contenido de un archivo ya recibido"""
+    validar_tamano(archivo.size)
+    ext = validar_extension(archivo.name)
+    archivo.seek(0)
+    validar_contenido(ext, archivo.read(TAMANO_CABECERA))
+    archivo.seek(0)
+
+
+class AdjuntoAlmacenado(UploadedFile):
+    """Adjunto que el upload handler ya guardó como blob en el storage"""
+
+    def __init__(self, archivo, ruta, nombre, content_type, tamano, charset):
+        super().__init__(archivo, nombre, content_type, tamano, charset)
+        self.ruta = ruta
+
+
+class AdjuntoPQRSUploadHandler(FileUploadHandler):
+    """
+    Recibe el adjunto de una PQRS en streaming: rechaza la petición en
+    cuanto supera el tamaño máximo o si sus primeros bytes no corresponden
+    a la extensión, y calcula su SHA-256 mientras llega. Los archivos
+    pequeños se mantienen en memoria y los demás se escriben en un temporal
+    del storage; al terminar, un contenido ya conocido no se escribe de
+    nuevo y uno nuevo se mueve (sin copiarlo) a la ruta de su digest.
+    """
+
+    campo = 'archivo_adjunto'
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Cuerpo mayor que el adjunto máximo más los campos de texto: rechazar sin leerlo
+        limite = tamano_maximo() + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        if content_length and content_length > limite:
+            self._rechazar(ValidationError(
+                f"El archivo no debe superar {tamano_maximo() // (1024 * 1024)}MB"
+            ))
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        if field_name != self.campo:
+            return
+        try:
+            self.ext = validar_extension(file_name)
+            if content_length:
+                validar_tamano(content_length)
+        except ValidationError as error:
+            self._rechazar(error)
+
+        from .models import PQRS
+        self.storage = PQRS._meta.get_field(self.campo).storage
+        self.digest = hashlib.sha256()
+        self.cabecera = b''
+        self.validado = False
+        self.temporal = None
+        self.file = BytesIO()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.field_name != self.campo:
+            return raw_data
+        try:
+            validar_tamano(start + len(raw_data))
+            if not self.validado:
+                self.cabecera += raw_data[:TAMANO_CABECERA - len(self.cabecera)]
+                if len(self.cabecera) >= TAMANO_CABECERA:
+                    validar_contenido(self.ext, self.cabecera)
+                    self.validado = True
+        except ValidationError as error:
+            self._rechazar(error)
+
+        self.digest.update(raw_data)
+        if self.temporal is None and start + len(raw_data) > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+            # Pasar a un temporal en el storage; al final se renombra, no se copia
+            self.temporal, archivo = self.storage.abrir_temporal()
+            archivo.write(self.file.getvalue())
+            self.file = archivo
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.field_name != self.campo:
+            return None
+        if not self.validado:
+            try:
+                validar_contenido(self.ext, self.cabecera)
+            except ValidationError as error:
+                self._rechazar(error)
+
+        if self.temporal:
+            self.file.close()
+            ruta = self.storage.consolidar(self.digest.hexdigest(), self.ext, file_size, temporal=self.temporal)
+        else:
+            ruta = self.storage.consolidar(self.digest.hexdigest(), self.ext, file_size, contenido=self.file.getvalue())
+        self.temporal = None
+
+        return AdjuntoAlmacenado(
+            self.file,
+            ruta=ruta,
+            nombre=self.file_name,
+            content_type=self.content_type,
+            tamano=file_size,
+            charset=self.charset,
+        )
+
+    def _rechazar(self, error):
+        """Descarta lo recibido hasta ahora y corta la lectura del cuerpo de la petición"""
+        if getattr(self, 'temporal', None):
+            self.file.close()
+            self.storage.delete(self.temporal)
+            self.temporal = None
+        raise ValidationError({self.campo: error.detail})
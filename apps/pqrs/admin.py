@@ -1,9 +1,47 @@
 from django.contrib import admin
-from .models import PQRS, HistorialPQRS, RespuestaPQRS
+from .busqueda import buscar_pqrs
+from .cache import invalidar_consulta
+from .models import PQRS, HistorialPQRS, RespuestaPQRS, DiaFestivo, BlobAdjunto
+
+
+class SemaforoVigenteFilter(admin.SimpleListFilter):
+    """Filtra por el color vigente del semáforo usando rangos de fecha límite"""
+    
+    title = 'Color del Semáforo'
+    parameter_name = 'semaforo'
+    
+    def lookups(self, request, model_admin):
+        return PQRS.COLOR_SEMAFORO_CHOICES
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.semaforo(self.value())
+        return queryset
+
+
+class InvalidarConsultaMixin:
+    """Invalida la consulta pública cacheada de la PQRS afectada al guardar o borrar"""
+    
+    def _radicado(self, obj):
+        return obj.pqrs.numero_radicado
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidar_consulta(self._radicado(obj))
+    
+    def delete_model(self, request, obj):
+        radicado = self._radicado(obj)
+        super().delete_model(request, obj)
+        invalidar_consulta(radicado)
+    
+    def delete_queryset(self, request, queryset):
+        radicados = [self._radicado(obj) for obj in queryset]
+        super().delete_queryset(request, queryset)
+        invalidar_consulta(*radicados)
 
 
 @admin.register(PQRS)
-class PQRSAdmin(admin.ModelAdmin):
+class PQRSAdmin(InvalidarConsultaMixin, admin.ModelAdmin):
     """Configuración del admin para PQRS"""
     
     list_display = [
@@ -11,9 +49,9 @@ class PQRSAdmin(admin.ModelAdmin):
         'tipo',
         'asunto',
         'nombre_completo',
-        'estado',
-        'color_semaforo',
-        'dias_restantes',
+        'estado_vigente',
+        'color_semaforo_vigente',
+        'dias_restantes_vigentes',
         'fecha_radicacion',
         'responsable',
     ]
@@ -21,11 +59,12 @@ class PQRSAdmin(admin.ModelAdmin):
     list_filter = [
         'tipo',
         'estado',
-        'color_semaforo',
+        SemaforoVigenteFilter,
         'area_responsable',
         'fecha_radicacion',
     ]
     
+    # La búsqueda real la hace get_search_results (FULLTEXT / igualdad exacta)
     search_fields = [
         'numero_radicado',
         'asunto',
@@ -88,10 +127,35 @@ class PQRSAdmin(admin.ModelAdmin):
     )
     
     date_hierarchy = 'fecha_radicacion'
+    
+    def get_queryset(self, request):
+        """Calcula el semáforo vigente en SQL para el listado"""
+        return super().get_queryset(request).with_semaforo()
+    
+    def _radicado(self, obj):
+        return obj.numero_radicado
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Usa MATCH ... AGAINST en lugar de LIKE '%termino%' sobre columnas de texto"""
+        if not search_term.strip():
+            return queryset, False
+        return buscar_pqrs(queryset, search_term), False
+    
+    @admin.display(description='Estado', ordering='estado_actual')
+    def estado_vigente(self, obj):
+        return dict(PQRS.ESTADO_CHOICES)[obj.estado_actual]
+    
+    @admin.display(description='Color del Semáforo', ordering='color_semaforo_actual')
+    def color_semaforo_vigente(self, obj):
+        return dict(PQRS.COLOR_SEMAFORO_CHOICES)[obj.color_semaforo_actual]
+    
+    @admin.display(description='Días Restantes', ordering='dias_restantes_actual')
+    def dias_restantes_vigentes(self, obj):
+        return obj.dias_restantes_actual
 
 
 @admin.register(HistorialPQRS)
-class HistorialPQRSAdmin(admin.ModelAdmin):
+class HistorialPQRSAdmin(InvalidarConsultaMixin, admin.ModelAdmin):
     """Configuración del admin para Historial"""
     
     list_display = [
@@ -118,7 +182,7 @@ class HistorialPQRSAdmin(admin.ModelAdmin):
 
 
 @admin.register(RespuestaPQRS)
-class RespuestaPQRSAdmin(admin.ModelAdmin):
+class RespuestaPQRSAdmin(InvalidarConsultaMixin, admin.ModelAdmin):
     """Configuración del admin para Respuestas"""
     
     list_display = [
@@ -140,4 +204,54 @@ class RespuestaPQRSAdmin(admin.ModelAdmin):
     
     readonly_fields = [
         'fecha_respuesta',
-    ]
\ No newline at end of file
+    ]
+
+
+@admin.register(DiaFestivo)
+class DiaFestivoAdmin(admin.ModelAdmin):
+    """Configuración del admin para Días Festivos"""
+    
+    list_display = [
+        'fecha',
+        'descripcion',
+    ]
+    
+    list_filter = [
+        'fecha',
+    ]
+    
+    search_fields = [
+        'descripcion',
+    ]
+    
+    date_hierarchy = 'fecha'
+
+
+@admin.register(BlobAdjunto)
+class BlobAdjuntoAdmin(admin.ModelAdmin):
+    """Configuración del admin para los blobs de adjuntos (solo lectura)"""
+    
+    list_display = [
+        'sha256',
+        'archivo',
+        'tamano',
+        'referencias',
+        'fecha_creacion',
+    ]
+    
+    search_fields = [
+        'sha256',
+        'archivo',
+    ]
+    
+    readonly_fields = [
+        'sha256',
+        'archivo',
+        'tamano',
+        'referencias',
+        'fecha_creacion',
+        'fecha_actualizacion',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_BLOBS = 'pqrs_attachments/blobs'
+DIRECTORIO_TEMPORAL = 'pqrs_attachments/tmp'
+
+
+class AlmacenamientoAdjuntos(FileSystemStorage):
+    """
+    Storage direccionado por contenido para los adjuntos de PQRS: cada
+    archivo se guarda una sola vez bajo su SHA-256 y se registra en
+    BlobAdjunto. Subir un archivo repetido solo cuesta buscar su digest.
+    """
+
+    def ruta_blob(self, digest, ext):
+        return f'{PREFIJO_BLOBS}/{digest[:2]}/{digest}{ext.lower()}'
+
+    def _crear_directorio(self, ruta):
+        os.makedirs(os.path.dirname(ruta), self.directory_permissions_mode or 0o777, exist_ok=True)
+
+    def abrir_temporal(self):
+        """Crea un archivo temporal en el mismo sistema de archivos que los blobs"""
+        nombre = f'{DIRECTORIO_TEMPORAL}/{uuid.uuid4().hex}'
+        ruta = self.path(nombre)
+        self._crear_directorio(ruta)
+        fd = os.open(
+            ruta,
+            os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0),
+            self.file_permissions_mode or 0o666,
+        )
+        return nombre, os.fdopen(fd, 'wb')
+
+    def consolidar(self, digest, ext, tamano, temporal=None, contenido=None):
+        """
+        Retorna el nombre del blob con ese digest. Si ya existe descarta el
+        temporal; si no, mueve el temporal (o escribe `contenido`, bytes o
+        iterable de chunks) a su ruta definitiva y registra el blob.
+        """
+        from .models import BlobAdjunto
+
+        # Reutilizar renueva fecha_actualizacion: recolectar_blobs respeta la gracia de
+        # un blob sin referencias mientras se crea la PQRS que lo va a usar
+        blob = BlobAdjunto.objects.filter(sha256=digest)
+        if blob.update(fecha_actualizacion=timezone.now()):
+            if temporal:
+                self.delete(temporal)
+            return blob.values_list('archivo', flat=True).first()
+
+        if temporal is None:
+            temporal, archivo = self.abrir_temporal()
+            with archivo:
+                for chunk in [contenido] if isinstance(contenido, bytes) else contenido:
+                    archivo.write(chunk)
+
+        nombre = self.ruta_blob(digest, ext)
+        destino = self.path(nombre)
+        self._crear_directorio(destino)
+        # Rename atómico: nunca se ve un blob a medio escribir
+        os.replace(self.path(temporal), destino)
+
+        try:
+            with transaction.atomic():
+                BlobAdjunto.objects.create(sha256=digest, archivo=nombre, tamano=tamano)
+        except IntegrityError:
+            # Otra subida simultánea registró el mismo contenido
+            return BlobAdjunto.objects.filter(sha256=digest).values_list('archivo', flat=True).first() or nombre
+        return nombre
+
+    def _save(self, name, content):
+        """Guardado por el API de storage (admin, scripts): calcula el digest antes de escribir"""
+        digest = hashlib.sha256()
+        tamano = 0
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+            tamano += len(chunk)
+        content.seek(0)
+        return self.consolidar(
+            digest.hexdigest(),
+            os.path.splitext(name)[1],
+            tamano,
+            contenido=content.chunks(),
+        )
+
+
+almacenamiento_adjuntos = AlmacenamientoAdjuntos()
+
+
+def obtener_almacenamiento_adjuntos():
+    """Storage de PQRS.archivo_adjunto (callable para no fijar rutas en las migraciones)"""
+    return almacenamiento_adjuntos
+
+
+def _ajustar_referencias(nombres, signo):
+    from .models import BlobAdjunto
+
+    ahora = timezone.now()
+    por_cantidad = {}
+    for nombre, cantidad in Counter(nombre for nombre in nombres if nombre).items():
+        por_cantidad.setdefault(cantidad, []).append(nombre)
+
+    for cantidad, grupo in por_cantidad.items():
+        BlobAdjunto.objects.filter(archivo__in=grupo).update(
+            referencias=Greatest(F('referencias') + Value(signo * cantidad), Value(0)),
+            fecha_actualizacion=ahora,
+        )
+
+
+def referenciar_blobs(nombres):
+    """Suma una referencia por cada PQRS que apunta a estos blobs"""
+    _ajustar_referencias(nombres, 1)
+
+
+def liberar_blobs(nombres):
+    """Resta una referencia por cada PQRS que dejó de apuntar a estos blobs"""
+    _ajustar_referencias(nombres, -1)
+
+
+def recolectar_blobs(gracia=None, lote=500):
+    """
+    Borra los blobs sin referencias que no cambian desde hace más de
+    `gracia` (da tiempo a que se cree la PQRS de una subida en curso) y los
+    temporales abandonados. Retorna la cantidad de blobs borrados.
+    """
+    from .models import BlobAdjunto
+
+    if gracia is None:
+        gracia = timedelta(hours=settings.PQRS_CONFIG.get('ADJUNTOS_GRACIA_HORAS', 24))
+    limite = timezone.now() - gracia
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            blobs = list(
+                BlobAdjunto.objects.select_for_update(skip_locked=True)
+                .filter(referencias=0, fecha_actualizacion__lt=limite)
+                .values_list('id', 'archivo')[:lote]
+            )
+            if not blobs:
+                break
+            BlobAdjunto.objects.filter(id__in=[id_ for id_, _ in blobs]).delete()
+            nombres = [nombre for _, nombre in blobs]
+            transaction.on_commit(lambda nombres=nombres: _borrar_archivos(nombres))
+        total += len(blobs)
+
+    directorio = almacenamiento_adjuntos.path(DIRECTORIO_TEMPORAL)
+    if os.path.isdir(directorio):
+        corte = time.time() - gracia.total_seconds()
+        for entrada in os.scandir(directorio):
+            if entrada.is_file() and entrada.stat().st_mtime < corte:
+                _borrar_archivos([f'{DIRECTORIO_TEMPORAL}/{entrada.name}'])
+
+    return total
+
+
+def _borrar_archivos(nombres):
+    for nombre in nombres:
+        try:
+            almacenamiento_adjuntos.delete(nombre)
+        except OSError:
+            logger.exception('No se pudo borrar el adjunto %s', nombre)
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from apps.dashboard.resumen import DIMENSIONES
+
+
+logger = logging.getLogger(__name__)
+
+# Colores del semáforo que avisan a la bandeja del gestor
+COLORES_ALERTA = ['amarillo', 'rojo']
+
+# Grupo de todos los gestores: PQRS sin área ni responsable (p. ej. las que radica el ciudadano)
+GRUPO_SIN_ASIGNAR = 'bandeja.sin_asignar'
+
+
+def grupo_area(area):
+    """Grupo del channel layer de un área (los nombres de grupo solo admiten ASCII)"""
+    return f'bandeja.area.{hashlib.sha256(area.encode()).hexdigest()[:40]}'
+
+
+def grupo_usuario(usuario_id):
+    return f'bandeja.usuario.{usuario_id}'
+
+
+def _grupos(area, responsable_id):
+    grupos = []
+    if area:
+        grupos.append(grupo_area(area))
+    if responsable_id:
+        grupos.append(grupo_usuario(responsable_id))
+    return grupos or [GRUPO_SIN_ASIGNAR]
+
+
+def _enviar(envios):
+    capa = get_channel_layer()
+    if capa is None:
+        return
+    try:
+        for grupo, mensaje in envios:
+            async_to_sync(capa.group_send)(grupo, mensaje)
+    except Exception:
+        logger.exception('No se pudo publicar en la bandeja de los gestores')
+
+
+def publicar(envios):
+    """Envía los mensajes [(grupo, mensaje)] cuando se confirma la transacción"""
+    if envios:
+        transaction.on_commit(lambda: _enviar(envios))
+
+
+def motivo_cambio(anterior, actual):
+    """
+    Motivo por el que una PQRS guardada aparece en la bandeja ('nueva',
+    'asignada' o 'semaforo') o None. Recibe las filas del resumen diario
+    (apps.dashboard.resumen.fila_resumen) antes y después de guardar.
+    """
+    actual = dict(zip(DIMENSIONES, actual[0]))
+    if anterior is None:
+        return 'nueva'
+    anterior = dict(zip(DIMENSIONES, anterior[0]))
+    if (anterior['area_responsable'], anterior['responsable_id']) != (actual['area_responsable'], actual['responsable_id']):
+        return 'asignada'
+    if actual['color_semaforo'] != anterior['color_semaforo'] and actual['color_semaforo'] in COLORES_ALERTA:
+        return 'semaforo'
+    return None
+
+
+def notificar_cambio(pqrs, anterior, actual):
+    """
+    Avisa a la bandeja del área y del responsable de una PQRS recién
+    guardada, o a la de todos los gestores si no tiene ninguno de los dos.
+    Si se reasignó, las bandejas anteriores reciben que salió; el aviso
+    lleva los grupos de destino para que quien también está en alguno de
+    ellos (p. ej. el gestor del área que pasa de sin asignar a su área)
+    no la retire antes de recibirla como asignada.
+    """
+    motivo = motivo_cambio(anterior, actual)
+    if motivo is None:
+        return
+    from .serializers import PQRSListSerializer
+
+    envios = []
+    grupos = _grupos(pqrs.area_responsable, pqrs.responsable_id)
+    if motivo == 'asignada':
+        previo = dict(zip(DIMENSIONES, anterior[0]))
+        retirada = {'type': 'bandeja.retirada', 'id': pqrs.pk, 'destino': grupos}
+        envios += [
+            (grupo, retirada)
+            for grupo in _grupos(previo['area_responsable'], previo['responsable_id'])
+            if grupo not in grupos
+        ]
+    mensaje = {'type': 'bandeja.pqrs', 'motivo': motivo, 'pqrs': PQRSListSerializer(pqrs).data}
+    envios += [(grupo, mensaje) for grupo in grupos]
+    publicar(envios)
+
+
+def notificar_alertas(ids, lote=500):
+    """
+    Avisa de las PQRS que el barrido pasó a amarillo o rojo. Se cargan y
+    serializan por lotes al confirmarse la transacción, así un barrido que
+    cambia muchas PQRS (p. ej. tras recalcular_fechas_limite) no las tiene
+    todas en memoria a la vez.
+    """
+    if ids:
+        transaction.on_commit(lambda: _enviar_alertas(list(ids), lote))
+
+
+def _enviar_alertas(ids, lote):
+    from .models import PQRS
+    from .serializers import PQRSListSerializer
+
+    for inicio in range(0, len(ids), lote):
+        envios = []
+        for pqrs in PQRS.objects.filter(id__in=ids[inicio:inicio + lote]).para_listado():
+            mensaje = {'type': 'bandeja.pqrs', 'motivo': 'semaforo', 'pqrs': PQRSListSerializer(pqrs).data}
+            envios += [(grupo, mensaje) for grupo in _grupos(pqrs.area_responsable, pqrs.responsable_id)]
+        _enviar(envios)
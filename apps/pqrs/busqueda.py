@@ -0,0 +1,88 @@
+import re
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db.models import F, FloatField, Func, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import PQRS, RespuestaPQRS
+
+
+RADICADO_RE = re.compile(r'^PQRS-\d{8}-\d+$', re.IGNORECASE)
+# Radicado incompleto, p. ej. "PQRS-20261018" para los radicados de un día
+PREFIJO_RADICADO_RE = re.compile(r'^PQRS-[\d-]*$', re.IGNORECASE)
+
+
+class MatchAgainst(Func):
+    """MATCH (columnas) AGAINST (termino) de MySQL; requiere un índice FULLTEXT sobre esas columnas"""
+
+    template = 'MATCH (%(expressions)s) AGAINST (%%s IN NATURAL LANGUAGE MODE)'
+    output_field = FloatField()
+
+    def __init__(self, *columnas, termino, **extra):
+        super().__init__(*[F(columna) for columna in columnas], **extra)
+        self.termino = termino
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        return sql, (*params, self.termino)
+
+
+def _es_email(termino):
+    try:
+        validate_email(termino)
+    except ValidationError:
+        return False
+    return True
+
+
+def buscar_pqrs(queryset, termino):
+    """
+    Busca PQRS por texto. Los radicados (completos o por prefijo) y correos se
+    buscan con índices B-tree; el resto usa los índices FULLTEXT de
+    asunto/descripcion, del nombre del ciudadano y del texto de las respuestas,
+    y anota `relevancia` (suma de las tres coincidencias). De cada índice se
+    toman solo las BUSQUEDA_MAXIMO_COINCIDENCIAS filas más relevantes.
+    """
+    termino = termino.strip()
+
+    if RADICADO_RE.match(termino):
+        return queryset.filter(numero_radicado=termino.upper())
+    if PREFIJO_RADICADO_RE.match(termino):
+        return queryset.filter(numero_radicado__startswith=termino.upper())
+    if _es_email(termino):
+        return queryset.filter(correo_electronico=termino)
+
+    # Una consulta por índice FULLTEXT: un OR entre MATCH impediría usarlos, y un
+    # IN (... UNION ...) puede ejecutarse como subconsulta dependiente por cada fila.
+    # Con ORDER BY relevancia + LIMIT, InnoDB corta la lectura del índice en el límite.
+    limite = settings.PQRS_CONFIG.get('BUSQUEDA_MAXIMO_COINCIDENCIAS', 1000)
+    ids = set()
+    for modelo, campo_id, columnas in (
+        (PQRS, 'id', ('asunto', 'descripcion')),
+        (PQRS, 'id', ('nombre_completo',)),
+        (RespuestaPQRS, 'pqrs_id', ('respuesta',)),
+    ):
+        ids.update(
+            modelo.objects.annotate(
+                relevancia=MatchAgainst(*columnas, termino=termino)
+            ).filter(relevancia__gt=0).order_by('-relevancia').values_list(campo_id, flat=True)[:limite]
+        )
+
+    respuestas = RespuestaPQRS.objects.filter(pqrs=OuterRef('pk')).annotate(
+        relevancia=MatchAgainst('respuesta', termino=termino)
+    ).values('pqrs').annotate(total=Sum('relevancia')).values('total')
+
+    return queryset.filter(id__in=ids).annotate(
+        relevancia=(
+            MatchAgainst('asunto', 'descripcion', termino=termino) +
+            MatchAgainst('nombre_completo', termino=termino) +
+            Coalesce(Subquery(respuestas, output_field=FloatField()), Value(0.0))
+        )
+    )
+
+
+def ordenar_por_relevancia(queryset):
+    """Ordena por relevancia si la búsqueda fue de texto completo"""
+    if 'relevancia' in queryset.query.annotations:
+        return queryset.order_by('-relevancia', '-id')
+    return queryset
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+
+def _clave_version(radicado):
+    return f'pqrs:consulta:version:{radicado.upper()}'
+
+
+def _clave_consulta(radicado, version):
+    return f'pqrs:consulta:{radicado.upper()}:v{version}'
+
+
+def calcular_etag(data):
+    """ETag fuerte a partir del contenido serializado"""
+    contenido = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    return f'"{hashlib.sha256(contenido).hexdigest()}"'
+
+
+def obtener_consulta(radicado):
+    """
+    Retorna (version, entrada) de la consulta pública cacheada; entrada es
+    None si no está en caché. Si Redis falla se comporta como un fallo de caché.
+    """
+    try:
+        version = cache.get(_clave_version(radicado), 0)
+        return version, cache.get(_clave_consulta(radicado, version))
+    except Exception:
+        logger.exception('No se pudo leer la consulta cacheada de %s', radicado)
+        return None, None
+
+
+def guardar_consulta(radicado, version, data):
+    """Guarda la consulta serializada bajo la versión leída y retorna su ETag"""
+    etag = calcular_etag(data)
+    if version is None:
+        return etag
+    try:
+        cache.set(
+            _clave_consulta(radicado, version),
+            {'data': data, 'etag': etag},
+            settings.PQRS_CONFIG.get('CONSULTA_CACHE_SEGUNDOS', 300),
+        )
+    except Exception:
+        logger.exception('No se pudo cachear la consulta de %s', radicado)
+    return etag
+
+
+def invalidar_consulta(*radicados):
+    """Cambia la versión de la consulta pública cuando se confirma la transacción"""
+    def _invalidar():
+        for radicado in radicados:
+            clave = _clave_version(radicado)
+            try:
+                try:
+                    cache.incr(clave)
+                except ValueError:
+                    cache.set(clave, 1, settings.PQRS_CONFIG.get('CONSULTA_VERSION_SEGUNDOS', 86400))
+            except Exception:
+                logger.exception('No se pudo invalidar la consulta de %s', radicado)
+
+    transaction.on_commit(_invalidar)
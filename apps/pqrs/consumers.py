@@ -0,0 +1,43 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .bandeja import GRUPO_SIN_ASIGNAR, grupo_area, grupo_usuario
+
+
+class BandejaConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Bandeja en tiempo real del gestor: recibe las PQRS nuevas, asignadas
+    o que pasan a amarillo/rojo en su área, asignadas a él o aún sin asignar.
+    """
+    
+    async def connect(self):
+        usuario = self.scope['user']
+        if not usuario.is_authenticated:
+            await self.close(code=4401)
+            return
+        if usuario.rol != 'gestor':
+            # 4403: rol sin bandeja (equivalente a HTTP 403)
+            await self.close(code=4403)
+            return
+        
+        self.grupos = [grupo_usuario(usuario.pk), GRUPO_SIN_ASIGNAR]
+        if usuario.area:
+            self.grupos.append(grupo_area(usuario.area))
+        for grupo in self.grupos:
+            await self.channel_layer.group_add(grupo, self.channel_name)
+        await self.accept()
+    
+    async def disconnect(self, code):
+        for grupo in getattr(self, 'grupos', []):
+            await self.channel_layer.group_discard(grupo, self.channel_name)
+    
+    async def receive_json(self, content, **kwargs):
+        # El canal es de solo lectura para el cliente
+        pass
+    
+    async def bandeja_pqrs(self, event):
+        await self.send_json({'tipo': event['motivo'], 'pqrs': event['pqrs']})
+    
+    async def bandeja_retirada(self, event):
+        if set(event.get('destino', ())) & set(self.grupos):
+            # También está en la bandeja de destino: le llega como asignada
+            return
+        await self.send_json({'tipo': 'retirada', 'id': event['id']})
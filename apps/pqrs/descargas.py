@@ -0,0 +1,141 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags
+from django.views.static import was_modified_since
+from .almacenamiento import PREFIJO_BLOBS
+
+
+RANGO_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _TramoArchivo:
+    """
+    Vista de solo lectura sobre un rango de bytes de un archivo abierto.
+    Conserva fileno() para que el servidor WSGI pueda usar sendfile.
+    """
+
+    def __init__(self, archivo, inicio, longitud):
+        self.archivo = archivo
+        self.restante = longitud
+        archivo.seek(inicio)
+
+    def read(self, tamano=-1):
+        if self.restante <= 0:
+            return b''
+        if tamano is None or tamano < 0 or tamano > self.restante:
+            tamano = self.restante
+        datos = self.archivo.read(tamano)
+        self.restante -= len(datos)
+        return datos
+
+    def fileno(self):
+        return self.archivo.fileno()
+
+    def close(self):
+        self.archivo.close()
+
+
+def _rango(encabezado, tamano):
+    """Retorna (inicio, fin) de un Range de un solo tramo, None si no aplica o False si es insatisfacible"""
+    coincidencia = RANGO_RE.match(encabezado.strip())
+    if not coincidencia:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        inicio, fin = max(tamano - int(fin), 0), tamano - 1
+    else:
+        inicio = int(inicio)
+        fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio > fin or inicio >= tamano:
+        return False
+    return inicio, fin
+
+
+def _delegada(nombre_descarga, encabezado, valor):
+    """Respuesta vacía que el servidor web completa con el archivo"""
+    tipo = mimetypes.guess_type(nombre_descarga)[0] or 'application/octet-stream'
+    respuesta = HttpResponse(content_type=tipo)
+    respuesta[encabezado] = valor
+    respuesta['Content-Disposition'] = f"attachment; filename*=utf-8''{quote(nombre_descarga)}"
+    return respuesta
+
+
+def respuesta_adjunto(request, archivo, nombre_descarga):
+    """
+    Respuesta de descarga de un adjunto ya autorizado. Según
+    PQRS_CONFIG['ADJUNTOS_DESCARGA'] delega la transferencia al servidor web
+    (nginx: X-Accel-Redirect, apache: X-Sendfile) o la hace Django con
+    FileResponse (sendfile del servidor WSGI si está disponible), con
+    soporte de Range, If-Range, If-None-Match e If-Modified-Since.
+    """
+    config = settings.PQRS_CONFIG
+    modo = config.get('ADJUNTOS_DESCARGA', 'django')
+    ruta = archivo.storage.path(archivo.name)
+
+    if modo == 'nginx':
+        interna = config.get('ADJUNTOS_URL_INTERNA', '/protected-media/')
+        return _delegada(nombre_descarga, 'X-Accel-Redirect', interna + quote(archivo.name))
+    if modo == 'apache':
+        return _delegada(nombre_descarga, 'X-Sendfile', ruta)
+
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        raise Http404('El archivo adjunto no existe')
+
+    ultima_modificacion = http_date(estado.st_mtime)
+    encabezados = {
+        'Last-Modified': ultima_modificacion,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private',
+    }
+    etag = None
+    if archivo.name.startswith(PREFIJO_BLOBS):
+        # Los blobs son inmutables y su nombre es el digest del contenido
+        etag = f'"{os.path.splitext(os.path.basename(archivo.name))[0]}"'
+        encabezados['ETag'] = etag
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and etag:
+        no_modificado = if_none_match.strip() == '*' or etag in parse_etags(if_none_match)
+    else:
+        no_modificado = not was_modified_since(request.headers.get('If-Modified-Since'), estado.st_mtime)
+    if no_modificado:
+        respuesta = HttpResponseNotModified()
+        for clave, valor in encabezados.items():
+            respuesta[clave] = valor
+        return respuesta
+
+    rango = None
+    encabezado_rango = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if encabezado_rango and (not if_range or if_range.strip() in (etag, ultima_modificacion)):
+        rango = _rango(encabezado_rango, estado.st_size)
+        if rango is False:
+            respuesta = HttpResponse(status=416)
+            respuesta['Content-Range'] = f'bytes */{estado.st_size}'
+            return respuesta
+
+    if rango is None:
+        respuesta = FileResponse(open(ruta, 'rb'), as_attachment=True, filename=nombre_descarga)
+    else:
+        inicio, fin = rango
+        respuesta = FileResponse(
+            _TramoArchivo(open(ruta, 'rb'), inicio, fin - inicio + 1),
+            as_attachment=True,
+            filename=nombre_descarga,
+            status=206,
+        )
+        respuesta['Content-Length'] = str(fin - inicio + 1)
+        respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{estado.st_size}'
+
+    for clave, valor in encabezados.items():
+        respuesta[clave] = valor
+    return respuesta
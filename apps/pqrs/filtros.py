@@ -0,0 +1,108 @@
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from .models import PQRS
+
+
+# Campos por los que se puede ordenar el listado (?ordenar=campo o ?ordenar=-campo)
+ORDENAMIENTOS = [
+    'fecha_radicacion',
+    'fecha_limite_respuesta',
+    'numero_radicado',
+]
+ORDEN_POR_DEFECTO = '-fecha_radicacion'
+
+
+def _valores(params, nombre, opciones):
+    """Lee un filtro que admite varios valores separados por coma y los valida"""
+    valores = [valor for valor in params.get(nombre, '').split(',') if valor]
+    invalidos = [valor for valor in valores if valor not in dict(opciones)]
+    if invalidos:
+        raise ValidationError({nombre: f"Valores no permitidos: {', '.join(invalidos)}"})
+    return valores
+
+
+def _fecha(params, nombre, fin_de_dia=False):
+    """Lee una fecha (YYYY-MM-DD) o fecha-hora ISO 8601"""
+    valor = params.get(nombre)
+    if not valor:
+        return None
+
+    fecha_hora = parse_datetime(valor)
+    if fecha_hora is None:
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise ValidationError({nombre: 'Use el formato YYYY-MM-DD o ISO 8601'})
+        # ?..._hasta=YYYY-MM-DD incluye todo ese día
+        if fin_de_dia:
+            fecha += timedelta(days=1)
+        fecha_hora = datetime.combine(fecha, time.min)
+
+    if timezone.is_naive(fecha_hora):
+        fecha_hora = timezone.make_aware(fecha_hora)
+    return fecha_hora
+
+
+def _rango(queryset, params, campo, prefijo):
+    desde = _fecha(params, f'{prefijo}_desde')
+    hasta = _fecha(params, f'{prefijo}_hasta', fin_de_dia=True)
+    if desde:
+        queryset = queryset.filter(**{f'{campo}__gte': desde})
+    if hasta:
+        queryset = queryset.filter(**{f'{campo}__lt': hasta})
+    return queryset
+
+
+def filtrar_pqrs(queryset, params):
+    """
+    Aplica los filtros del listado. Las condiciones de igualdad van antes que
+    los rangos de fecha para coincidir con los índices compuestos del modelo.
+    """
+    estados = _valores(params, 'estado', PQRS.ESTADO_CHOICES)
+    if estados:
+        queryset = queryset.estado_vigente(estados)
+
+    tipos = _valores(params, 'tipo', PQRS.TIPO_CHOICES)
+    if tipos:
+        queryset = queryset.filter(tipo__in=tipos)
+
+    area = params.get('area_responsable')
+    if area:
+        queryset = queryset.filter(area_responsable=area)
+
+    responsable = params.get('responsable')
+    if responsable == 'ninguno':
+        queryset = queryset.filter(responsable__isnull=True)
+    elif responsable:
+        if not responsable.isdigit():
+            raise ValidationError({'responsable': 'Debe ser un id de usuario o "ninguno"'})
+        queryset = queryset.filter(responsable_id=int(responsable))
+
+    colores = _valores(params, 'color_semaforo', PQRS.COLOR_SEMAFORO_CHOICES)
+    if colores:
+        por_color = queryset.semaforo(colores[0])
+        for color in colores[1:]:
+            por_color = por_color | queryset.semaforo(color)
+        queryset = por_color
+
+    queryset = _rango(queryset, params, 'fecha_radicacion', 'fecha_radicacion')
+    queryset = _rango(queryset, params, 'fecha_limite_respuesta', 'fecha_limite')
+
+    return queryset
+
+
+def obtener_ordenamiento(params):
+    """Retorna el campo de orden pedido en ?ordenar=, validado contra ORDENAMIENTOS"""
+    orden = params.get('ordenar') or ORDEN_POR_DEFECTO
+    if orden.lstrip('-') not in ORDENAMIENTOS:
+        raise ValidationError({
+            'ordenar': f"Use uno de: {', '.join(ORDENAMIENTOS)} (con - para orden descendente)"
+        })
+    return orden
+
+
+def ordenar_pqrs(queryset, orden):
+    """Ordena por el campo pedido con id como desempate"""
+    desempate = '-id' if orden.startswith('-') else 'id'
+    return queryset.order_by(orden, desempate)
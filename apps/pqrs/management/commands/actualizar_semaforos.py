@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from apps.pqrs.tareas import recalcular_semaforos, recalcular_semaforos_con_lock
+
+
+class Command(BaseCommand):
+    help = 'Recalcula días restantes, semáforo y vencimientos de todas las PQRS abiertas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sin-lock',
+            action='store_true',
+            help='Ejecuta el barrido sin tomar el lock distribuido en Redis',
+        )
+
+    def handle(self, *args, **options):
+        if options['sin_lock']:
+            resultado = recalcular_semaforos()
+        else:
+            resultado = recalcular_semaforos_con_lock()
+
+        if resultado is None:
+            self.stdout.write(self.style.WARNING(
+                'Otro nodo está ejecutando el barrido de semáforos. No se hizo nada.'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Semáforos actualizados: {resultado['vencidas']} vencidas, "
+            f"{resultado['rojo']} rojo, {resultado['amarillo']} amarillo, "
+            f"{resultado['verde']} verde"
+        ))
@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from apps.pqrs import radicados
+from apps.pqrs.models import ConsecutivoRadicado
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide cuántos radicados por segundo se asignan con N trabajadores concurrentes. '
+        'Cada hilo reserva sus bloques como un proceso distinto. Escribe en la tabla de '
+        'consecutivos bajo una fecha de prueba y la borra al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Trabajadores concurrentes')
+        parser.add_argument('--cantidad', type=int, default=1000, help='Radicados que asigna cada trabajador')
+        parser.add_argument(
+            '--bloque',
+            type=int,
+            default=None,
+            help='Consecutivos reservados por viaje a la BD (por defecto RADICADO_BLOQUE; 1 = sin bloques)',
+        )
+        parser.add_argument(
+            '--fecha',
+            type=date.fromisoformat,
+            default=date(1900, 1, 1),
+            help='Día del consecutivo que se usa para la prueba (AAAA-MM-DD, no debe tener radicados reales)',
+        )
+
+    def handle(self, *args, **options):
+        hilos = options['hilos']
+        cantidad = options['cantidad']
+        bloque = options['bloque'] or settings.PQRS_CONFIG.get('RADICADO_BLOQUE', 1)
+        fecha = options['fecha']
+        if hilos < 1 or cantidad < 1 or bloque < 1:
+            raise CommandError('--hilos, --cantidad y --bloque deben ser mayores que cero')
+
+        consecutivos = ConsecutivoRadicado.objects.using(radicados.DB_RADICADOS).filter(fecha=fecha)
+        if consecutivos.exists():
+            raise CommandError(f'Ya hay consecutivos del {fecha}; use otra --fecha')
+
+        errores = []
+        barrera = threading.Barrier(hilos + 1)
+
+        def trabajador():
+            try:
+                barrera.wait()
+                # Bloque propio del hilo, como lo tendría cada proceso de la aplicación
+                siguiente, limite = 1, 0
+                for _ in range(cantidad):
+                    if siguiente > limite:
+                        limite = radicados._reservar_bloque(fecha, bloque)
+                        siguiente = limite - bloque + 1
+                    siguiente += 1
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connections.close_all()
+
+        trabajadores = [threading.Thread(target=trabajador) for _ in range(hilos)]
+        for hilo in trabajadores:
+            hilo.start()
+        barrera.wait()
+        inicio = time.perf_counter()
+        for hilo in trabajadores:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        total = hilos * cantidad
+        try:
+            if errores:
+                raise CommandError(f'{len(errores)} trabajadores fallaron: {errores[0]!r}')
+            reservados = consecutivos.values_list('ultimo', flat=True).get()
+            # Cada hilo reserva bloques completos: el consecutivo debe cubrir exactamente lo pedido
+            esperados = hilos * -(-cantidad // bloque) * bloque
+            if reservados != esperados:
+                raise CommandError(f'Se reservaron {reservados} consecutivos y se esperaban {esperados}')
+        finally:
+            consecutivos.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} radicados en {duracion:.2f} s: {total / duracion:.0f} radicados/s '
+            f'({hilos} hilos, bloque de {bloque})'
+        ))
@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.pqrs.almacenamiento import recolectar_blobs
+from apps.pqrs.subidas import limpiar_subidas
+
+
+class Command(BaseCommand):
+    help = 'Borra los blobs de adjuntos que ninguna PQRS referencia, las subidas abandonadas y los temporales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gracia-horas',
+            type=int,
+            default=None,
+            help='Horas sin referencias antes de borrar un blob (por defecto ADJUNTOS_GRACIA_HORAS)',
+        )
+
+    def handle(self, *args, **options):
+        horas = options['gracia_horas']
+        if horas is None:
+            horas = settings.PQRS_CONFIG.get('ADJUNTOS_GRACIA_HORAS', 24)
+        gracia = timedelta(hours=horas)
+
+        # Primero las subidas: las finalizadas que se borran dejan su blob sin referencias
+        subidas = limpiar_subidas(timezone.now() - gracia)
+        total = recolectar_blobs(gracia)
+        self.stdout.write(self.style.SUCCESS(
+            f'{subidas} subidas abandonadas y {total} blobs de adjuntos borrados'
+        ))
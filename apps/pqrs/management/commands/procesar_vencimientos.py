@@ -0,0 +1,44 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.pqrs.vencimientos import (
+    procesar_vencimientos,
+    reconstruir_programacion,
+    segundos_hasta_proxima,
+)
+
+
+class Command(BaseCommand):
+    help = 'Aplica las transiciones de semáforo y vencimiento en el momento exacto en que ocurren'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reconstruir',
+            action='store_true',
+            help='Vuelve a programar todas las PQRS abiertas antes de iniciar',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa las transiciones pendientes y termina',
+        )
+
+    def handle(self, *args, **options):
+        config = settings.PQRS_CONFIG
+        lote = config.get('VENCIMIENTOS_LOTE', 500)
+        espera_maxima = config.get('VENCIMIENTOS_ESPERA_MAXIMA', 60)
+
+        if options['reconstruir']:
+            total = reconstruir_programacion()
+            self.stdout.write(self.style.SUCCESS(f'{total} PQRS abiertas programadas'))
+
+        while True:
+            procesadas = procesar_vencimientos(limite=lote)
+            while procesadas == lote:
+                procesadas = procesar_vencimientos(limite=lote)
+
+            if options['una_vez']:
+                return
+
+            # Dormir solo hasta la próxima transición programada
+            time.sleep(segundos_hasta_proxima(espera_maxima))
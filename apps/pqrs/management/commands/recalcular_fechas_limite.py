@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from apps.pqrs.cache import invalidar_consulta
+from apps.pqrs.models import PQRS
+from apps.pqrs.semaforo import ESTADOS_ABIERTOS
+from apps.pqrs.sla import calcular_fechas_limite_lote, invalidar_calendario
+from apps.pqrs.tareas import recalcular_semaforos
+from apps.pqrs.vencimientos import reconstruir_programacion
+
+
+class Command(BaseCommand):
+    help = 'Recalcula en días hábiles la fecha límite de todas las PQRS abiertas (p. ej. tras cargar festivos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=5000,
+            help='Cantidad de PQRS que se calculan y actualizan por lote',
+        )
+
+    def handle(self, *args, **options):
+        tamano_lote = options['lote']
+        invalidar_calendario()
+
+        abiertas = PQRS.objects.filter(estado__in=ESTADOS_ABIERTOS).values_list(
+            'id', 'numero_radicado', 'fecha_radicacion', 'tipo'
+        ).order_by()
+
+        total = 0
+        lote = []
+        for fila in abiertas.iterator(chunk_size=tamano_lote):
+            lote.append(fila)
+            if len(lote) == tamano_lote:
+                total += self._actualizar(lote)
+                lote = []
+        if lote:
+            total += self._actualizar(lote)
+
+        resultado = recalcular_semaforos()
+        # Las transiciones programadas en Redis se calcularon con las fechas anteriores
+        programadas = reconstruir_programacion(tamano_lote)
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} fechas límite recalculadas. Semáforos: {resultado}. "
+            f"Transiciones reprogramadas: {programadas}"
+        ))
+
+    def _actualizar(self, lote):
+        fechas = calcular_fechas_limite_lote([(fecha, tipo) for _, _, fecha, tipo in lote])
+        PQRS.objects.bulk_update(
+            [
+                PQRS(id=pqrs_id, fecha_limite_respuesta=fecha_limite)
+                for (pqrs_id, _, _, _), fecha_limite in zip(lote, fechas)
+            ],
+            ['fecha_limite_respuesta'],
+            batch_size=1000,
+        )
+        # La consulta pública cacheada muestra la fecha límite
+        invalidar_consulta(*[radicado for _, radicado, _, _ in lote])
+        return len(lote)
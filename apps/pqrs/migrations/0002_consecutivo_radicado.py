@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsecutivoRadicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha')),
+                ('ultimo', models.PositiveIntegerField(default=0, verbose_name='Último Consecutivo Reservado')),
+            ],
+            options={
+                'verbose_name': 'Consecutivo de Radicado',
+                'verbose_name_plural': 'Consecutivos de Radicado',
+            },
+        ),
+        migrations.AlterField(
+            model_name='pqrs',
+            name='numero_radicado',
+            field=models.CharField(editable=False, max_length=20, unique=True, verbose_name='Número de Radicado'),
+        ),
+    ]
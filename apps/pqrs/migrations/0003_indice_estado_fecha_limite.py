@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0002_consecutivo_radicado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pqrs',
+            index=models.Index(fields=['estado', 'fecha_limite_respuesta'], name='pqrs_pqrs_estado_3b9163_idx'),
+        ),
+    ]
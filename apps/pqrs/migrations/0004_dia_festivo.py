@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0003_indice_estado_fecha_limite'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaFestivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha')),
+                ('descripcion', models.CharField(blank=True, max_length=100, verbose_name='Descripción')),
+            ],
+            options={
+                'verbose_name': 'Día Festivo',
+                'verbose_name_plural': 'Días Festivos',
+                'ordering': ['fecha'],
+            },
+        ),
+    ]
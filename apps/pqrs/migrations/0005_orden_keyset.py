@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0004_dia_festivo'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='pqrs',
+            options={'ordering': ['-fecha_radicacion', '-id'], 'verbose_name': 'PQRS', 'verbose_name_plural': 'PQRS'},
+        ),
+        migrations.AddIndex(
+            model_name='pqrs',
+            index=models.Index(fields=['fecha_radicacion', 'id'], name='pqrs_pqrs_fecha_r_d95676_idx'),
+        ),
+    ]
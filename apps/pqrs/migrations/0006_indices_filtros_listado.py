@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0005_orden_keyset'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pqrs',
+            index=models.Index(fields=['area_responsable', 'estado', 'fecha_radicacion'], name='pqrs_pqrs_area_re_d67576_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pqrs',
+            index=models.Index(fields=['tipo', 'estado', 'fecha_radicacion'], name='pqrs_pqrs_tipo_53e330_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pqrs',
+            index=models.Index(fields=['responsable', 'estado', 'fecha_radicacion'], name='pqrs_pqrs_respons_8a045a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pqrs',
+            index=models.Index(fields=['area_responsable', 'estado', 'fecha_limite_respuesta'], name='pqrs_pqrs_area_re_3d1744_idx'),
+        ),
+    ]
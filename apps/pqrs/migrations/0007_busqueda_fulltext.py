@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0006_indices_filtros_listado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pqrs',
+            index=models.Index(fields=['correo_electronico'], name='pqrs_pqrs_correo__c9097e_idx'),
+        ),
+        # Índices FULLTEXT (MySQL) usados por apps.pqrs.busqueda.MatchAgainst
+        migrations.RunSQL(
+            sql='CREATE FULLTEXT INDEX pqrs_pqrs_ft_asunto_descripcion ON pqrs_pqrs (asunto, descripcion)',
+            reverse_sql='DROP INDEX pqrs_pqrs_ft_asunto_descripcion ON pqrs_pqrs',
+        ),
+        migrations.RunSQL(
+            sql='CREATE FULLTEXT INDEX pqrs_respuestapqrs_ft_respuesta ON pqrs_respuestapqrs (respuesta)',
+            reverse_sql='DROP INDEX pqrs_respuestapqrs_ft_respuesta ON pqrs_respuestapqrs',
+        ),
+    ]
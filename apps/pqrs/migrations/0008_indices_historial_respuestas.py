@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0007_busqueda_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historialpqrs',
+            index=models.Index(fields=['pqrs', 'fecha_cambio'], name='pqrs_histor_pqrs_id_29eeae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='respuestapqrs',
+            index=models.Index(fields=['pqrs', 'fecha_respuesta'], name='pqrs_respue_pqrs_id_28ae1a_idx'),
+        ),
+    ]
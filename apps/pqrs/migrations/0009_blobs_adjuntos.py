@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:04
+
+import apps.pqrs.almacenamiento
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0008_indices_historial_respuestas'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pqrs',
+            name='archivo_adjunto',
+            field=models.FileField(blank=True, null=True, storage=apps.pqrs.almacenamiento.obtener_almacenamiento_adjuntos, upload_to='pqrs_attachments/%Y/%m/', verbose_name='Archivo Adjunto'),
+        ),
+        migrations.CreateModel(
+            name='BlobAdjunto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('archivo', models.CharField(max_length=100, unique=True, verbose_name='Ruta en el Storage')),
+                ('tamano', models.PositiveIntegerField(verbose_name='Tamaño (bytes)')),
+                ('referencias', models.PositiveIntegerField(default=0, verbose_name='PQRS que lo Usan')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_actualizacion', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Último Cambio de Referencias')),
+            ],
+            options={
+                'verbose_name': 'Blob de Adjunto',
+                'verbose_name_plural': 'Blobs de Adjuntos',
+                'indexes': [models.Index(fields=['referencias', 'fecha_actualizacion'], name='pqrs_blobad_referen_da8332_idx')],
+            },
+        ),
+    ]
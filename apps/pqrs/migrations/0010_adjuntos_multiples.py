@@ -0,0 +1,67 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:07
+
+import apps.pqrs.almacenamiento
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0009_blobs_adjuntos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaAdjunto',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=255, verbose_name='Nombre del Archivo')),
+                ('tamano', models.PositiveIntegerField(verbose_name='Tamaño (bytes)')),
+                ('tamano_chunk', models.PositiveIntegerField(verbose_name='Tamaño de cada Parte (bytes)')),
+                ('estado', models.CharField(choices=[('abierta', 'Abierta'), ('finalizada', 'Finalizada')], default='abierta', max_length=20, verbose_name='Estado')),
+                ('archivo', models.CharField(blank=True, max_length=100, verbose_name='Blob del Archivo')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+            ],
+            options={
+                'verbose_name': 'Subida de Adjunto',
+                'verbose_name_plural': 'Subidas de Adjuntos',
+                'indexes': [models.Index(fields=['fecha_creacion'], name='pqrs_subida_fecha_c_1495c0_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PQRSAdjunto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.FileField(storage=apps.pqrs.almacenamiento.obtener_almacenamiento_adjuntos, upload_to='pqrs_attachments/%Y/%m/', verbose_name='Archivo')),
+                ('nombre_original', models.CharField(max_length=255, verbose_name='Nombre Original')),
+                ('tamano', models.PositiveIntegerField(verbose_name='Tamaño (bytes)')),
+                ('fecha_subida', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Subida')),
+                ('pqrs', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adjuntos', to='pqrs.pqrs', verbose_name='PQRS')),
+            ],
+            options={
+                'verbose_name': 'Adjunto',
+                'verbose_name_plural': 'Adjuntos',
+                'ordering': ['fecha_subida', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChunkSubida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indice', models.PositiveIntegerField(verbose_name='Índice')),
+                ('tamano', models.PositiveIntegerField(verbose_name='Tamaño (bytes)')),
+                ('subida', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='pqrs.subidaadjunto', verbose_name='Subida')),
+            ],
+            options={
+                'verbose_name': 'Parte de Subida',
+                'verbose_name_plural': 'Partes de Subida',
+                'ordering': ['indice'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='chunksubida',
+            constraint=models.UniqueConstraint(fields=('subida', 'indice'), name='chunk_subida_unico'),
+        ),
+    ]
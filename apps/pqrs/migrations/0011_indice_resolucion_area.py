@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0010_adjuntos_multiples'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pqrs',
+            index=models.Index(fields=['area_responsable', 'fecha_radicacion', 'estado', 'tipo', 'fecha_cierre'], name='pqrs_pqrs_area_re_2e8711_idx'),
+        ),
+    ]
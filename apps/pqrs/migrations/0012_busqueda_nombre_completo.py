@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0011_indice_resolucion_area'),
+    ]
+
+    operations = [
+        # Índice FULLTEXT (MySQL) para buscar por el nombre del ciudadano
+        migrations.RunSQL(
+            sql='CREATE FULLTEXT INDEX pqrs_pqrs_ft_nombre_completo ON pqrs_pqrs (nombre_completo)',
+            reverse_sql='DROP INDEX pqrs_pqrs_ft_nombre_completo ON pqrs_pqrs',
+        ),
+    ]
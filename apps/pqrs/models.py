@@ -1,16 +1,248 @@
+import uuid
 from django.db import models
+from django.db.models import Case, F, Prefetch, Q, Value, When
 from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
-import random
-import string
+from apps.dashboard.resumen import CAMPOS_RESUMEN, fila_resumen, registrar_cambios, restar_grupos
+from .almacenamiento import liberar_blobs, obtener_almacenamiento_adjuntos, referenciar_blobs
+from .bandeja import notificar_cambio
+from .radicados import asignar_radicado
+from .semaforo import (
+    ESTADOS_ABIERTOS,
+    ESTADOS_CERRADOS,
+    DiasHasta,
+    color_para_dias,
+    limites_de_bandas,
+)
+from . import sla
+from .vencimientos import programar_vencimiento
 
 
 def generar_radicado():
-    """Genera un número de radicado único en formato: PQRS-YYYYMMDD-XXXX"""
-    fecha = timezone.now().strftime('%Y%m%d')
-    codigo = ''.join(random.choices(string.digits, k=4))
-    return f"PQRS-{fecha}-{codigo}"
+    """Genera un número de radicado único en formato: PQRS-YYYYMMDD-XXXXXX"""
+    return asignar_radicado()
+
+
+class ConsecutivoRadicado(models.Model):
+    """Consecutivo diario usado para asignar números de radicado sin colisiones"""
+    
+    fecha = models.DateField(
+        unique=True,
+        verbose_name='Fecha'
+    )
+    ultimo = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Último Consecutivo Reservado'
+    )
+    
+    class Meta:
+        verbose_name = 'Consecutivo de Radicado'
+        verbose_name_plural = 'Consecutivos de Radicado'
+    
+    def __str__(self):
+        return f"{self.fecha:%Y%m%d} - {self.ultimo}"
+
+
+class DiaFestivo(models.Model):
+    """Días festivos nacionales que no cuentan como días hábiles"""
+    
+    fecha = models.DateField(
+        unique=True,
+        verbose_name='Fecha'
+    )
+    descripcion = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Descripción'
+    )
+    
+    class Meta:
+        ordering = ['fecha']
+        verbose_name = 'Día Festivo'
+        verbose_name_plural = 'Días Festivos'
+    
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y} - {self.descripcion}"
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        sla.invalidar_calendario()
+    
+    def delete(self, *args, **kwargs):
+        resultado = super().delete(*args, **kwargs)
+        sla.invalidar_calendario()
+        return resultado
+
+
+class BlobAdjunto(models.Model):
+    """Archivo adjunto guardado una sola vez por contenido (SHA-256) con conteo de referencias"""
+    
+    sha256 = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='SHA-256'
+    )
+    archivo = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Ruta en el Storage'
+    )
+    tamano = models.PositiveIntegerField(
+        verbose_name='Tamaño (bytes)'
+    )
+    referencias = models.PositiveIntegerField(
+        default=0,
+        verbose_name='PQRS que lo Usan'
+    )
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de Creación'
+    )
+    fecha_actualizacion = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Último Cambio de Referencias'
+    )
+    
+    class Meta:
+        verbose_name = 'Blob de Adjunto'
+        verbose_name_plural = 'Blobs de Adjuntos'
+        indexes = [
+            models.Index(fields=['referencias', 'fecha_actualizacion']),
+        ]
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.referencias} referencias)"
+
+
+class PQRSQuerySet(models.QuerySet):
+    """QuerySet de PQRS con el semáforo calculado al momento de la consulta"""
+    
+    def with_semaforo(self, ahora=None):
+        """
+        Anota dias_restantes_actual, color_semaforo_actual y estado_actual
+        calculados en SQL a partir de fecha_limite_respuesta y PQRS_CONFIG.
+        """
+        ahora = ahora or timezone.now()
+        limite_rojo, limite_amarillo = limites_de_bandas(ahora)
+        cerrada = Q(estado__in=ESTADOS_CERRADOS)
+        
+        return self.annotate(
+            dias_restantes_actual=Case(
+                When(cerrada, then=F('dias_restantes')),
+                default=DiasHasta('fecha_limite_respuesta', ahora),
+            ),
+            color_semaforo_actual=Case(
+                When(cerrada, then=Value('verde')),
+                When(fecha_limite_respuesta__lt=limite_rojo, then=Value('rojo')),
+                When(fecha_limite_respuesta__lt=limite_amarillo, then=Value('amarillo')),
+                default=Value('verde'),
+            ),
+            estado_actual=Case(
+                When(~cerrada & Q(fecha_limite_respuesta__lt=ahora), then=Value('vencido')),
+                default=F('estado'),
+            ),
+        )
+    
+    def semaforo(self, color, ahora=None):
+        """
+        Filtra por color vigente del semáforo con rangos sobre
+        (estado, fecha_limite_respuesta), para que use el índice compuesto.
+        """
+        ahora = ahora or timezone.now()
+        limite_rojo, limite_amarillo = limites_de_bandas(ahora)
+        
+        if color == 'rojo':
+            return self.filter(
+                estado__in=ESTADOS_ABIERTOS,
+                fecha_limite_respuesta__lt=limite_rojo
+            )
+        if color == 'amarillo':
+            return self.filter(
+                estado__in=ESTADOS_ABIERTOS,
+                fecha_limite_respuesta__gte=limite_rojo,
+                fecha_limite_respuesta__lt=limite_amarillo
+            )
+        if color == 'verde':
+            return self.filter(
+                Q(estado__in=ESTADOS_CERRADOS) |
+                Q(estado__in=ESTADOS_ABIERTOS, fecha_limite_respuesta__gte=limite_amarillo)
+            )
+        return self.none()
+    
+    def estado_vigente(self, estados, ahora=None):
+        """
+        Filtra por el estado que muestra el listado (estado_actual de with_semaforo):
+        una PQRS abierta con la fecha límite pasada cuenta como vencida aunque el
+        barrido no la haya marcado. Usa rangos sobre (estado, fecha_limite_respuesta).
+        """
+        ahora = ahora or timezone.now()
+        condicion = Q()
+        for estado in estados:
+            if estado == 'vencido':
+                condicion |= Q(estado='vencido') | Q(
+                    estado__in=ESTADOS_ABIERTOS,
+                    fecha_limite_respuesta__lt=ahora
+                )
+            elif estado in ESTADOS_ABIERTOS:
+                condicion |= Q(estado=estado, fecha_limite_respuesta__gte=ahora)
+            else:
+                condicion |= Q(estado=estado)
+        return self.filter(condicion)
+    
+    def para_listado(self):
+        """
+        Solo las columnas que usa PQRSListSerializer, con el responsable en el
+        mismo JOIN: evita traer descripcion y hacer una consulta por fila.
+        """
+        return self.select_related('responsable').only(
+            'id',
+            'numero_radicado',
+            'tipo',
+            'asunto',
+            'nombre_completo',
+            'estado',
+            'fecha_radicacion',
+            'fecha_limite_respuesta',
+            'dias_restantes',
+            'color_semaforo',
+            'area_responsable',
+            'responsable__first_name',
+            'responsable__last_name',
+        )
+    
+    def con_detalle(self):
+        """
+        Precarga historial, respuestas (con su usuario) y adjuntos para los serializers
+        de detalle: número constante de consultas sin importar el largo del historial.
+        """
+        return self.select_related('responsable').prefetch_related(
+            Prefetch(
+                'historial',
+                queryset=HistorialPQRS.objects.select_related('usuario')
+            ),
+            Prefetch(
+                'respuestas',
+                queryset=RespuestaPQRS.objects.select_related('usuario')
+            ),
+            'adjuntos',
+        )
+    
+    def delete(self):
+        """Borra las PQRS y libera la referencia a sus adjuntos"""
+        adjuntos = list(self.exclude(archivo_adjunto='').values_list('archivo_adjunto', flat=True))
+        adjuntos += PQRSAdjunto.objects.filter(pqrs__in=self.values('pk')).values_list('archivo', flat=True)
+        restar_grupos(self)
+        resultado = super().delete()
+        liberar_blobs(adjuntos)
+        return resultado
+    
+    def vencidas(self, ahora=None):
+        """PQRS abiertas cuya fecha límite ya pasó, aunque el barrido no las haya marcado"""
+        ahora = ahora or timezone.now()
+        return self.filter(
+            estado__in=ESTADOS_ABIERTOS,
+            fecha_limite_respuesta__lt=ahora
+        )
 
 
 class PQRS(models.Model):
@@ -41,7 +273,6 @@ class PQRS(models.Model):
     numero_radicado = models.CharField(
         max_length=20, 
         unique=True, 
-        default=generar_radicado,
         editable=False,
         verbose_name='Número de Radicado'
     )
@@ -107,6 +338,7 @@ class PQRS(models.Model):
     # Archivos adjuntos
     archivo_adjunto = models.FileField(
         upload_to='pqrs_attachments/%Y/%m/', 
+        storage=obtener_almacenamiento_adjuntos,
         null=True, 
         blank=True,
         verbose_name='Archivo Adjunto'
@@ -137,55 +369,103 @@ class PQRS(models.Model):
         verbose_name='Actualizado el'
     )
     
+    objects = PQRSQuerySet.as_manager()
+    
     class Meta:
-        ordering = ['-fecha_radicacion']
+        ordering = ['-fecha_radicacion', '-id']
         verbose_name = 'PQRS'
         verbose_name_plural = 'PQRS'
         indexes = [
             models.Index(fields=['numero_radicado']),
+            models.Index(fields=['correo_electronico']),
             models.Index(fields=['estado', 'fecha_radicacion']),
             models.Index(fields=['color_semaforo']),
+            models.Index(fields=['estado', 'fecha_limite_respuesta']),
+            models.Index(fields=['fecha_radicacion', 'id']),
+            # Combinaciones de filtros del listado (/api/pqrs/)
+            models.Index(fields=['area_responsable', 'estado', 'fecha_radicacion']),
+            models.Index(fields=['tipo', 'estado', 'fecha_radicacion']),
+            models.Index(fields=['responsable', 'estado', 'fecha_radicacion']),
+            models.Index(fields=['area_responsable', 'estado', 'fecha_limite_respuesta']),
+            # Histograma de tiempos de resolución del dashboard filtrado por área y fechas
+            models.Index(fields=['area_responsable', 'fecha_radicacion', 'estado', 'tipo', 'fecha_cierre']),
         ]
     
     def __str__(self):
         return f"{self.numero_radicado} - {self.get_tipo_display()}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Adjunto leído de la base, para mantener las referencias de BlobAdjunto
+        if 'archivo_adjunto' in instancia.__dict__:
+            instancia._adjunto_guardado = instancia.__dict__['archivo_adjunto'] or ''
+        # Fila del resumen diario con que cuenta hoy, para aplicar solo la diferencia al guardar
+        if all(campo in instancia.__dict__ for campo in CAMPOS_RESUMEN):
+            instancia._resumen_guardado = fila_resumen(instancia)
+        return instancia
+    
     def save(self, *args, **kwargs):
         """Override save para calcular fecha límite y actualizar semáforo"""
+        anterior = None if self._state.adding else self._fila_resumen_guardada()
         if not self.pk:  # Solo al crear
+            if not self.numero_radicado:
+                self.numero_radicado = generar_radicado()
             self.calcular_fecha_limite()
         self.actualizar_semaforo()
         super().save(*args, **kwargs)
+        self._sincronizar_adjunto()
+        self._resumen_guardado = fila_resumen(self)
+        registrar_cambios([(anterior, self._resumen_guardado)])
+        notificar_cambio(self, anterior, self._resumen_guardado)
+        programar_vencimiento(self)
+    
+    def delete(self, *args, **kwargs):
+        adjuntos = [self.archivo_adjunto.name, *self.adjuntos.values_list('archivo', flat=True)]
+        anterior = self._fila_resumen_guardada()
+        resultado = super().delete(*args, **kwargs)
+        liberar_blobs(adjuntos)
+        registrar_cambios([(anterior, None)])
+        return resultado
+    
+    def _fila_resumen_guardada(self):
+        """Fila del resumen diario de la PQRS tal como está en la base"""
+        if hasattr(self, '_resumen_guardado'):
+            return self._resumen_guardado
+        guardada = PQRS.objects.filter(pk=self.pk).only(*CAMPOS_RESUMEN).first()
+        return guardada._resumen_guardado if guardada else None
+    
+    def _sincronizar_adjunto(self):
+        """Actualiza las referencias de los blobs si cambió el adjunto"""
+        if 'archivo_adjunto' not in self.__dict__:
+            return
+        anterior = getattr(self, '_adjunto_guardado', '')
+        actual = self.archivo_adjunto.name or ''
+        if actual != anterior:
+            referenciar_blobs([actual])
+            liberar_blobs([anterior])
+            self._adjunto_guardado = actual
     
     def calcular_fecha_limite(self):
-        """Calcula la fecha límite según el tipo de PQRS"""
-        dias_por_tipo = {
-            'peticion': 15,
-            'queja': 15,
-            'reclamo': 15,
-            'sugerencia': 30,
-        }
-        dias = dias_por_tipo.get(self.tipo, 15)
-        self.fecha_limite_respuesta = timezone.now() + timedelta(days=dias)
+        """Calcula la fecha límite en días hábiles según el tipo de PQRS (PQRS_CONFIG)"""
+        self.fecha_limite_respuesta = sla.calcular_fecha_limite(
+            self.fecha_radicacion or timezone.now(),
+            self.tipo
+        )
     
     def actualizar_semaforo(self):
         """Actualiza el color del semáforo según días restantes"""
-        if self.estado in ['resuelto', 'cerrado']:
+        if self.estado in ESTADOS_CERRADOS:
             self.color_semaforo = 'verde'
             return
         
         ahora = timezone.now()
         diferencia = (self.fecha_limite_respuesta - ahora).days
         self.dias_restantes = diferencia
+        self.color_semaforo = color_para_dias(diferencia)
         
-        if diferencia < 0:
-            self.color_semaforo = 'rojo'
-            if self.estado != 'vencido':
-                self.estado = 'vencido'
-        elif diferencia <= 3:
-            self.color_semaforo = 'amarillo'
-        else:
-            self.color_semaforo = 'verde'
+        if diferencia < 0 and self.estado != 'vencido':
+            self.estado = 'vencido'
     
     @property
     def esta_vencida(self):
@@ -229,6 +509,9 @@ class HistorialPQRS(models.Model):
         ordering = ['-fecha_cambio']
         verbose_name = 'Historial'
         verbose_name_plural = 'Historiales'
+        indexes = [
+            models.Index(fields=['pqrs', 'fecha_cambio']),
+        ]
     
     def __str__(self):
         return f"{self.pqrs.numero_radicado} - {self.estado_nuevo}"
@@ -265,7 +548,138 @@ class RespuestaPQRS(models.Model):
         ordering = ['-fecha_respuesta']
         verbose_name = 'Respuesta'
         verbose_name_plural = 'Respuestas'
+        indexes = [
+            models.Index(fields=['pqrs', 'fecha_respuesta']),
+        ]
     
     def __str__(self):
         return f"Respuesta a {self.pqrs.numero_radicado}"
-    
\ No newline at end of file
+    
+
+class PQRSAdjunto(models.Model):
+    """Archivos adjuntos de una PQRS (varios por caso, guardados como blobs)"""
+    
+    pqrs = models.ForeignKey(
+        PQRS,
+        on_delete=models.CASCADE,
+        related_name='adjuntos',
+        verbose_name='PQRS'
+    )
+    archivo = models.FileField(
+        upload_to='pqrs_attachments/%Y/%m/',
+        storage=obtener_almacenamiento_adjuntos,
+        verbose_name='Archivo'
+    )
+    nombre_original = models.CharField(
+        max_length=255,
+        verbose_name='Nombre Original'
+    )
+    tamano = models.PositiveIntegerField(
+        verbose_name='Tamaño (bytes)'
+    )
+    fecha_subida = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de Subida'
+    )
+    
+    class Meta:
+        ordering = ['fecha_subida', 'id']
+        verbose_name = 'Adjunto'
+        verbose_name_plural = 'Adjuntos'
+    
+    def __str__(self):
+        return f"{self.pqrs.numero_radicado} - {self.nombre_original}"
+    
+    def save(self, *args, **kwargs):
+        nuevo = self._state.adding
+        super().save(*args, **kwargs)
+        if nuevo:
+            referenciar_blobs([self.archivo.name])
+    
+    def delete(self, *args, **kwargs):
+        archivo = self.archivo.name
+        resultado = super().delete(*args, **kwargs)
+        liberar_blobs([archivo])
+        return resultado
+
+
+class SubidaAdjunto(models.Model):
+    """Subida por partes (reanudable) de un adjunto, antes de asociarlo a una PQRS"""
+    
+    ESTADO_CHOICES = [
+        ('abierta', 'Abierta'),
+        ('finalizada', 'Finalizada'),
+    ]
+    
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    nombre = models.CharField(
+        max_length=255,
+        verbose_name='Nombre del Archivo'
+    )
+    tamano = models.PositiveIntegerField(
+        verbose_name='Tamaño (bytes)'
+    )
+    tamano_chunk = models.PositiveIntegerField(
+        verbose_name='Tamaño de cada Parte (bytes)'
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='abierta',
+        verbose_name='Estado'
+    )
+    archivo = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Blob del Archivo'
+    )
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de Creación'
+    )
+    
+    class Meta:
+        verbose_name = 'Subida de Adjunto'
+        verbose_name_plural = 'Subidas de Adjuntos'
+        indexes = [
+            models.Index(fields=['fecha_creacion']),
+        ]
+    
+    def __str__(self):
+        return f"{self.nombre} ({self.get_estado_display()})"
+    
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.tamano // self.tamano_chunk))
+
+
+class ChunkSubida(models.Model):
+    """Parte ya recibida de una subida de adjunto"""
+    
+    subida = models.ForeignKey(
+        SubidaAdjunto,
+        on_delete=models.CASCADE,
+        related_name='chunks',
+        verbose_name='Subida'
+    )
+    indice = models.PositiveIntegerField(
+        verbose_name='Índice'
+    )
+    tamano = models.PositiveIntegerField(
+        verbose_name='Tamaño (bytes)'
+    )
+    
+    class Meta:
+        ordering = ['indice']
+        verbose_name = 'Parte de Subida'
+        verbose_name_plural = 'Partes de Subida'
+        constraints = [
+            models.UniqueConstraint(fields=['subida', 'indice'], name='chunk_subida_unico'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subida_id} - {self.indice}"
@@ -0,0 +1,157 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimar_total(queryset):
+    """
+    Total aproximado de filas según las estadísticas de MySQL (EXPLAIN),
+    sin recorrer la tabla. Retorna None si el motor no lo soporta.
+    """
+    if connection.vendor != 'mysql':
+        return None
+
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}', params)
+        columnas = [col[0] for col in cursor.description]
+        plan = cursor.fetchone()
+
+    if not plan:
+        return None
+    fila = dict(zip(columnas, plan))
+    return int((fila.get('rows') or 0) * float(fila.get('filtered') or 100) / 100)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (campo de orden, id): cada página
+    filtra a partir de la última fila vista en lugar de usar OFFSET, y no
+    ejecuta COUNT(*) salvo que se pida con ?conteo=exacto.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    conteo_query_param = 'conteo'
+    ordering = '-fecha_radicacion'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, view):
+        """Campo de orden principal; la vista puede definir otro con get_ordenamiento()"""
+        if hasattr(view, 'get_ordenamiento'):
+            return view.get_ordenamiento()
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.campo = self.get_ordering(view)
+        self.descendente = self.campo.startswith('-')
+        self.nombre_campo = self.campo.lstrip('-')
+        self.modelo_campo = queryset.model._meta.get_field(self.nombre_campo)
+
+        self.conteo = request.query_params.get(self.conteo_query_param)
+        self.total = None
+        if self.conteo == 'exacto':
+            self.total = queryset.count()
+        elif self.conteo == 'estimado':
+            self.total = estimar_total(queryset)
+
+        cursor = self.decode_cursor(request)
+        atras = bool(cursor and cursor['r'])
+
+        # Al ir hacia atrás se recorre en orden inverso y luego se invierte la página
+        descendente = self.descendente != atras
+        prefijo = '-' if descendente else ''
+        queryset = queryset.order_by(f'{prefijo}{self.nombre_campo}', f'{prefijo}id')
+
+        if cursor:
+            operador = 'lt' if descendente else 'gt'
+            try:
+                valor = self.modelo_campo.to_python(cursor['v'])
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if valor is None:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(
+                Q(**{f'{self.nombre_campo}__{operador}': valor}) |
+                Q(**{self.nombre_campo: valor, f'id__{operador}': cursor['id']})
+            )
+
+        resultados = list(queryset[:self.page_size + 1])
+        hay_mas = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        if atras:
+            resultados.reverse()
+
+        # hay_mas indica si quedan filas en la dirección recorrida
+        self.siguiente = self.anterior = None
+        if resultados:
+            if hay_mas or atras:
+                self.siguiente = self._cursor_de(resultados[-1], atras=False)
+            if (hay_mas and atras) or (cursor and not atras):
+                self.anterior = self._cursor_de(resultados[0], atras=True)
+
+        return resultados
+
+    def _cursor_de(self, instancia, atras):
+        valor = getattr(instancia, self.nombre_campo)
+        if isinstance(valor, datetime):
+            valor = valor.isoformat()
+        return {'v': valor, 'id': instancia.pk, 'r': atras}
+
+    def encode_cursor(self, cursor):
+        if cursor is None:
+            return None
+        token = urlsafe_b64encode(json.dumps(cursor, default=str).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(token.encode()))
+            if not isinstance(cursor['v'], str):
+                raise ValueError('El valor del cursor debe ser texto')
+            return {'v': cursor['v'], 'id': int(cursor['id']), 'r': bool(cursor.get('r'))}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        return self.encode_cursor(self.siguiente)
+
+    def get_previous_link(self):
+        return self.encode_cursor(self.anterior)
+
+    def get_paginated_response(self, data):
+        respuesta = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.conteo == 'exacto':
+            respuesta['count'] = self.total
+
+        headers = {}
+        if self.conteo == 'estimado' and self.total is not None:
+            headers['X-Total-Count-Estimate'] = str(self.total)
+        return Response(respuesta, headers=headers)
@@ -0,0 +1,82 @@
+import os
+import threading
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+# Alias de la conexión con la que se reservan los bloques (ver DATABASES en settings)
+DB_RADICADOS = 'radicados'
+
+# Bloque de consecutivos reservado por este proceso (se comparte entre hilos)
+_lock = threading.Lock()
+_bloque = {
+    'fecha': None,
+    'siguiente': 1,
+    'limite': 0,
+}
+
+
+def _descartar_bloque():
+    """Evita que un proceso hijo reutilice el bloque reservado por su padre"""
+    _bloque.update(fecha=None, siguiente=1, limite=0)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_descartar_bloque)
+
+
+def _tamano_bloque():
+    """Cantidad de consecutivos que reserva cada proceso por cada viaje a la BD"""
+    return max(1, int(settings.PQRS_CONFIG.get('RADICADO_BLOQUE', 1)))
+
+
+def _reservar_bloque(fecha, tamano):
+    """
+    Incrementa atómicamente el consecutivo del día en `tamano` y retorna
+    el último número reservado. Usa la conexión DB_RADICADOS, fuera de la
+    transacción de quien llama: la reserva se confirma al instante (un
+    rollback posterior no la deshace) y la fila del día queda bloqueada
+    solo durante este UPDATE.
+    """
+    from .models import ConsecutivoRadicado
+
+    consecutivos = ConsecutivoRadicado.objects.using(DB_RADICADOS).filter(fecha=fecha)
+
+    with transaction.atomic(using=DB_RADICADOS):
+        if not consecutivos.update(ultimo=F('ultimo') + tamano):
+            try:
+                # Primer radicado del día
+                with transaction.atomic(using=DB_RADICADOS):
+                    consecutivos.create(fecha=fecha, ultimo=tamano)
+                return tamano
+            except IntegrityError:
+                # Otro proceso creó la fila del día al mismo tiempo
+                consecutivos.update(ultimo=F('ultimo') + tamano)
+        return consecutivos.values_list('ultimo', flat=True).get()
+
+
+def siguiente_consecutivo(fecha=None):
+    """Retorna el siguiente consecutivo libre del día, reservando bloques según sea necesario"""
+    fecha = fecha or timezone.localdate()
+
+    with _lock:
+        if _bloque['fecha'] != fecha or _bloque['siguiente'] > _bloque['limite']:
+            tamano = _tamano_bloque()
+            limite = _reservar_bloque(fecha, tamano)
+            _bloque['fecha'] = fecha
+            _bloque['siguiente'] = limite - tamano + 1
+            _bloque['limite'] = limite
+
+        consecutivo = _bloque['siguiente']
+        _bloque['siguiente'] += 1
+
+    return consecutivo
+
+
+def asignar_radicado(fecha=None):
+    """Genera un número de radicado único en formato: PQRS-YYYYMMDD-XXXXXX"""
+    fecha = fecha or timezone.localdate()
+    consecutivo = siguiente_consecutivo(fecha)
+    return f"PQRS-{fecha.strftime('%Y%m%d')}-{consecutivo:06d}"
@@ -0,0 +1,7 @@
+from django.urls import path
+from .consumers import BandejaConsumer
+
+
+websocket_urlpatterns = [
+    path('ws/bandeja/', BandejaConsumer.as_asgi()),
+]
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import DateTimeField, Func, IntegerField, Value
+
+
+ESTADOS_ABIERTOS = ['pendiente', 'en_tramite', 'vencido']
+ESTADOS_CERRADOS = ['resuelto', 'cerrado']
+
+
+def umbrales():
+    """Retorna los umbrales (amarilla, roja) en días definidos en PQRS_CONFIG"""
+    config = settings.PQRS_CONFIG
+    return config.get('DIAS_ALERTA_AMARILLA', 3), config.get('DIAS_ALERTA_ROJA', 0)
+
+
+def color_para_dias(dias):
+    """Color del semáforo que corresponde a una cantidad de días restantes"""
+    amarilla, roja = umbrales()
+    if dias < roja:
+        return 'rojo'
+    if dias <= amarilla:
+        return 'amarillo'
+    return 'verde'
+
+
+def limites_de_bandas(ahora):
+    """
+    Retorna las fechas límite que separan las bandas del semáforo:
+    rojo < limite_rojo <= amarillo < limite_amarillo <= verde
+    """
+    amarilla, roja = umbrales()
+    return ahora + timedelta(days=roja), ahora + timedelta(days=amarilla + 1)
+
+
+class DiasEntre(Func):
+    """Días completos de `inicio` a `fin`, redondeados igual que timedelta.days"""
+
+    template = 'FLOOR(TIMESTAMPDIFF(SECOND, %(expressions)s) / 86400)'
+    output_field = IntegerField()
+
+    def __init__(self, inicio, fin, **extra):
+        super().__init__(inicio, fin, **extra)
+
+
+class DiasHasta(DiasEntre):
+    """Días completos entre `ahora` y una fecha, redondeados igual que timedelta.days"""
+
+    def __init__(self, fecha, ahora, **extra):
+        super().__init__(Value(ahora, output_field=DateTimeField()), fecha, **extra)
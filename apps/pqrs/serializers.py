@@ -1,6 +1,9 @@
 from rest_framework import serializers
-from .models import PQRS, HistorialPQRS, RespuestaPQRS
-import os
+from rest_framework.reverse import reverse
+from django.conf import settings
+from .models import PQRS, HistorialPQRS, RespuestaPQRS, PQRSAdjunto, SubidaAdjunto
+from .adjuntos import AdjuntoAlmacenado, validar_adjunto
+from .subidas import adjuntar_subidas, offsets_faltantes
 
 
 class HistorialSerializer(serializers.ModelSerializer):
@@ -42,9 +45,63 @@ class RespuestaSerializer(serializers.ModelSerializer):
         ]
 
 
+class PQRSAdjuntoSerializer(serializers.ModelSerializer):
+    """Serializer para los adjuntos de una PQRS"""
+    
+    url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = PQRSAdjunto
+        fields = [
+            'id',
+            'nombre_original',
+            'tamano',
+            'fecha_subida',
+            'url',
+        ]
+    
+    def get_url(self, obj):
+        """URL de descarga autorizada del adjunto"""
+        url = reverse('pqrs-descargar-adjunto', kwargs={'pk': obj.pqrs_id, 'adjunto_id': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class SubidaAdjuntoSerializer(serializers.ModelSerializer):
+    """Serializer para las subidas por partes de adjuntos"""
+    
+    total_chunks = serializers.IntegerField(read_only=True)
+    faltantes = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = SubidaAdjunto
+        fields = [
+            'id',
+            'nombre',
+            'tamano',
+            'tamano_chunk',
+            'total_chunks',
+            'estado',
+            'faltantes',
+        ]
+        read_only_fields = ['tamano_chunk', 'estado']
+    
+    def get_faltantes(self, obj):
+        """Offsets de las partes que faltan por enviar"""
+        if obj.estado != 'abierta':
+            return []
+        return offsets_faltantes(obj)
+
+
 class PQRSCreateSerializer(serializers.ModelSerializer):
     """Serializer para crear PQRS (público)"""
     
+    subidas = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        write_only=True
+    )
+    
     class Meta:
         model = PQRS
         fields = [
@@ -55,27 +112,40 @@ class PQRSCreateSerializer(serializers.ModelSerializer):
             'correo_electronico',
             'telefono',
             'archivo_adjunto',
+            'subidas',
         ]
     
+    def validate_subidas(self, value):
+        """Las subidas deben existir y estar finalizadas"""
+        maximo = settings.PQRS_CONFIG.get('ADJUNTOS_MAXIMOS', 5)
+        ids = set(value)
+        if len(ids) > maximo:
+            raise serializers.ValidationError(f"Se permiten máximo {maximo} adjuntos")
+        subidas = list(SubidaAdjunto.objects.filter(pk__in=ids, estado='finalizada'))
+        if len(subidas) != len(ids):
+            raise serializers.ValidationError("Hay subidas inexistentes o sin finalizar")
+        return subidas
+    
+    def validate(self, attrs):
+        """El adjunto directo cuenta dentro del máximo de adjuntos"""
+        maximo = settings.PQRS_CONFIG.get('ADJUNTOS_MAXIMOS', 5)
+        if len(attrs.get('subidas', [])) + bool(attrs.get('archivo_adjunto')) > maximo:
+            raise serializers.ValidationError({'subidas': f"Se permiten máximo {maximo} adjuntos"})
+        return attrs
+    
+    def create(self, validated_data):
+        subidas = validated_data.pop('subidas', [])
+        pqrs = super().create(validated_data)
+        adjuntar_subidas(pqrs, subidas)
+        return pqrs
+    
     def validate_archivo_adjunto(self, value):
-        """Valida tamaño y tipo de archivo"""
+        """Valida tamaño, tipo y contenido del archivo"""
+        if isinstance(value, AdjuntoAlmacenado):
+            # Ya validado y escrito en su ubicación final por AdjuntoPQRSUploadHandler
+            return value.ruta
         if value:
-            # Validar tamaño (máx 10MB)
-            if value.size > 10 * 1024 * 1024:
-                raise serializers.ValidationError(
-                    "El archivo no debe superar 10MB"
-                )
-            
-            # Validar extensión
-            extensiones_permitidas = [
-                '.pdf', '.jpg', '.jpeg', '.png', 
-                '.doc', '.docx', '.txt'
-            ]
-            ext = os.path.splitext(value.name)[1].lower()
-            if ext not in extensiones_permitidas:
-                raise serializers.ValidationError(
-                    f"Formato no permitido. Use: {', '.join(extensiones_permitidas)}"
-                )
+            validar_adjunto(value)
         return value
 
 
@@ -114,6 +184,16 @@ class PQRSListSerializer(serializers.ModelSerializer):
             'responsable_nombre',
             'area_responsable',
         ]
+    
+    def to_representation(self, instance):
+        """Usa los valores vigentes anotados por PQRS.objects.with_semaforo() si existen"""
+        data = super().to_representation(instance)
+        if hasattr(instance, 'estado_actual'):
+            data['estado'] = instance.estado_actual
+            data['estado_display'] = dict(PQRS.ESTADO_CHOICES)[instance.estado_actual]
+            data['dias_restantes'] = instance.dias_restantes_actual
+            data['color_semaforo'] = instance.color_semaforo_actual
+        return data
 
 
 class PQRSDetailSerializer(serializers.ModelSerializer):
@@ -133,11 +213,22 @@ class PQRSDetailSerializer(serializers.ModelSerializer):
     )
     historial = HistorialSerializer(many=True, read_only=True)
     respuestas = RespuestaSerializer(many=True, read_only=True)
+    adjuntos = PQRSAdjuntoSerializer(many=True, read_only=True)
     esta_vencida = serializers.BooleanField(read_only=True)
+    url_adjunto = serializers.SerializerMethodField()
     
     class Meta:
         model = PQRS
-        fields = '__all__'
+        # La ruta del blob en el storage no se publica: el adjunto se descarga por url_adjunto
+        exclude = ['archivo_adjunto']
+    
+    def get_url_adjunto(self, obj):
+        """URL de descarga autorizada del adjunto (MEDIA_URL no se publica)"""
+        if not obj.archivo_adjunto:
+            return None
+        url = reverse('pqrs-adjunto', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
 
 class PQRSConsultaPublicaSerializer(serializers.ModelSerializer):
@@ -0,0 +1,131 @@
+import threading
+import time
+from datetime import date, datetime
+from django.conf import settings
+from django.utils import timezone
+
+
+class CalendarioHabil:
+    """
+    Calendario de días hábiles precalculado. Guarda el acumulado de días
+    hábiles por fecha y la lista ordenada de días hábiles, de modo que sumar
+    días hábiles es una búsqueda en lista en O(1).
+    """
+
+    def __init__(self, desde, hasta, festivos=(), dias_no_habiles=(5, 6)):
+        self.desde = desde
+        self.hasta = hasta
+        self._inicio = desde.toordinal()
+        total_dias = (hasta - desde).days + 1
+        festivos = {festivo.toordinal() for festivo in festivos}
+        dias_no_habiles = set(dias_no_habiles)
+
+        # _acumulado[i] = días hábiles en [desde, desde + i)
+        self._acumulado = [0] * (total_dias + 1)
+        # _habiles[k] = ordinal del k-ésimo día hábil del calendario
+        self._habiles = []
+
+        cuenta = 0
+        for i in range(total_dias):
+            ordinal = self._inicio + i
+            self._acumulado[i] = cuenta
+            if ordinal not in festivos and date.fromordinal(ordinal).weekday() not in dias_no_habiles:
+                self._habiles.append(ordinal)
+                cuenta += 1
+        self._acumulado[total_dias] = cuenta
+
+    def _indice(self, fecha):
+        indice = fecha.toordinal() - self._inicio
+        if not 0 <= indice < len(self._acumulado) - 1:
+            raise ValueError(
+                f"La fecha {fecha} está fuera del calendario hábil ({self.desde} a {self.hasta})"
+            )
+        return indice
+
+    def sumar_dias_habiles(self, fecha, dias):
+        """Retorna el día hábil número `dias` contado a partir del día siguiente a `fecha`"""
+        if dias <= 0:
+            return fecha
+        posicion = self._acumulado[self._indice(fecha) + 1] + dias - 1
+        if posicion >= len(self._habiles):
+            raise ValueError(
+                f"Sumar {dias} días hábiles a {fecha} excede el calendario hábil (hasta {self.hasta})"
+            )
+        return date.fromordinal(self._habiles[posicion])
+
+
+_lock = threading.Lock()
+_calendario = {
+    'instancia': None,
+    'construido': 0,
+}
+
+
+def _construir_calendario():
+    """Construye el calendario a partir de la tabla de festivos y PQRS_CONFIG"""
+    from .models import DiaFestivo
+
+    config = settings.PQRS_CONFIG
+    hoy = timezone.localdate()
+    desde = date(hoy.year - config.get('CALENDARIO_ANOS_ATRAS', 10), 1, 1)
+    hasta = date(hoy.year + config.get('CALENDARIO_ANOS_ADELANTE', 2), 12, 31)
+    festivos = DiaFestivo.objects.filter(
+        fecha__range=(desde, hasta)
+    ).values_list('fecha', flat=True)
+
+    return CalendarioHabil(
+        desde,
+        hasta,
+        festivos=festivos,
+        dias_no_habiles=config.get('DIAS_NO_HABILES', (5, 6)),
+    )
+
+
+def obtener_calendario():
+    """Retorna el calendario del proceso, reconstruyéndolo cuando vence su vigencia"""
+    vigencia = settings.PQRS_CONFIG.get('CALENDARIO_VIGENCIA_SEGUNDOS', 3600)
+    with _lock:
+        if _calendario['instancia'] is None or time.monotonic() - _calendario['construido'] > vigencia:
+            _calendario['instancia'] = _construir_calendario()
+            _calendario['construido'] = time.monotonic()
+        return _calendario['instancia']
+
+
+def invalidar_calendario():
+    """Descarta el calendario de este proceso para que se reconstruya en el próximo uso"""
+    with _lock:
+        _calendario['instancia'] = None
+
+
+def dias_respuesta(tipo):
+    """Días hábiles de respuesta definidos en PQRS_CONFIG para el tipo de PQRS"""
+    return settings.PQRS_CONFIG['DIAS_RESPUESTA'].get(tipo, 15)
+
+
+def _combinar(fecha, hora_local):
+    return timezone.make_aware(datetime.combine(fecha, hora_local))
+
+
+def calcular_fecha_limite(fecha_radicacion, tipo):
+    """Fecha límite de respuesta: mismos días hábiles del tipo contados desde la radicación"""
+    local = timezone.localtime(fecha_radicacion)
+    fecha = obtener_calendario().sumar_dias_habiles(local.date(), dias_respuesta(tipo))
+    return _combinar(fecha, local.time())
+
+
+def calcular_fechas_limite_lote(radicaciones):
+    """
+    calcular_fecha_limite para una lista de (fecha_radicacion, tipo). Las PQRS
+    radicadas el mismo día con el mismo plazo comparten la fecha hábil, así que
+    el calendario se consulta una vez por cada (día, días de respuesta) distinto.
+    """
+    calendario = obtener_calendario()
+    fechas = {}
+    resultado = []
+    for fecha_radicacion, tipo in radicaciones:
+        local = timezone.localtime(fecha_radicacion)
+        clave = (local.date(), dias_respuesta(tipo))
+        if clave not in fechas:
+            fechas[clave] = calendario.sumar_dias_habiles(*clave)
+        resultado.append(_combinar(fechas[clave], local.time()))
+    return resultado
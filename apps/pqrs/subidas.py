@@ -0,0 +1,166 @@
+import hashlib
+import os
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+from .adjuntos import TAMANO_CABECERA, validar_contenido, validar_extension, validar_tamano
+from .almacenamiento import DIRECTORIO_TEMPORAL, almacenamiento_adjuntos, liberar_blobs, referenciar_blobs
+from .models import ChunkSubida, PQRSAdjunto, SubidaAdjunto
+
+
+class SubidaFinalizada(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'La subida ya fue finalizada'
+    default_code = 'subida_finalizada'
+
+
+def tamano_chunk():
+    return settings.PQRS_CONFIG.get('ADJUNTOS_TAMANO_CHUNK', 1024 * 1024)
+
+
+def _staging(subida):
+    """Archivo donde se ensamblan las partes: ya tiene el tamaño final y cada parte se escribe en su offset"""
+    return almacenamiento_adjuntos.path(f'{DIRECTORIO_TEMPORAL}/subida-{subida.pk.hex}')
+
+
+def iniciar_subida(nombre, tamano):
+    """Crea la subida por partes y reserva su archivo de staging"""
+    validar_extension(nombre)
+    validar_tamano(tamano)
+    if tamano <= 0:
+        raise ValidationError({'tamano': 'El archivo está vacío'})
+
+    subida = SubidaAdjunto.objects.create(nombre=nombre, tamano=tamano, tamano_chunk=tamano_chunk())
+    ruta = _staging(subida)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'wb') as archivo:
+        archivo.truncate(tamano)
+    return subida
+
+
+def offsets_faltantes(subida):
+    """Offsets de las partes que aún no se han recibido"""
+    recibidos = set(subida.chunks.values_list('indice', flat=True))
+    return [
+        indice * subida.tamano_chunk
+        for indice in range(subida.total_chunks)
+        if indice not in recibidos
+    ]
+
+
+def guardar_chunk(subida_id, offset, datos):
+    """
+    Escribe una parte en su posición del archivo de staging (pwrite) y la
+    registra. Reenviar una parte ya recibida la sobrescribe sin efecto.
+    Bloquea la subida para no escribir mientras se finaliza o se limpia.
+    """
+    with transaction.atomic():
+        subida = SubidaAdjunto.objects.select_for_update().filter(pk=subida_id).first()
+        if subida is None:
+            raise NotFound('La subida no existe')
+        if subida.estado != 'abierta':
+            raise SubidaFinalizada()
+        if offset % subida.tamano_chunk or offset >= subida.tamano:
+            raise ValidationError({'offset': f'Debe ser múltiplo de {subida.tamano_chunk} y menor que {subida.tamano}'})
+
+        esperado = min(subida.tamano_chunk, subida.tamano - offset)
+        if len(datos) != esperado:
+            raise ValidationError({'detail': f'La parte en el offset {offset} debe tener {esperado} bytes'})
+        if offset == 0:
+            try:
+                validar_contenido(validar_extension(subida.nombre), datos[:TAMANO_CABECERA])
+            except ValidationError as error:
+                raise ValidationError({'archivo': error.detail})
+
+        fd = os.open(_staging(subida), os.O_WRONLY)
+        try:
+            os.pwrite(fd, datos, offset)
+        finally:
+            os.close(fd)
+
+        ChunkSubida.objects.bulk_create(
+            [ChunkSubida(subida=subida, indice=offset // subida.tamano_chunk, tamano=len(datos))],
+            ignore_conflicts=True,
+        )
+    return subida
+
+
+def finalizar_subida(subida_id):
+    """
+    Verifica que estén todas las partes y mueve el archivo ensamblado al
+    storage de blobs (rename, sin copiarlo). Solo se relee para calcular el
+    SHA-256 que lo deduplica. La subida finalizada cuenta como una referencia
+    del blob, así limpiar_adjuntos no lo borra antes de crear la PQRS.
+    """
+    with transaction.atomic():
+        subida = SubidaAdjunto.objects.select_for_update().get(pk=subida_id)
+        if subida.estado == 'finalizada':
+            return subida
+
+        faltantes = offsets_faltantes(subida)
+        if faltantes:
+            raise ValidationError({'faltantes': faltantes})
+
+        ruta = _staging(subida)
+        digest = hashlib.sha256()
+        with open(ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+                digest.update(bloque)
+
+        subida.archivo = almacenamiento_adjuntos.consolidar(
+            digest.hexdigest(),
+            os.path.splitext(subida.nombre)[1],
+            subida.tamano,
+            temporal=f'{DIRECTORIO_TEMPORAL}/subida-{subida.pk.hex}',
+        )
+        subida.estado = 'finalizada'
+        subida.save(update_fields=['archivo', 'estado'])
+        referenciar_blobs([subida.archivo])
+    return subida
+
+
+def adjuntar_subidas(pqrs, subidas):
+    """
+    Asocia a la PQRS los archivos de subidas finalizadas y descarta las
+    subidas: la referencia de cada blob pasa de la subida al adjunto.
+    """
+    ids = [subida.pk for subida in subidas]
+    bloqueadas = list(SubidaAdjunto.objects.select_for_update().filter(pk__in=ids, estado='finalizada'))
+    if len(bloqueadas) != len(ids):
+        # limpiar_subidas la borró después de validar la petición
+        raise ValidationError({'subidas': 'Hay subidas inexistentes o sin finalizar'})
+
+    for subida in bloqueadas:
+        PQRSAdjunto.objects.create(
+            pqrs=pqrs,
+            archivo=subida.archivo,
+            nombre_original=subida.nombre,
+            tamano=subida.tamano,
+        )
+    SubidaAdjunto.objects.filter(pk__in=ids).delete()
+    liberar_blobs([subida.archivo for subida in bloqueadas])
+
+
+def limpiar_subidas(limite):
+    """
+    Borra las subidas creadas antes de `limite` que nunca se asociaron a una
+    PQRS, con su staging o la referencia a su blob. Retorna cuántas borró.
+    """
+    with transaction.atomic():
+        vencidas = list(
+            SubidaAdjunto.objects.select_for_update(skip_locked=True).filter(fecha_creacion__lt=limite)
+        )
+        SubidaAdjunto.objects.filter(pk__in=[subida.pk for subida in vencidas]).delete()
+        liberar_blobs([subida.archivo for subida in vencidas if subida.estado == 'finalizada'])
+        abiertas = [subida for subida in vencidas if subida.estado == 'abierta']
+        transaction.on_commit(lambda: _borrar_staging(abiertas))
+    return len(vencidas)
+
+
+def _borrar_staging(subidas):
+    for subida in subidas:
+        try:
+            os.remove(_staging(subida))
+        except FileNotFoundError:
+            pass
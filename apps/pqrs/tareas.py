@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from redis.exceptions import LockError
+from apps.dashboard.resumen import mover_grupos
+from apps.notifications.utils import registrar_pqrs_vencidas
+from .bandeja import COLORES_ALERTA, notificar_alertas
+from .cache import invalidar_consulta
+from .models import PQRS, HistorialPQRS
+from .semaforo import ESTADOS_ABIERTOS, DiasHasta, limites_de_bandas
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_SEMAFOROS = 'pqrs:lock:semaforos'
+
+
+def recalcular_semaforos(ahora=None):
+    """
+    Actualiza días restantes, color y vencimientos de todas las PQRS abiertas
+    con un UPDATE por banda de fecha límite, sin cargar modelos en memoria.
+    """
+    ahora = ahora or timezone.now()
+    limite_rojo, limite_amarillo = limites_de_bandas(ahora)
+    abiertas = PQRS.objects.filter(estado__in=ESTADOS_ABIERTOS)
+    dias = DiasHasta('fecha_limite_respuesta', ahora)
+
+    with transaction.atomic():
+        # PQRS que superaron la fecha límite desde el último barrido
+        por_vencer = list(
+            abiertas.filter(fecha_limite_respuesta__lt=ahora)
+            .exclude(estado='vencido')
+            .select_for_update()
+            .values_list('id', 'estado', 'numero_radicado')
+        )
+        if por_vencer:
+            ids_por_vencer = PQRS.objects.filter(id__in=[pqrs_id for pqrs_id, _, _ in por_vencer])
+            mover_grupos(ids_por_vencer, estado='vencido')
+            ids_por_vencer.update(estado='vencido')
+            invalidar_consulta(*[radicado for _, _, radicado in por_vencer])
+            HistorialPQRS.objects.bulk_create([
+                HistorialPQRS(
+                    pqrs_id=pqrs_id,
+                    estado_anterior=estado_anterior,
+                    estado_nuevo='vencido',
+                    observacion='PQRS vencida automáticamente por superar la fecha límite',
+                    usuario=None
+                )
+                for pqrs_id, estado_anterior, _ in por_vencer
+            ], batch_size=1000)
+            registrar_pqrs_vencidas([pqrs_id for pqrs_id, _, _ in por_vencer])
+
+        bandas = {
+            'rojo': abiertas.filter(fecha_limite_respuesta__lt=limite_rojo),
+            'amarillo': abiertas.filter(
+                fecha_limite_respuesta__gte=limite_rojo,
+                fecha_limite_respuesta__lt=limite_amarillo
+            ),
+            'verde': abiertas.filter(fecha_limite_respuesta__gte=limite_amarillo),
+        }
+        actualizadas = {}
+        alertas = []
+        for color, banda in bandas.items():
+            # El resumen diario solo se mueve por las PQRS que cambian de color
+            cambian = banda.exclude(color_semaforo=color)
+            if color in COLORES_ALERTA:
+                alertas += cambian.values_list('id', flat=True).iterator(chunk_size=2000)
+            mover_grupos(cambian, color_semaforo=color)
+            actualizadas[color] = banda.update(color_semaforo=color, dias_restantes=dias)
+        notificar_alertas(alertas)
+
+    return {
+        'vencidas': len(por_vencer),
+        **actualizadas,
+    }
+
+
+def recalcular_semaforos_con_lock():
+    """
+    Ejecuta el barrido solo si ningún otro nodo lo está ejecutando.
+    Retorna None si el lock está tomado.
+    """
+    lock = cache.lock(
+        LOCK_SEMAFOROS,
+        timeout=settings.PQRS_CONFIG.get('LOCK_SEMAFORO_SEGUNDOS', 600),
+    )
+    if not lock.acquire(blocking=False):
+        return None
+
+    try:
+        return recalcular_semaforos()
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # El lock expiró mientras se ejecutaba el barrido
+            logger.warning('El lock del barrido de semáforos expiró antes de liberarse')
+
+
+async def _ciclo_semaforos(intervalo):
+    """Ejecuta el barrido de semáforos cada `intervalo` segundos"""
+    while True:
+        try:
+            resultado = await sync_to_async(
+                recalcular_semaforos_con_lock, thread_sensitive=False
+            )()
+            if resultado is not None:
+                logger.info('Barrido de semáforos: %s', resultado)
+        except Exception:
+            logger.exception('Error en el barrido de semáforos')
+        await asyncio.sleep(intervalo)
+
+
+class TareasPeriodicasApp:
+    """Aplicación ASGI (protocolo lifespan) que lanza las tareas periódicas en segundo plano"""
+
+    async def __call__(self, scope, receive, send):
+        tareas = []
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                intervalo = settings.PQRS_CONFIG.get('INTERVALO_SEMAFORO_SEGUNDOS', 0)
+                if intervalo:
+                    tareas.append(asyncio.create_task(_ciclo_semaforos(intervalo)))
+                await send({'type': 'lifespan.startup.complete'})
+
+            elif message['type'] == 'lifespan.shutdown':
+                for tarea in tareas:
+                    tarea.cancel()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -1,3 +1,915 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from base64 import urlsafe_b64encode
+from datetime import date, datetime, timedelta
+from functools import partial
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from . import radicados
+from .adjuntos import AdjuntoPQRSUploadHandler
+from .almacenamiento import almacenamiento_adjuntos, recolectar_blobs
+from .bandeja import notificar_alertas
+from apps.users.models import User
+from .busqueda import buscar_pqrs
+from .filtros import filtrar_pqrs
+from .models import PQRS, BlobAdjunto, ConsecutivoRadicado, HistorialPQRS, RespuestaPQRS, SubidaAdjunto
+from .serializers import PQRSCreateSerializer
+from .sla import CalendarioHabil, calcular_fecha_limite, calcular_fechas_limite_lote
+from .subidas import adjuntar_subidas, limpiar_subidas
+from .tareas import recalcular_semaforos
+from .vencimientos import ZSET_VENCIMIENTOS, procesar_vencimientos
 
-# Create your tests here.
+
+class RadicadosConcurrentesTests(TransactionTestCase):
+    """Asignación de radicados desde varios hilos y procesos simulados"""
+
+    databases = {'default', 'radicados'}
+
+    def setUp(self):
+        radicados._descartar_bloque()
+
+    def tearDown(self):
+        radicados._descartar_bloque()
+
+    def _en_hilos(self, cantidad_hilos, funcion):
+        """Ejecuta `funcion` en varios hilos a la vez y retorna todos sus resultados"""
+        resultados = []
+        errores = []
+        barrera = threading.Barrier(cantidad_hilos)
+
+        def trabajador():
+            try:
+                barrera.wait()
+                resultados.extend(funcion())
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=trabajador) for _ in range(cantidad_hilos)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        return resultados
+
+    def test_hilos_no_repiten_radicados(self):
+        fecha = date(2026, 10, 18)
+        numeros = self._en_hilos(8, lambda: [radicados.asignar_radicado(fecha) for _ in range(250)])
+
+        self.assertEqual(len(numeros), 2000)
+        self.assertEqual(len(set(numeros)), 2000)
+
+    def test_bloques_de_procesos_distintos_no_se_solapan(self):
+        # Cada hilo reserva como lo haría un proceso distinto, sin compartir el bloque en memoria
+        fecha = date(2026, 10, 18)
+        limites = self._en_hilos(8, lambda: [radicados._reservar_bloque(fecha, 20) for _ in range(25)])
+
+        consecutivos = [n for limite in limites for n in range(limite - 19, limite + 1)]
+        self.assertEqual(len(consecutivos), 8 * 25 * 20)
+        self.assertEqual(len(set(consecutivos)), len(consecutivos))
+        self.assertEqual(ConsecutivoRadicado.objects.get(fecha=fecha).ultimo, 8 * 25 * 20)
+
+    def test_rollback_de_quien_llama_no_libera_el_bloque(self):
+        fecha = date(2026, 10, 18)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                primero = radicados.asignar_radicado(fecha)
+                raise RuntimeError('rollback de la petición')
+
+        # La reserva se confirmó en su propia conexión: otro proceso no recibe el mismo rango
+        self.assertTrue(ConsecutivoRadicado.objects.filter(fecha=fecha).exists())
+        radicados._descartar_bloque()
+        self.assertNotEqual(radicados.asignar_radicado(fecha), primero)
+
+    def test_benchmark(self):
+        salida = io.StringIO()
+        call_command('benchmark_radicados', hilos=4, cantidad=50, bloque=10, stdout=salida)
+
+        self.assertIn('200 radicados en', salida.getvalue())
+        self.assertIn('radicados/s (4 hilos, bloque de 10)', salida.getvalue())
+        # La fecha de prueba no deja consecutivos
+        self.assertFalse(ConsecutivoRadicado.objects.filter(fecha=date(1900, 1, 1)).exists())
+
+
+class RedisFalso:
+    """Sorted sets en memoria con la parte de la API de redis-py que usa vencimientos.py"""
+
+    def __init__(self):
+        self.zsets = {}
+
+    def zadd(self, clave, miembros):
+        self.zsets.setdefault(clave, {}).update({
+            miembro if isinstance(miembro, bytes) else str(miembro).encode(): float(score)
+            for miembro, score in miembros.items()
+        })
+        return len(miembros)
+
+    def zrem(self, clave, miembro):
+        if not isinstance(miembro, bytes):
+            miembro = str(miembro).encode()
+        return int(self.zsets.get(clave, {}).pop(miembro, None) is not None)
+
+    def zrangebyscore(self, clave, minimo, maximo, start=0, num=None, withscores=False):
+        maximo = float('inf') if maximo == '+inf' else float(maximo)
+        miembros = sorted(
+            ((miembro, score) for miembro, score in self.zsets.get(clave, {}).items() if score <= maximo),
+            key=lambda item: item[1]
+        )[start:None if num is None else start + num]
+        return miembros if withscores else [miembro for miembro, _ in miembros]
+
+    def pipeline(self, transaction=False):
+        return PipelineFalso(self)
+
+
+class PipelineFalso:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.comandos = []
+
+    def __getattr__(self, nombre):
+        return lambda *args, **kwargs: self.comandos.append((nombre, args, kwargs))
+
+    def execute(self):
+        resultados = [getattr(self.redis, nombre)(*args, **kwargs) for nombre, args, kwargs in self.comandos]
+        self.comandos = []
+        return resultados
+
+
+class ClienteWebSocket:
+    """
+    Cliente WebSocket sobre el protocolo ASGI para probar core.asgi.application
+    (channels.testing importa daphne, que no es dependencia del proyecto).
+    """
+
+    def __init__(self, ruta, headers=()):
+        from core.asgi import application
+
+        path, _, query = ruta.partition('?')
+        self.comunicador = ApplicationCommunicator(application, {
+            'type': 'websocket',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'headers': list(headers),
+            'subprotocols': [],
+        })
+
+    async def conectar(self):
+        """Retorna (aceptada, código de cierre)"""
+        await self.comunicador.send_input({'type': 'websocket.connect'})
+        respuesta = await self.comunicador.receive_output(1)
+        return respuesta['type'] == 'websocket.accept', respuesta.get('code')
+
+    async def recibir_json(self):
+        respuesta = await self.comunicador.receive_output(1)
+        return json.loads(respuesta['text'])
+
+    async def sin_mensajes(self):
+        return await self.comunicador.receive_nothing()
+
+    async def desconectar(self):
+        await self.comunicador.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await self.comunicador.wait(1)
+
+
+_consecutivo_pruebas = iter(range(1, 10 ** 6))
+
+
+def crear_pqrs(**campos):
+    """Crea una PQRS de prueba con radicado fijo (sin pasar por la reserva de consecutivos)"""
+    valores = {
+        'numero_radicado': f'PQRS-20261018-{next(_consecutivo_pruebas):06d}',
+        'tipo': 'peticion',
+        'asunto': 'Solicitud de información',
+        'descripcion': 'Descripción de prueba',
+        'nombre_completo': 'Ana Pérez',
+        'correo_electronico': 'ana@example.com',
+    }
+    valores.update(campos)
+    pqrs = PQRS(**valores)
+    pqrs.save()
+    return pqrs
+
+
+class ProcesarVencimientosTests(TestCase):
+
+    def setUp(self):
+        self.redis = RedisFalso()
+        parche = mock.patch('apps.pqrs.vencimientos.get_redis_connection', return_value=self.redis)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_vence_y_reprograma(self):
+        pqrs = crear_pqrs()
+        PQRS.objects.filter(pk=pqrs.pk).update(fecha_limite_respuesta=timezone.now() - timedelta(hours=1))
+        self.redis.zadd(ZSET_VENCIMIENTOS, {pqrs.pk: time.time() - 60})
+
+        self.assertEqual(procesar_vencimientos(), 1)
+
+        pqrs.refresh_from_db()
+        self.assertEqual((pqrs.estado, pqrs.color_semaforo), ('vencido', 'rojo'))
+        self.assertTrue(HistorialPQRS.objects.filter(pqrs=pqrs, estado_nuevo='vencido').exists())
+        # Vencida no tiene más transiciones: sale del sorted set
+        self.assertEqual(self.redis.zsets[ZSET_VENCIMIENTOS], {})
+
+    def test_fallo_devuelve_los_reclamados(self):
+        pqrs = crear_pqrs()
+        score = time.time() - 60
+        self.redis.zadd(ZSET_VENCIMIENTOS, {pqrs.pk: score})
+
+        with mock.patch('apps.pqrs.vencimientos._aplicar_transiciones', side_effect=DatabaseError('caída')):
+            with self.assertRaises(DatabaseError):
+                procesar_vencimientos()
+
+        self.assertEqual(self.redis.zsets[ZSET_VENCIMIENTOS], {str(pqrs.pk).encode(): score})
+
+
+class CalendarioHabilTests(TestCase):
+
+    def setUp(self):
+        # Octubre de 2026 con el lunes festivo del 12
+        self.calendario = CalendarioHabil(date(2026, 10, 1), date(2026, 10, 31), festivos=[date(2026, 10, 12)])
+
+    def test_suma_saltando_fines_de_semana_y_festivos(self):
+        self.assertEqual(self.calendario.sumar_dias_habiles(date(2026, 10, 9), 1), date(2026, 10, 13))
+        self.assertEqual(self.calendario.sumar_dias_habiles(date(2026, 10, 1), 0), date(2026, 10, 1))
+
+    def test_fechas_fuera_del_calendario(self):
+        for fecha, dias in ((date(2026, 9, 30), 1), (date(2026, 10, 30), 5)):
+            with self.assertRaises(ValueError):
+                self.calendario.sumar_dias_habiles(fecha, dias)
+
+    def test_lote_consulta_una_vez_por_dia_y_plazo(self):
+        calendario = CalendarioHabil(date(2026, 1, 1), date(2026, 12, 31), festivos=[date(2026, 10, 12)])
+        radicacion = timezone.make_aware(datetime(2026, 10, 9, 8, 30))
+        radicaciones = [
+            (radicacion, 'peticion'),
+            (radicacion + timedelta(hours=2), 'queja'),
+            (radicacion, 'sugerencia'),
+            (radicacion + timedelta(days=3), 'peticion'),
+        ]
+        with mock.patch('apps.pqrs.sla.obtener_calendario', return_value=calendario):
+            esperadas = [calcular_fecha_limite(*radicacion) for radicacion in radicaciones]
+            with mock.patch.object(calendario, 'sumar_dias_habiles', wraps=calendario.sumar_dias_habiles) as sumar:
+                self.assertEqual(calcular_fechas_limite_lote(radicaciones), esperadas)
+
+        # peticion y queja tienen el mismo plazo: (9 oct, 15), (9 oct, 30) y (12 oct, 15)
+        self.assertEqual(sumar.call_count, 3)
+
+
+class RecalcularFechasLimiteTests(TestCase):
+
+    def test_reprograma_vencimientos_e_invalida_consultas(self):
+        pqrs = crear_pqrs()
+        PQRS.objects.filter(pk=pqrs.pk).update(fecha_limite_respuesta=timezone.now())
+
+        with mock.patch(
+            'apps.pqrs.management.commands.recalcular_fechas_limite.reconstruir_programacion', return_value=1
+        ) as reconstruir, mock.patch(
+            'apps.pqrs.management.commands.recalcular_fechas_limite.invalidar_consulta'
+        ) as invalidar:
+            call_command('recalcular_fechas_limite', stdout=mock.Mock())
+
+        reconstruir.assert_called_once()
+        invalidar.assert_called_once_with(pqrs.numero_radicado)
+        pqrs.refresh_from_db()
+        self.assertGreater(pqrs.fecha_limite_respuesta, timezone.now())
+
+
+class ListadoPQRSTests(TestCase):
+    """El listado hace las mismas consultas sin importar el tamaño de la página"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = User.objects.create_user('gestor', password='clave', rol='gestor', area='Atención')
+        for numero in range(30):
+            crear_pqrs(responsable=cls.gestor if numero % 2 else None, area_responsable='Atención')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.gestor)
+
+    def _consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(consultas), respuesta.data['results']
+
+    def test_paginacion_por_numero(self):
+        # COUNT(*) + página con el responsable en el mismo JOIN
+        with self.assertNumQueries(2):
+            self.client.get('/api/pqrs/')
+        with mock.patch.object(PageNumberPagination, 'page_size', 5):
+            with self.assertNumQueries(2):
+                respuesta = self.client.get('/api/pqrs/')
+        self.assertEqual(len(respuesta.data['results']), 5)
+
+    def test_paginacion_por_cursor(self):
+        pequena, resultados_pequena = self._consultas('/api/pqrs/?paginacion=cursor&page_size=5')
+        grande, resultados_grande = self._consultas('/api/pqrs/?paginacion=cursor&page_size=25')
+
+        self.assertEqual((len(resultados_pequena), len(resultados_grande)), (5, 25))
+        # Solo la página, sin COUNT(*)
+        self.assertEqual(pequena, grande)
+        self.assertEqual(grande, 1)
+
+
+class PaginacionCursorTests(TestCase):
+    """Recorrido del listado con la paginación keyset en ambos sentidos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gestor = User.objects.create_user('gestor', password='clave', rol='gestor')
+        ahora = timezone.now()
+        for numero in range(11):
+            pqrs = crear_pqrs()
+            # Grupos de tres con la misma fecha: el id desempata
+            PQRS.objects.filter(pk=pqrs.pk).update(fecha_radicacion=ahora - timedelta(hours=numero // 3))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.gestor)
+
+    def _pagina(self, url):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def _recorrer(self, url, enlace):
+        paginas = []
+        while url:
+            pagina = self._pagina(url)
+            paginas.append([pqrs['id'] for pqrs in pagina['results']])
+            url = pagina[enlace]
+        return paginas
+
+    def test_recorrido_hacia_adelante_y_hacia_atras(self):
+        esperado = list(PQRS.objects.order_by('-fecha_radicacion', '-id').values_list('id', flat=True))
+
+        adelante = self._recorrer('/api/pqrs/?paginacion=cursor&page_size=4', 'next')
+        self.assertEqual([len(pagina) for pagina in adelante], [4, 4, 3])
+        self.assertEqual(sum(adelante, []), esperado)
+
+        # Desde la última página, los enlaces previous devuelven las mismas páginas
+        ultima = self._pagina('/api/pqrs/?paginacion=cursor&page_size=4')
+        while ultima['next']:
+            ultima = self._pagina(ultima['next'])
+        atras = self._recorrer(ultima['previous'], 'previous')
+        self.assertEqual(atras, adelante[-2::-1])
+        self.assertIsNone(self._pagina('/api/pqrs/?paginacion=cursor&page_size=4')['previous'])
+
+    def test_orden_ascendente_por_otro_campo(self):
+        esperado = list(PQRS.objects.order_by('numero_radicado', 'id').values_list('id', flat=True))
+        paginas = self._recorrer('/api/pqrs/?paginacion=cursor&page_size=5&ordenar=numero_radicado', 'next')
+        self.assertEqual(sum(paginas, []), esperado)
+
+    def test_cursor_invalido(self):
+        invalidos = [
+            'no-es-base64',
+            urlsafe_b64encode(b'{"v": 1}').decode(),
+            urlsafe_b64encode(b'{"v": "no es fecha", "id": 1}').decode(),
+            urlsafe_b64encode(b'{"v": null, "id": 1}').decode(),
+            urlsafe_b64encode(b'{"v": ["2026-10-18"], "id": 1}').decode(),
+            urlsafe_b64encode(b'{"v": {"a": 1}, "id": 1}').decode(),
+            urlsafe_b64encode(b'{"v": "2026-10-18T00:00:00", "id": "x"}').decode(),
+            urlsafe_b64encode(b'[1, 2]').decode(),
+        ]
+        for cursor in invalidos:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f'/api/pqrs/?cursor={cursor}').status_code, 404)
+
+    def test_conteo_exacto(self):
+        pagina = self._pagina('/api/pqrs/?paginacion=cursor&page_size=4&conteo=exacto')
+        self.assertEqual(pagina['count'], 11)
+        self.assertNotIn('count', self._pagina('/api/pqrs/?paginacion=cursor&page_size=4'))
+
+
+class FiltrosListadoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        ahora = timezone.now()
+        cls.al_dia = crear_pqrs()
+        cls.en_tramite_vencida = crear_pqrs(estado='en_tramite')
+        cls.vencida = crear_pqrs(estado='vencido')
+        cls.resuelta = crear_pqrs(estado='resuelto')
+        # Fecha límite pasada sin que el barrido la haya marcado
+        PQRS.objects.filter(pk__in=[cls.en_tramite_vencida.pk, cls.vencida.pk, cls.resuelta.pk]).update(
+            fecha_limite_respuesta=ahora - timedelta(days=1)
+        )
+
+    def _filtrar(self, estado):
+        return set(filtrar_pqrs(PQRS.objects.all(), {'estado': estado}).values_list('pk', flat=True))
+
+    def test_estado_filtra_por_el_estado_vigente(self):
+        self.assertEqual(self._filtrar('vencido'), {self.en_tramite_vencida.pk, self.vencida.pk})
+        self.assertEqual(self._filtrar('en_tramite'), set())
+        self.assertEqual(self._filtrar('pendiente'), {self.al_dia.pk})
+        self.assertEqual(self._filtrar('resuelto'), {self.resuelta.pk})
+        self.assertEqual(self._filtrar('pendiente,vencido'), {self.al_dia.pk, self.en_tramite_vencida.pk, self.vencida.pk})
+
+    def test_coincide_con_el_estado_mostrado(self):
+        for estado, _ in PQRS.ESTADO_CHOICES:
+            mostrados = PQRS.objects.with_semaforo().filter(estado_actual=estado).values_list('pk', flat=True)
+            self.assertEqual(self._filtrar(estado), set(mostrados), estado)
+
+
+@unittest.skipUnless(connection.vendor == 'mysql', 'EXPLAIN con el formato de MySQL')
+class IndicesListadoTests(TestCase):
+    """Cada combinación de filtros del listado se resuelve con un índice de PQRS"""
+
+    COMBINACIONES = [
+        {'estado': 'pendiente'},
+        {'estado': 'vencido'},
+        {'estado': 'pendiente,en_tramite'},
+        {'tipo': 'queja', 'estado': 'pendiente'},
+        {'area_responsable': 'Area 3', 'estado': 'pendiente'},
+        {'area_responsable': 'Area 3', 'fecha_limite_desde': '2026-10-01', 'estado': 'en_tramite'},
+        {'responsable': 'ninguno', 'estado': 'pendiente'},
+        {'color_semaforo': 'rojo'},
+        {'color_semaforo': 'amarillo'},
+        {'fecha_radicacion_desde': '2026-10-01', 'fecha_radicacion_hasta': '2026-10-07'},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        tipos = [tipo for tipo, _ in PQRS.TIPO_CHOICES]
+        estados = [estado for estado, _ in PQRS.ESTADO_CHOICES]
+        PQRS.objects.bulk_create([
+            PQRS(
+                numero_radicado=f'PQRS-20261018-9{numero:05d}',
+                tipo=tipos[numero % len(tipos)],
+                estado=estados[numero % len(estados)],
+                asunto='Asunto',
+                descripcion='Descripción',
+                nombre_completo='Ana Pérez',
+                correo_electronico=f'ana{numero}@example.com',
+                area_responsable=f'Area {numero % 40}',
+                fecha_limite_respuesta=timezone.now() + timedelta(hours=numero - 1000),
+            )
+            for numero in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE TABLE {PQRS._meta.db_table}')
+
+    def test_filtros_usan_indice(self):
+        for params in self.COMBINACIONES:
+            sql, sql_params = filtrar_pqrs(PQRS.objects.all(), params).query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN {sql}', sql_params)
+                columnas = [col[0] for col in cursor.description]
+                plan = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+            for paso in plan:
+                with self.subTest(params=params):
+                    self.assertNotEqual(paso['type'], 'ALL')
+                    self.assertIsNotNone(paso['key'])
+
+
+class BusquedaRadicadoTests(TestCase):
+
+    def test_prefijo_de_radicado(self):
+        primera = crear_pqrs(numero_radicado='PQRS-20261017-000001')
+        segunda = crear_pqrs(numero_radicado='PQRS-20261017-000002')
+        crear_pqrs(numero_radicado='PQRS-20261018-000001')
+
+        encontradas = buscar_pqrs(PQRS.objects.all(), 'pqrs-20261017')
+        self.assertEqual(set(encontradas), {primera, segunda})
+        self.assertEqual(list(buscar_pqrs(PQRS.objects.all(), 'PQRS-20261017-000002')), [segunda])
+
+
+@unittest.skipUnless(connection.vendor == 'mysql', 'Índices FULLTEXT de MySQL')
+class BusquedaTextoTests(TransactionTestCase):
+    """InnoDB solo indexa en FULLTEXT las filas confirmadas, por eso no se usa TestCase"""
+
+    def test_busca_en_asunto_nombre_y_respuestas(self):
+        por_asunto = crear_pqrs(asunto='Alumbrado público dañado')
+        por_nombre = crear_pqrs(nombre_completo='Gertrudis Villamizar')
+        por_respuesta = crear_pqrs()
+        RespuestaPQRS.objects.create(pqrs=por_respuesta, respuesta='Se programó la poda del arbolado')
+
+        for termino, esperada in (
+            ('alumbrado', por_asunto),
+            ('Villamizar', por_nombre),
+            ('arbolado', por_respuesta),
+        ):
+            with self.subTest(termino=termino):
+                self.assertEqual(list(buscar_pqrs(PQRS.objects.all(), termino)), [esperada])
+
+    def test_relevancia_incluye_las_respuestas(self):
+        por_respuesta = crear_pqrs()
+        RespuestaPQRS.objects.create(pqrs=por_respuesta, respuesta='Se programó la poda del arbolado')
+
+        self.assertGreater(buscar_pqrs(PQRS.objects.all(), 'arbolado').get().relevancia, 0)
+
+    def test_maximo_de_coincidencias_por_indice(self):
+        for _ in range(5):
+            crear_pqrs(asunto='Alumbrado público dañado')
+
+        with override_settings(PQRS_CONFIG={**settings.PQRS_CONFIG, 'BUSQUEDA_MAXIMO_COINCIDENCIAS': 3}):
+            self.assertEqual(buscar_pqrs(PQRS.objects.all(), 'alumbrado').count(), 3)
+
+
+class AlmacenamientoTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        parche = override_settings(MEDIA_ROOT=directorio)
+        parche.enable()
+        self.addCleanup(parche.disable)
+
+    def test_reutilizar_un_blob_sin_referencias_lo_protege_de_la_limpieza(self):
+        contenido = b'%PDF-1.4 adjunto'
+        digest = hashlib.sha256(contenido).hexdigest()
+        nombre = almacenamiento_adjuntos.consolidar(digest, '.pdf', len(contenido), contenido=contenido)
+        # Blob huérfano desde antes de la gracia (p. ej. de una PQRS borrada)
+        BlobAdjunto.objects.filter(sha256=digest).update(fecha_actualizacion=timezone.now() - timedelta(days=2))
+
+        # Una subida nueva con el mismo contenido, antes de crear su PQRS
+        self.assertEqual(
+            almacenamiento_adjuntos.consolidar(digest, '.pdf', len(contenido), contenido=contenido), nombre
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(recolectar_blobs(gracia=timedelta(hours=1)), 0)
+        self.assertTrue(almacenamiento_adjuntos.exists(nombre))
+
+
+@override_settings(PQRS_CONFIG={
+    **settings.PQRS_CONFIG, 'ADJUNTO_TAMANO_MAXIMO': 4096, 'ADJUNTOS_TAMANO_CHUNK': 1024,
+})
+class AdjuntosRechazadosTests(TestCase):
+    """Adjuntos rechazados por tamaño, extensión o contenido, sin dejar archivos en el storage"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        parche = override_settings(MEDIA_ROOT=self.directorio)
+        parche.enable()
+        self.addCleanup(parche.disable)
+        self.client = APIClient()
+
+    def _archivos(self):
+        return [nombre for _, _, nombres in os.walk(self.directorio) for nombre in nombres]
+
+    def _crear_pqrs(self, nombre, contenido):
+        datos = {
+            'tipo': 'peticion',
+            'asunto': 'Solicitud de información',
+            'descripcion': 'Descripción de prueba',
+            'nombre_completo': 'Ana Pérez',
+            'correo_electronico': 'ana@example.com',
+            'archivo_adjunto': SimpleUploadedFile(nombre, contenido),
+        }
+        return self.client.post('/api/pqrs/', datos, format='multipart')
+
+    def assertRechazado(self, respuesta, campo='archivo_adjunto'):
+        self.assertEqual(respuesta.status_code, 400)
+        if campo:
+            self.assertIn(campo, respuesta.data)
+
+    def test_extension_y_contenido(self):
+        casos = [
+            ('programa.exe', b'MZ\x90\x00'),
+            ('informe.pdf', b'\x89PNG\r\n\x1a\n' + b'0' * 100),
+            ('foto.png', b'%PDF-1.4'),
+            ('notas.txt', b'texto\x00binario'),
+            ('vacio.txt', b''),
+        ]
+        for nombre, contenido in casos:
+            with self.subTest(nombre=nombre):
+                self.assertRechazado(self._crear_pqrs(nombre, contenido))
+        self.assertFalse(PQRS.objects.exists())
+        self.assertEqual(self._archivos(), [])
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_supera_el_tamano_mientras_llega(self):
+        # En partes de 1KB: pasa a un temporal en el storage antes de superar los 4KB
+        abrir_temporal = mock.patch.object(
+            almacenamiento_adjuntos, 'abrir_temporal', wraps=almacenamiento_adjuntos.abrir_temporal
+        )
+        with mock.patch.object(AdjuntoPQRSUploadHandler, 'chunk_size', 1024), abrir_temporal as temporal:
+            respuesta = self._crear_pqrs('informe.pdf', b'%PDF-' + b'0' * 8192)
+        self.assertRechazado(respuesta)
+        temporal.assert_called_once()
+        # El temporal se borra al rechazar
+        self.assertEqual(self._archivos(), [])
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_content_length_mayor_que_el_limite(self):
+        with mock.patch.object(AdjuntoPQRSUploadHandler, 'receive_data_chunk') as recibir:
+            self.assertRechazado(self._crear_pqrs('informe.pdf', b'%PDF-' + b'0' * 8192))
+        # Se rechaza sin leer el cuerpo
+        recibir.assert_not_called()
+
+    def test_subida_por_partes(self):
+        for datos, campo in [
+            ({'nombre': 'programa.exe', 'tamano': 100}, None),
+            ({'nombre': 'informe.pdf', 'tamano': 8192}, None),
+            ({'nombre': 'informe.pdf', 'tamano': 0}, 'tamano'),
+        ]:
+            with self.subTest(**datos):
+                self.assertRechazado(self.client.post('/api/subidas/', datos, format='json'), campo)
+        self.assertFalse(SubidaAdjunto.objects.exists())
+
+        subida = self.client.post('/api/subidas/', {'nombre': 'informe.pdf', 'tamano': 1500}, format='json').data
+        url = f"/api/subidas/{subida['id']}/"
+
+        def enviar(offset, datos):
+            return self.client.put(f'{url}chunks/{offset}/', datos, content_type='application/octet-stream')
+
+        self.assertRechazado(enviar(100, b'0' * 1024), 'offset')
+        self.assertRechazado(enviar(0, b'%PDF-' + b'0' * 2000), 'detail')
+        self.assertRechazado(enviar(1024, b'0' * 100), 'detail')
+        self.assertRechazado(enviar(0, b'\x89PNG\r\n\x1a\n' + b'0' * 1016), 'archivo')
+        self.assertRechazado(self.client.post(f'{url}finalizar/'), 'faltantes')
+
+        self.assertEqual(enviar(0, b'%PDF-' + b'0' * 1019).status_code, 200)
+        respuesta = self.client.post(f'{url}finalizar/')
+        self.assertRechazado(respuesta, 'faltantes')
+        self.assertEqual(respuesta.data['faltantes'], ['1024'])
+
+
+@override_settings(PQRS_CONFIG={**settings.PQRS_CONFIG, 'ADJUNTOS_TAMANO_CHUNK': 1024, 'ADJUNTOS_MAXIMOS': 2})
+class SubidasPorPartesTests(TestCase):
+    """Referencias del blob de una subida finalizada y carreras con la finalización"""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        parche = override_settings(MEDIA_ROOT=directorio)
+        parche.enable()
+        self.addCleanup(parche.disable)
+        self.client = APIClient()
+
+    def _finalizada(self, contenido=b'%PDF-1.4 adjunto'):
+        subida = self.client.post(
+            '/api/subidas/', {'nombre': 'informe.pdf', 'tamano': len(contenido)}, format='json'
+        ).data
+        url = f"/api/subidas/{subida['id']}/"
+        self.client.put(f'{url}chunks/0/', contenido, content_type='application/octet-stream')
+        self.assertEqual(self.client.post(f'{url}finalizar/').status_code, 200)
+        return SubidaAdjunto.objects.get(pk=subida['id'])
+
+    def test_la_subida_finalizada_retiene_su_blob(self):
+        subida = self._finalizada()
+        self.assertEqual(BlobAdjunto.objects.get(archivo=subida.archivo).referencias, 1)
+
+        # La limpieza de blobs no lo toca aunque pase la gracia
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(recolectar_blobs(gracia=timedelta(0)), 0)
+        self.assertTrue(almacenamiento_adjuntos.exists(subida.archivo))
+
+        # Al purgar la subida sin usar se libera la referencia
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(limpiar_subidas(timezone.now() + timedelta(seconds=1)), 1)
+        self.assertEqual(BlobAdjunto.objects.get(archivo=subida.archivo).referencias, 0)
+
+    def test_la_referencia_pasa_al_adjunto_de_la_pqrs(self):
+        subida = self._finalizada()
+        pqrs = crear_pqrs()
+
+        adjuntar_subidas(pqrs, [subida])
+
+        self.assertFalse(SubidaAdjunto.objects.exists())
+        self.assertEqual(pqrs.adjuntos.get().archivo.name, subida.archivo)
+        self.assertEqual(BlobAdjunto.objects.get(archivo=subida.archivo).referencias, 1)
+
+    def test_subida_purgada_antes_de_crear_la_pqrs(self):
+        subida = self._finalizada()
+        limpiar_subidas(timezone.now() + timedelta(seconds=1))
+
+        with self.assertRaises(ValidationError):
+            adjuntar_subidas(crear_pqrs(), [subida])
+
+    def test_parte_despues_de_finalizar(self):
+        subida = self._finalizada()
+        respuesta = self.client.put(
+            f'/api/subidas/{subida.pk}/chunks/0/', b'%PDF-1.4 adjunto', content_type='application/octet-stream'
+        )
+        self.assertEqual(respuesta.status_code, 409)
+
+    def test_el_adjunto_directo_cuenta_en_el_maximo(self):
+        subidas = [str(self._finalizada(contenido).pk) for contenido in (b'%PDF-1 uno', b'%PDF-1 dos')]
+        datos = {
+            'tipo': 'peticion',
+            'asunto': 'Solicitud de información',
+            'descripcion': 'Descripción de prueba',
+            'nombre_completo': 'Ana Pérez',
+            'correo_electronico': 'ana@example.com',
+            'subidas': subidas,
+        }
+        self.assertTrue(PQRSCreateSerializer(data=datos).is_valid())
+
+        serializer = PQRSCreateSerializer(data={**datos, 'archivo_adjunto': SimpleUploadedFile('a.pdf', b'%PDF-1 tres')})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('subidas', serializer.errors)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class CambioEstadoTests(TestCase):
+    """La PQRS, su historial y el resumen diario cambian juntos o no cambian"""
+
+    def setUp(self):
+        administrador = User.objects.create_user('admin', password='clave', rol='administrador')
+        self.client = APIClient()
+        self.client.force_authenticate(administrador)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pqrs = crear_pqrs()
+
+    def _falla_el_historial(self, metodo, url, datos=None):
+        from apps.dashboard.models import ResumenDiario
+
+        resumen = list(ResumenDiario.objects.values_list('estado', 'total'))
+        with mock.patch.object(HistorialPQRS.objects, 'create', side_effect=DatabaseError('sin espacio')):
+            with self.captureOnCommitCallbacks(execute=True), self.assertRaises(DatabaseError):
+                getattr(self.client, metodo)(url, datos, format='json')
+
+        self.pqrs.refresh_from_db()
+        self.assertEqual(self.pqrs.estado, 'pendiente')
+        self.assertIsNone(self.pqrs.fecha_cierre)
+        self.assertEqual(list(ResumenDiario.objects.values_list('estado', 'total')), resumen)
+
+    def test_cambiar_estado(self):
+        self._falla_el_historial(
+            'patch', f'/api/pqrs/{self.pqrs.pk}/cambiar_estado/', {'estado_nuevo': 'resuelto', 'observacion': 'Listo'}
+        )
+
+    def test_archivar(self):
+        self._falla_el_historial('post', f'/api/pqrs/{self.pqrs.pk}/archivar/')
+
+
+class DetallePQRSTests(TestCase):
+
+    def test_no_publica_la_ruta_del_adjunto(self):
+        gestor = User.objects.create_user('gestor', password='clave', rol='gestor')
+        pqrs = crear_pqrs()
+        PQRS.objects.filter(pk=pqrs.pk).update(archivo_adjunto='pqrs_attachments/blobs/ab/abcdef.pdf')
+        cliente = APIClient()
+        cliente.force_authenticate(gestor)
+
+        data = cliente.get(f'/api/pqrs/{pqrs.pk}/').data
+
+        self.assertNotIn('archivo_adjunto', data)
+        self.assertTrue(data['url_adjunto'].endswith(f'/api/pqrs/{pqrs.pk}/adjunto/'))
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_cambiar_estado_responde_urls_absolutas(self):
+        administrador = User.objects.create_user('admin', password='clave', rol='administrador')
+        pqrs = crear_pqrs()
+        PQRS.objects.filter(pk=pqrs.pk).update(archivo_adjunto='pqrs_attachments/blobs/ab/abcdef.pdf')
+        cliente = APIClient()
+        cliente.force_authenticate(administrador)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = cliente.patch(
+                f'/api/pqrs/{pqrs.pk}/cambiar_estado/', {'estado_nuevo': 'en_tramite', 'observacion': 'En revisión'}, format='json'
+            )
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            respuesta.data['data']['url_adjunto'], cliente.get(f'/api/pqrs/{pqrs.pk}/').data['url_adjunto']
+        )
+        self.assertEqual(respuesta.data['data']['url_adjunto'], f'http://testserver/api/pqrs/{pqrs.pk}/adjunto/')
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class ConsultaPublicaTests(TestCase):
+    """Consulta por radicado cacheada con ETag e invalidada al cambiar la PQRS"""
+
+    def setUp(self):
+        cache.clear()
+        self.pqrs = crear_pqrs()
+        self.url = f'/api/pqrs/consultar/{self.pqrs.numero_radicado}/'
+        self.client = APIClient()
+
+    def test_if_none_match_responde_304(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+
+        # La segunda consulta sale de la caché, sin tocar la base de datos
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH='"otro"')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['numero_radicado'], self.pqrs.numero_radicado)
+
+    def test_cambio_de_estado_invalida_la_consulta(self):
+        administrador = User.objects.create_user('admin', password='clave', rol='administrador')
+        etag = self.client.get(self.url)['ETag']
+
+        cliente = APIClient()
+        cliente.force_authenticate(administrador)
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = cliente.patch(
+                f'/api/pqrs/{self.pqrs.pk}/cambiar_estado/',
+                {'estado_nuevo': 'en_tramite', 'observacion': 'En revisión'},
+                format='json',
+            )
+        self.assertEqual(respuesta.status_code, 200)
+
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual(respuesta.data['estado'], 'en_tramite')
+
+    def test_radicado_inexistente(self):
+        self.assertEqual(self.client.get('/api/pqrs/consultar/PQRS-20261018-999999/').status_code, 404)
+
+
+class AlertasBandejaTests(TestCase):
+
+    def test_barrido_publica_las_alertas_por_lotes(self):
+        for _ in range(5):
+            pqrs = crear_pqrs(area_responsable='Atención')
+            PQRS.objects.filter(pk=pqrs.pk).update(fecha_limite_respuesta=timezone.now() + timedelta(hours=1))
+
+        with mock.patch('apps.pqrs.bandeja._enviar') as enviar, \
+                mock.patch('apps.pqrs.tareas.notificar_alertas', partial(notificar_alertas, lote=2)):
+            with self.captureOnCommitCallbacks() as callbacks:
+                recalcular_semaforos()
+            # Nada se carga ni se publica antes de confirmar el barrido
+            enviar.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        lotes = [llamada.args[0] for llamada in enviar.call_args_list]
+        self.assertEqual([len(envios) for envios in lotes], [2, 2, 1])
+        self.assertTrue(all(
+            mensaje['motivo'] == 'semaforo' and mensaje['pqrs']['color_semaforo'] in ['amarillo', 'rojo']
+            for envios in lotes for _, mensaje in envios
+        ))
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class BandejaConsumerTests(TransactionTestCase):
+
+    def _cliente(self, usuario):
+        origen = (b'origin', settings.CHANNELS_ALLOWED_ORIGINS[0].encode())
+        return ClienteWebSocket(f'/ws/bandeja/?token={AccessToken.for_user(usuario)}', [origen])
+
+    def test_solo_gestores(self):
+        supervisor = User.objects.create_user('supervisor', password='clave', rol='supervisor')
+        self.assertEqual(async_to_sync(self._cliente(supervisor).conectar)(), (False, 4403))
+
+    def test_nueva_sin_asignar_y_asignacion_al_area(self):
+        gestor = User.objects.create_user('gestor', password='clave', rol='gestor', area='Atención')
+        otro = User.objects.create_user('otro', password='clave', rol='gestor', area='Jurídica')
+
+        def asignar(pqrs):
+            pqrs.area_responsable = 'Atención'
+            pqrs.save()
+
+        async def escenario():
+            cliente, cliente_otro = self._cliente(gestor), self._cliente(otro)
+            self.assertEqual(await cliente.conectar(), (True, None))
+            self.assertEqual(await cliente_otro.conectar(), (True, None))
+
+            # Radicada por el ciudadano: sin área ni responsable, llega a todos los gestores
+            pqrs = await sync_to_async(crear_pqrs)()
+            for bandeja in (cliente, cliente_otro):
+                mensaje = await bandeja.recibir_json()
+                self.assertEqual((mensaje['tipo'], mensaje['pqrs']['id']), ('nueva', pqrs.pk))
+
+            # El gestor del área no la ve salir de sin asignar: solo le llega asignada
+            await sync_to_async(asignar)(pqrs)
+            recibido = await cliente.recibir_json()
+            self.assertTrue(await cliente.sin_mensajes())
+            self.assertEqual(await cliente_otro.recibir_json(), {'tipo': 'retirada', 'id': pqrs.pk})
+            self.assertTrue(await cliente_otro.sin_mensajes())
+
+            await cliente.desconectar()
+            await cliente_otro.desconectar()
+            return recibido
+
+        recibido = async_to_sync(escenario)()
+        self.assertEqual((recibido['tipo'], recibido['pqrs']['area_responsable']), ('asignada', 'Atención'))
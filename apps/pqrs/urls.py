@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PQRSViewSet
+from .views import PQRSViewSet, SubidaAdjuntoViewSet
 
 router = DefaultRouter()
 router.register(r'pqrs', PQRSViewSet, basename='pqrs')
+router.register(r'subidas', SubidaAdjuntoViewSet, basename='subidas')
 
 urlpatterns = [
     path('', include(router.urls)),
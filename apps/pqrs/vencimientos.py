@@ -0,0 +1,180 @@
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+from .semaforo import ESTADOS_ABIERTOS, ESTADOS_CERRADOS, umbrales
+
+
+logger = logging.getLogger(__name__)
+
+# Sorted set de Redis: miembro = id de la PQRS, score = timestamp de su próxima transición
+ZSET_VENCIMIENTOS = 'pqrs:vencimientos'
+
+
+def proxima_transicion(fecha_limite, estado, ahora=None):
+    """
+    Momento en que el semáforo de una PQRS cambia de color o vence,
+    o None si ya no tiene transiciones pendientes.
+    """
+    if estado in ESTADOS_CERRADOS or fecha_limite is None:
+        return None
+
+    ahora = ahora or timezone.now()
+    amarilla, roja = umbrales()
+    transiciones = sorted({
+        fecha_limite - timedelta(days=amarilla + 1),  # verde -> amarillo
+        fecha_limite - timedelta(days=roja),           # amarillo -> rojo
+        fecha_limite,                                  # vencimiento
+    })
+    for momento in transiciones:
+        if momento > ahora:
+            return momento
+    return None
+
+
+def _agregar_a_pipeline(pipe, pqrs_id, fecha_limite, estado, ahora=None):
+    """Agrega al pipeline el ZADD/ZREM que mantiene la PQRS en el sorted set"""
+    momento = proxima_transicion(fecha_limite, estado, ahora)
+    if momento is None:
+        pipe.zrem(ZSET_VENCIMIENTOS, pqrs_id)
+    else:
+        pipe.zadd(ZSET_VENCIMIENTOS, {pqrs_id: momento.timestamp()})
+
+
+def programar_vencimiento(pqrs):
+    """Programa (o descarta) la próxima transición de la PQRS una vez confirmada la transacción"""
+    pqrs_id, fecha_limite, estado = pqrs.pk, pqrs.fecha_limite_respuesta, pqrs.estado
+
+    def _programar():
+        try:
+            pipe = get_redis_connection('default').pipeline(transaction=False)
+            _agregar_a_pipeline(pipe, pqrs_id, fecha_limite, estado)
+            pipe.execute()
+        except Exception:
+            # El barrido periódico cubre las PQRS que no se alcancen a programar
+            logger.exception('No se pudo programar el vencimiento de la PQRS %s', pqrs_id)
+
+    transaction.on_commit(_programar)
+
+
+def reconstruir_programacion(tamano_lote=5000):
+    """Vuelve a poblar el sorted set a partir de todas las PQRS abiertas"""
+    from .models import PQRS
+
+    redis = get_redis_connection('default')
+    redis.delete(ZSET_VENCIMIENTOS)
+    ahora = timezone.now()
+    total = 0
+
+    pipe = redis.pipeline(transaction=False)
+    abiertas = PQRS.objects.filter(estado__in=ESTADOS_ABIERTOS).values_list(
+        'id', 'fecha_limite_respuesta', 'estado'
+    ).order_by()
+    for pqrs_id, fecha_limite, estado in abiertas.iterator(chunk_size=tamano_lote):
+        _agregar_a_pipeline(pipe, pqrs_id, fecha_limite, estado, ahora)
+        total += 1
+        if total % tamano_lote == 0:
+            pipe.execute()
+    pipe.execute()
+
+    return total
+
+
+def segundos_hasta_proxima(maximo):
+    """Segundos que faltan para la próxima transición programada, sin exceder `maximo`"""
+    siguiente = get_redis_connection('default').zrange(ZSET_VENCIMIENTOS, 0, 0, withscores=True)
+    if not siguiente:
+        return maximo
+    return min(maximo, max(0, siguiente[0][1] - timezone.now().timestamp()))
+
+
+def procesar_vencimientos(limite=500):
+    """
+    Aplica las transiciones de semáforo que ya se cumplieron y registra la
+    notificación pqrs_vencida de las PQRS que acaban de vencer; los avisos a
+    los responsables salen en el resumen diario de vencimientos.
+    Retorna la cantidad de transiciones vencidas leídas del sorted set.
+    """
+    redis = get_redis_connection('default')
+    ahora = timezone.now()
+
+    pendientes = redis.zrangebyscore(
+        ZSET_VENCIMIENTOS, '-inf', ahora.timestamp(), start=0, num=limite, withscores=True
+    )
+    if not pendientes:
+        return 0
+
+    # Reclamar los miembros con ZREM: si otro proceso ya los tomó, ZREM retorna 0
+    pipe = redis.pipeline(transaction=False)
+    for miembro, _ in pendientes:
+        pipe.zrem(ZSET_VENCIMIENTOS, miembro)
+    reclamados = {
+        miembro: score for (miembro, score), tomado in zip(pendientes, pipe.execute()) if tomado
+    }
+    ids = [int(miembro) for miembro in reclamados]
+    if not ids:
+        return len(pendientes)
+
+    try:
+        pqrs_list = _aplicar_transiciones(ids)
+    except Exception:
+        # Devolver los reclamados al sorted set para que se reintenten en la próxima pasada
+        redis.zadd(ZSET_VENCIMIENTOS, reclamados)
+        raise
+
+    # Programar la siguiente transición de cada PQRS
+    pipe = redis.pipeline(transaction=False)
+    for pqrs in pqrs_list:
+        _agregar_a_pipeline(pipe, pqrs.pk, pqrs.fecha_limite_respuesta, pqrs.estado, ahora)
+    pipe.execute()
+
+    return len(pendientes)
+
+
+def _aplicar_transiciones(ids):
+    """Recalcula el semáforo de las PQRS abiertas de `ids` en una transacción y las retorna"""
+    from apps.dashboard.resumen import fila_resumen, registrar_cambios
+    from apps.notifications.utils import registrar_pqrs_vencidas
+    from .bandeja import COLORES_ALERTA, notificar_alertas
+    from .cache import invalidar_consulta
+    from .models import PQRS, HistorialPQRS
+
+    with transaction.atomic():
+        pqrs_list = list(
+            PQRS.objects.filter(id__in=ids, estado__in=ESTADOS_ABIERTOS)
+            .select_for_update()
+        )
+
+        vencidas = []
+        cambios_resumen = []
+        alertas = []
+        for pqrs in pqrs_list:
+            estado_anterior = pqrs.estado
+            color_anterior = pqrs.color_semaforo
+            pqrs.actualizar_semaforo()
+            if pqrs.color_semaforo != color_anterior and pqrs.color_semaforo in COLORES_ALERTA:
+                alertas.append(pqrs.pk)
+            cambios_resumen.append((pqrs._resumen_guardado, fila_resumen(pqrs)))
+            if pqrs.estado == 'vencido' and estado_anterior != 'vencido':
+                vencidas.append((pqrs, estado_anterior))
+
+        PQRS.objects.bulk_update(
+            pqrs_list, ['estado', 'color_semaforo', 'dias_restantes'], batch_size=500
+        )
+        registrar_cambios(cambios_resumen)
+        notificar_alertas(alertas)
+        HistorialPQRS.objects.bulk_create([
+            HistorialPQRS(
+                pqrs=pqrs,
+                estado_anterior=estado_anterior,
+                estado_nuevo='vencido',
+                observacion='PQRS vencida automáticamente por superar la fecha límite',
+                usuario=None
+            )
+            for pqrs, estado_anterior in vencidas
+        ])
+        registrar_pqrs_vencidas([pqrs.pk for pqrs, _ in vencidas])
+        invalidar_consulta(*[pqrs.numero_radicado for pqrs in pqrs_list])
+
+    return pqrs_list
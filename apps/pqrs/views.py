@@ -1,9 +1,21 @@
-from rest_framework import viewsets, status
+import os
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from .models import PQRS, HistorialPQRS, RespuestaPQRS
+from django.utils.http import parse_etags
+from .models import PQRS, HistorialPQRS, RespuestaPQRS, SubidaAdjunto
+from .adjuntos import AdjuntoPQRSUploadHandler
+from .busqueda import buscar_pqrs, ordenar_por_relevancia
+from .descargas import respuesta_adjunto
+from .cache import guardar_consulta, invalidar_consulta, obtener_consulta
+from .filtros import filtrar_pqrs, obtener_ordenamiento, ordenar_pqrs
+from .pagination import KeysetPagination
+from .subidas import finalizar_subida, guardar_chunk, iniciar_subida
 from .serializers import (
     PQRSCreateSerializer,
     PQRSListSerializer,
@@ -11,8 +23,9 @@ from .serializers import (
     PQRSConsultaPublicaSerializer,
     CambiarEstadoSerializer,
     ResponderPQRSSerializer,
+    SubidaAdjuntoSerializer,
 )
-from apps.notifications.utils import enviar_email_pqrs_creada, enviar_email_pqrs_respondida
+from apps.notifications.utils import notificar_pqrs_creada, notificar_pqrs_respondida
 from apps.users.permissions import CanManagePQRS
 
 
@@ -21,6 +34,64 @@ class PQRSViewSet(viewsets.ModelViewSet):
     
     queryset = PQRS.objects.all()
     
+    def initialize_request(self, request, *args, **kwargs):
+        request = super().initialize_request(request, *args, **kwargs)
+        if self.action == 'create':
+            # El adjunto se valida y se escribe en el storage mientras se recibe
+            request.upload_handlers.insert(0, AdjuntoPQRSUploadHandler(request))
+        return request
+    
+    @property
+    def paginator(self):
+        """Usa paginación por cursor con ?paginacion=cursor (o si llega un cursor)"""
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('paginacion') == 'cursor' or 'cursor' in params:
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+    
+    def get_queryset(self):
+        """Ajusta la consulta a lo que necesita cada acción"""
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            params = self.request.query_params
+            queryset = filtrar_pqrs(queryset, params)
+            queryset = ordenar_pqrs(queryset, self.get_ordenamiento())
+            
+            termino = params.get('q', '').strip()
+            if termino:
+                queryset = buscar_pqrs(queryset, termino)
+                # Sin ?ordenar= explícito, los resultados de texto van por relevancia
+                # (la paginación por cursor conserva su orden por campo)
+                if 'ordenar' not in params and not isinstance(self.paginator, KeysetPagination):
+                    queryset = ordenar_por_relevancia(queryset)
+            # Columnas del listado + semáforo vigente calculado en SQL
+            queryset = queryset.para_listado().with_semaforo()
+        elif self.action in ['retrieve', 'consultar']:
+            queryset = queryset.con_detalle()
+        return queryset
+    
+    def perform_update(self, serializer):
+        pqrs = serializer.save()
+        invalidar_consulta(pqrs.numero_radicado)
+    
+    def perform_destroy(self, instance):
+        radicado = instance.numero_radicado
+        instance.delete()
+        invalidar_consulta(radicado)
+    
+    def _detalle(self, pqrs):
+        """Serializa el detalle actualizado de una PQRS con historial y respuestas precargados"""
+        return PQRSDetailSerializer(
+            PQRS.objects.con_detalle().get(pk=pqrs.pk), context=self.get_serializer_context()
+        ).data
+    
+    def get_ordenamiento(self):
+        """Campo de orden del listado (?ordenar=), también usado por la paginación por cursor"""
+        return obtener_ordenamiento(self.request.query_params)
+    
     def get_serializer_class(self):
         """Retorna el serializer según la acción"""
         if self.action == 'create':
@@ -43,33 +114,69 @@ class PQRSViewSet(viewsets.ModelViewSet):
         """Crear una nueva PQRS (público)"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        pqrs = serializer.save()
-        
-        # Crear registro en historial
-        HistorialPQRS.objects.create(
-            pqrs=pqrs,
-            estado_anterior='',
-            estado_nuevo='pendiente',
-            observacion='PQRS registrada por el usuario',
-            usuario=None
-        )
         
-        # Enviar email de confirmación
-        enviar_email_pqrs_creada(pqrs)
+        # Si la PQRS no se crea, el blob del adjunto queda sin referencias
+        # y lo borra el comando limpiar_adjuntos
+        with transaction.atomic():
+            pqrs = serializer.save()
+            
+            # Crear registro en historial
+            HistorialPQRS.objects.create(
+                pqrs=pqrs,
+                estado_anterior='',
+                estado_nuevo='pendiente',
+                observacion='PQRS registrada por el usuario',
+                usuario=None
+            )
+            
+            # Encolar email de confirmación (lo envía el worker de notificaciones)
+            notificar_pqrs_creada(pqrs)
         
         return Response({
             'success': True,
             'message': 'PQRS creada exitosamente. Revise su correo electrónico.',
             'numero_radicado': pqrs.numero_radicado,
-            'data': PQRSDetailSerializer(pqrs).data
+            'data': self._detalle(pqrs)
         }, status=status.HTTP_201_CREATED)
     
     @action(detail=False, methods=['get'], url_path='consultar/(?P<radicado>[^/.]+)')
     def consultar(self, request, radicado=None):
-        """Consultar PQRS por número de radicado (público)"""
-        pqrs = get_object_or_404(PQRS, numero_radicado=radicado)
-        serializer = self.get_serializer(pqrs)
-        return Response(serializer.data)
+        """Consultar PQRS por número de radicado (público, cacheado en Redis con ETag)"""
+        version, entrada = obtener_consulta(radicado)
+        
+        if entrada is None:
+            pqrs = get_object_or_404(self.get_queryset(), numero_radicado=radicado)
+            data = self.get_serializer(pqrs).data
+            etag = guardar_consulta(radicado, version, data)
+        else:
+            data, etag = entrada['data'], entrada['etag']
+        
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+        }
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        return Response(data, headers=headers)
+    
+    @action(detail=True, methods=['get'])
+    def adjunto(self, request, pk=None):
+        """Descargar el archivo adjunto (la transferencia la hace el servidor web si está configurado)"""
+        pqrs = self.get_object()
+        if not pqrs.archivo_adjunto:
+            raise Http404('La PQRS no tiene archivo adjunto')
+        
+        ext = os.path.splitext(pqrs.archivo_adjunto.name)[1]
+        return respuesta_adjunto(request, pqrs.archivo_adjunto, f'{pqrs.numero_radicado}{ext}')
+    
+    @action(detail=True, methods=['get'], url_path=r'adjuntos/(?P<adjunto_id>\d+)')
+    def descargar_adjunto(self, request, pk=None, adjunto_id=None):
+        """Descargar uno de los adjuntos de la PQRS"""
+        pqrs = self.get_object()
+        adjunto = get_object_or_404(pqrs.adjuntos.all(), pk=adjunto_id)
+        return respuesta_adjunto(request, adjunto.archivo, adjunto.nombre_original)
     
     @action(detail=True, methods=['patch'])
     def cambiar_estado(self, request, pk=None):
@@ -82,24 +189,26 @@ class PQRSViewSet(viewsets.ModelViewSet):
             estado_nuevo = serializer.validated_data['estado_nuevo']
             observacion = serializer.validated_data['observacion']
             
-            pqrs.estado = estado_nuevo
-            if estado_nuevo in ['resuelto', 'cerrado']:
-                from django.utils import timezone
-                pqrs.fecha_cierre = timezone.now()
-            pqrs.save()
-            
-            HistorialPQRS.objects.create(
-                pqrs=pqrs,
-                estado_anterior=estado_anterior,
-                estado_nuevo=estado_nuevo,
-                observacion=observacion,
-                usuario=request.user
-            )
+            with transaction.atomic():
+                pqrs.estado = estado_nuevo
+                if estado_nuevo in ['resuelto', 'cerrado']:
+                    from django.utils import timezone
+                    pqrs.fecha_cierre = timezone.now()
+                pqrs.save()
+                
+                HistorialPQRS.objects.create(
+                    pqrs=pqrs,
+                    estado_anterior=estado_anterior,
+                    estado_nuevo=estado_nuevo,
+                    observacion=observacion,
+                    usuario=request.user
+                )
+                invalidar_consulta(pqrs.numero_radicado)
             
             return Response({
                 'success': True,
                 'message': 'Estado actualizado correctamente',
-                'data': PQRSDetailSerializer(pqrs).data
+                'data': self._detalle(pqrs)
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -111,31 +220,34 @@ class PQRSViewSet(viewsets.ModelViewSet):
         serializer = ResponderPQRSSerializer(data=request.data)
         
         if serializer.is_valid():
-            respuesta = RespuestaPQRS.objects.create(
-                pqrs=pqrs,
-                respuesta=serializer.validated_data['respuesta'],
-                usuario=request.user
-            )
-            
-            if pqrs.estado == 'pendiente':
-                pqrs.estado = 'en_tramite'
-                pqrs.save()
-                
-                HistorialPQRS.objects.create(
+            with transaction.atomic():
+                respuesta = RespuestaPQRS.objects.create(
                     pqrs=pqrs,
-                    estado_anterior='pendiente',
-                    estado_nuevo='en_tramite',
-                    observacion='Respuesta enviada por el gestor',
+                    respuesta=serializer.validated_data['respuesta'],
                     usuario=request.user
                 )
-            
-            # Enviar email de respuesta
-            enviar_email_pqrs_respondida(pqrs, respuesta)
+                
+                if pqrs.estado == 'pendiente':
+                    pqrs.estado = 'en_tramite'
+                    pqrs.save()
+                    
+                    HistorialPQRS.objects.create(
+                        pqrs=pqrs,
+                        estado_anterior='pendiente',
+                        estado_nuevo='en_tramite',
+                        observacion='Respuesta enviada por el gestor',
+                        usuario=request.user
+                    )
+                
+                invalidar_consulta(pqrs.numero_radicado)
+                
+                # Encolar email de respuesta (lo envía el worker de notificaciones)
+                notificar_pqrs_respondida(pqrs, respuesta)
             
             return Response({
                 'success': True,
                 'message': 'Respuesta enviada correctamente. El ciudadano será notificado por correo.',
-                'data': PQRSDetailSerializer(pqrs).data
+                'data': self._detalle(pqrs)
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -152,20 +264,63 @@ class PQRSViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         estado_anterior = pqrs.estado
-        pqrs.estado = 'cerrado'
-        from django.utils import timezone
-        pqrs.fecha_cierre = timezone.now()
-        pqrs.save()
-        
-        HistorialPQRS.objects.create(
-            pqrs=pqrs,
-            estado_anterior=estado_anterior,
-            estado_nuevo='cerrado',
-            observacion='PQRS archivada por el usuario',
-            usuario=request.user
-        )
+        with transaction.atomic():
+            pqrs.estado = 'cerrado'
+            from django.utils import timezone
+            pqrs.fecha_cierre = timezone.now()
+            pqrs.save()
+            
+            HistorialPQRS.objects.create(
+                pqrs=pqrs,
+                estado_anterior=estado_anterior,
+                estado_nuevo='cerrado',
+                observacion='PQRS archivada por el usuario',
+                usuario=request.user
+            )
+            invalidar_consulta(pqrs.numero_radicado)
         
         return Response({
             'success': True,
             'message': 'PQRS archivada correctamente'
-        })
\ No newline at end of file
+        })
+
+
+class SubidaAdjuntoViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Subida de adjuntos por partes (pública y reanudable): se inicia con el
+    nombre y tamaño, cada parte se envía con PUT en su offset y al finalizar
+    el id de la subida se incluye en `subidas` al crear la PQRS.
+    """
+    
+    queryset = SubidaAdjunto.objects.all()
+    serializer_class = SubidaAdjuntoSerializer
+    permission_classes = [AllowAny]
+    
+    def perform_create(self, serializer):
+        serializer.instance = iniciar_subida(
+            serializer.validated_data['nombre'],
+            serializer.validated_data['tamano']
+        )
+    
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<offset>\d+)')
+    def chunk(self, request, pk=None, offset=None):
+        """Recibe una parte del archivo (cuerpo binario) en el offset indicado"""
+        subida = self.get_object()
+        try:
+            longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            longitud = 0
+        # Rechazar antes de leer un cuerpo mayor que una parte
+        if longitud > subida.tamano_chunk:
+            raise ValidationError({'detail': f'Cada parte debe tener máximo {subida.tamano_chunk} bytes'})
+        
+        subida = guardar_chunk(subida.pk, int(offset), request.body)
+        return Response(self.get_serializer(subida).data)
+    
+    @action(detail=True, methods=['post'])
+    def finalizar(self, request, pk=None):
+        """Ensambla la subida cuando están todas las partes"""
+        subida = finalizar_subida(self.get_object().pk)
+        return Response(self.get_serializer(subida).data)
@@ -0,0 +1,46 @@
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+def _token(scope):
+    """
+    Access token de la conexión: ?token= en la URL (el navegador no puede
+    enviar encabezados en un WebSocket) o Authorization: Bearer para los
+    clientes que no son navegadores. OriginValidator rechaza toda conexión
+    sin Origin, así que esos clientes también deben enviar un Origin de
+    CHANNELS_ALLOWED_ORIGINS.
+    """
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+    if token:
+        return token[0]
+    for nombre, valor in scope.get('headers', []):
+        if nombre == b'authorization':
+            partes = valor.decode().split()
+            if len(partes) == 2 and partes[0] == 'Bearer':
+                return partes[1]
+    return None
+
+
+@database_sync_to_async
+def _usuario(token):
+    if not token:
+        return AnonymousUser()
+    autenticacion = JWTAuthentication()
+    try:
+        return autenticacion.get_user(autenticacion.get_validated_token(token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Autentica las conexiones WebSocket con el mismo JWT de la API"""
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = await _usuario(_token(scope))
+        return await super().__call__(scope, receive, send)
@@ -1,3 +1,41 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.pqrs.tests import ClienteWebSocket
+from .models import User
 
-# Create your tests here.
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ConexionWebSocketTests(TransactionTestCase):
+    """
+    Autenticación JWT y validación de Origin de core.asgi para los WebSockets.
+    database_sync_to_async cierra la conexión si está dentro de una transacción,
+    por eso no se usa TestCase.
+    """
+
+    def setUp(self):
+        usuario = User.objects.create_user('supervisor', password='clave', rol='supervisor')
+        self.token = str(AccessToken.for_user(usuario))
+        self.origen = (b'origin', settings.CHANNELS_ALLOWED_ORIGINS[0].encode())
+
+    def _conectar(self, ruta, headers):
+        async def conectar():
+            cliente = ClienteWebSocket(ruta, headers)
+            resultado = await cliente.conectar()
+            if resultado[0]:
+                await cliente.desconectar()
+            return resultado
+
+        return async_to_sync(conectar)()
+
+    def test_token_en_la_url(self):
+        self.assertEqual(self._conectar(f'/ws/dashboard/?token={self.token}', [self.origen]), (True, None))
+        self.assertEqual(self._conectar('/ws/dashboard/?token=invalido', [self.origen]), (False, 4401))
+
+    def test_bearer_requiere_origin_permitido(self):
+        bearer = (b'authorization', f'Bearer {self.token}'.encode())
+        self.assertEqual(self._conectar('/ws/dashboard/', [bearer, self.origen]), (True, None))
+        # Sin Origin o con uno no permitido, OriginValidator cierra antes de autenticar
+        self.assertFalse(self._conectar('/ws/dashboard/', [bearer])[0])
+        self.assertFalse(self._conectar('/ws/dashboard/', [bearer, (b'origin', b'https://otro.example')])[0])
@@ -9,8 +9,21 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')  # Corrección:
 
 django_asgi_app = get_asgi_application()  # Corrección: "asgi" no "asgl"
 
-from channels.routing import ProtocolTypeRouter
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import OriginValidator
+from django.conf import settings
+from apps.dashboard.routing import websocket_urlpatterns as dashboard_ws
+from apps.pqrs.routing import websocket_urlpatterns as pqrs_ws
+from apps.pqrs.tareas import TareasPeriodicasApp
+from apps.users.middleware import JWTAuthMiddleware
 
 application = ProtocolTypeRouter({
-    "http": django_asgi_app  # Maneja conexiones HTTP tradicionales
+    "http": django_asgi_app,  # Maneja conexiones HTTP tradicionales
+    # WebSockets autenticados con JWT y solo desde los orígenes permitidos
+    # (también para los clientes con Authorization: Bearer, que deben enviar Origin)
+    "websocket": OriginValidator(
+        JWTAuthMiddleware(URLRouter(dashboard_ws + pqrs_ws)),
+        settings.CHANNELS_ALLOWED_ORIGINS,
+    ),
+    "lifespan": TareasPeriodicasApp(),  # Tareas en segundo plano (barrido del semáforo)
 })
\ No newline at end of file
@@ -116,6 +116,14 @@ DATABASES = {
     }
 }
 
+# Conexión aparte (autocommit) para reservar bloques de radicados: la reserva se
+# confirma de inmediato aunque la transacción de la petición haga rollback, y la
+# fila del consecutivo no queda bloqueada mientras termina de crearse la PQRS
+DATABASES['radicados'] = {
+    **DATABASES['default'],
+    'TEST': {'MIRROR': 'default'},
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -182,7 +190,7 @@ REST_FRAMEWORK = {
 }
 
 
-CHANNELS_LAYERS = {
+CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",  # Usa Redis para comunicación en tiempo real entre instancias
         "CONFIG": {
@@ -222,8 +230,50 @@ PQRS_CONFIG = {
         'reclamo': 15,
         'sugerencia': 30,
     },
+    # Los días de respuesta se cuentan en días hábiles: sin fines de semana ni DiaFestivo
+    'DIAS_NO_HABILES': [5, 6],  # sábado y domingo (date.weekday())
+    'CALENDARIO_ANOS_ATRAS': 10,
+    'CALENDARIO_ANOS_ADELANTE': 2,
+    'CALENDARIO_VIGENCIA_SEGUNDOS': 3600,
     'DIAS_ALERTA_AMARILLA': 3,
     'DIAS_ALERTA_ROJA': 0,
+    # Consecutivos de radicado que reserva cada proceso por viaje a la BD
+    'RADICADO_BLOQUE': 20,
+    # Barrido del semáforo dentro del proceso ASGI (0 = desactivado, usar el comando actualizar_semaforos)
+    'INTERVALO_SEMAFORO_SEGUNDOS': env.int("INTERVALO_SEMAFORO_SEGUNDOS", default=0),
+    'LOCK_SEMAFORO_SEGUNDOS': 600,
+    # Programador de vencimientos (comando procesar_vencimientos)
+    'VENCIMIENTOS_LOTE': 500,
+    'VENCIMIENTOS_ESPERA_MAXIMA': 60,
+    # Caché de la consulta pública por radicado
+    'CONSULTA_CACHE_SEGUNDOS': 300,
+    'CONSULTA_VERSION_SEGUNDOS': 86400,
+    # Búsqueda de texto: coincidencias más relevantes que se toman de cada índice FULLTEXT
+    'BUSQUEDA_MAXIMO_COINCIDENCIAS': 1000,
+    # Tamaño máximo del adjunto de una PQRS (se corta la subida al superarlo)
+    'ADJUNTO_TAMANO_MAXIMO': 10 * 1024 * 1024,
+    # Horas que un blob de adjunto sin referencias se conserva antes de borrarlo (limpiar_adjuntos)
+    'ADJUNTOS_GRACIA_HORAS': 24,
+    # Subidas por partes: tamaño de cada parte (debe caber en DATA_UPLOAD_MAX_MEMORY_SIZE) y adjuntos por PQRS
+    'ADJUNTOS_TAMANO_CHUNK': 1024 * 1024,
+    'ADJUNTOS_MAXIMOS': 5,
+    # Descarga de adjuntos: 'django' (FileResponse), 'nginx' (X-Accel-Redirect) o 'apache' (X-Sendfile)
+    'ADJUNTOS_DESCARGA': env("ADJUNTOS_DESCARGA", default="django"),
+    # Location interna de nginx que apunta a MEDIA_ROOT (solo para 'nginx')
+    'ADJUNTOS_URL_INTERNA': '/protected-media/',
+    # Caché del dashboard: vigencia (con variación aleatoria de ±10%), tiempo extra en que se
+    # sirve vencida mientras un solo proceso la recalcula, y lock/espera de ese cálculo
+    'DASHBOARD_CACHE_SEGUNDOS': 60,
+    'DASHBOARD_CACHE_VARIACION': 0.1,
+    'DASHBOARD_CACHE_OBSOLETO_SEGUNDOS': 600,
+    'DASHBOARD_LOCK_SEGUNDOS': 30,
+    'DASHBOARD_ESPERA_SEGUNDOS': 5,
+    # Bandeja de salida de notificaciones (comando enviar_notificaciones)
+    'NOTIFICACIONES_LOTE': 100,
+    'NOTIFICACIONES_MAX_INTENTOS': 8,
+    'NOTIFICACIONES_REINTENTO_SEGUNDOS': 60,
+    'NOTIFICACIONES_REINTENTO_MAXIMO_SEGUNDOS': 6 * 3600,
+    'NOTIFICACIONES_ESPERA_SEGUNDOS': 30,
 }
 
 
@@ -231,7 +281,13 @@ PQRS_CONFIG = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CHANNELS_ALLOWED_ORIGINS = "http://localhost:3000"  # Permite conexiones WebSocket desde frontend en puerto 3000
+# Orígenes desde los que se aceptan conexiones WebSocket (frontend en puerto 3000).
+# Las conexiones sin encabezado Origin se rechazan: los clientes que no son
+# navegadores (Authorization: Bearer) deben enviar uno de estos orígenes
+CHANNELS_ALLOWED_ORIGINS = env.list(
+    "CHANNELS_ALLOWED_ORIGINS",
+    default=["http://localhost:3000", "http://127.0.0.1:3000"],
+)
 
 # JWT Configuration
 from datetime import timedelta
@@ -22,6 +22,5 @@ urlpatterns = [
     
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
-# Servir archivos media en desarrollo
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Los adjuntos (MEDIA_ROOT) no se sirven directamente: se descargan con
+# autorización en /api/pqrs/{id}/adjunto/
\ No newline at end of file